@@ -0,0 +1,115 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Script to benchmark the signal, beam background and dirt      ##
+##              background drivers end to end on synthetic (or given) files,  ##
+##              reporting files/s, vertices/s and peak RSS for each driver.   ##
+##                                                                            ##
+################################################################################
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import h5py
+import synthetic_files
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+DRIVER_DIR = os.path.join(REPO_DIR, 'truth_kinematics', 'file_parsing')
+IMPORT_DIRS = [os.path.join(REPO_DIR, 'common'), DRIVER_DIR, os.path.join(REPO_DIR, 'truth_kinematics', 'plotting')]
+
+# Driver script, extra arguments and whether it takes -w
+DRIVERS = dict(signal=('signal_kinematics.py', ['-n', '{n_files}'], True),
+               beam_background=('beam_background_kinematics.py', ['-n', '{n_files}'], False),
+               dirt=('dirt_background_kinematics.py', ['-n', '{n_files}'], True))
+
+
+####------------------------------ RUN DRIVERS -----------------------------####
+
+# Runs driver (a key of DRIVERS) on the files of sim_dir in a scratch working
+# directory (outputs and plots are written there) and returns its benchmark:
+# wall time, files/s, vertices/s and peak RSS of the driver process (the
+# largest of it and its worker processes). The driver log is kept in log_dir.
+def run_driver(driver, sim_dir, input_type, workers, log_dir):
+    script, extra_args, takes_workers = DRIVERS[driver]
+    sim_files = sorted(glob.glob(os.path.join(sim_dir, '*'+synthetic_files.FILE_EXTENSIONS[input_type])))
+    n_files = len(sim_files)
+    n_vertices = count_vertices(sim_files)
+
+    args = [sys.executable, os.path.join(DRIVER_DIR, script), '-d', sim_dir, '-t', input_type]
+    args += [arg.format(n_files=n_files) for arg in extra_args]
+    if takes_workers: args += ['-w', str(workers)]
+    env = dict(os.environ, MPLBACKEND='Agg', PYTHONPATH=os.pathsep.join(IMPORT_DIRS+[os.environ.get('PYTHONPATH', '')]))
+
+    log_file = os.path.join(log_dir, driver+'.log')
+    with tempfile.TemporaryDirectory() as work_dir, open(log_file, 'w') as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(args, cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_time = time.perf_counter()-start
+    process.returncode = exit_code = os.waitstatus_to_exitcode(status) # reaped by wait4, not by Popen
+
+    return dict(driver=driver, status='ok' if exit_code==0 else 'failed (exit '+str(exit_code)+', see '+log_file+')',
+                files=n_files, vertices=n_vertices, wall_time_s=wall_time,
+                files_per_s=n_files/wall_time, vertices_per_s=n_vertices/wall_time,
+                peak_rss_mb=usage.ru_maxrss/1024.) # ru_maxrss is in kB on Linux
+
+
+def count_vertices(sim_files):
+    n_vertices = 0
+    for sim_file in sim_files:
+        with h5py.File(sim_file, 'r') as sim_h5: n_vertices += len(sim_h5['vertices'])
+    return n_vertices
+
+
+def print_benchmarks(benchmarks):
+    print('{:<16}{:>7}{:>10}{:>10}{:>10}{:>13}{:>15}  {}'.format('driver', 'files', 'vertices', 'time [s]', 'files/s', 'vertices/s', 'peak RSS [MB]', 'status'))
+    for b in benchmarks:
+        print('{:<16}{:>7}{:>10}{:>10.2f}{:>10.2f}{:>13.1f}{:>15.1f}  {}'.format(b['driver'], b['files'], b['vertices'], b['wall_time_s'],
+                                                                             b['files_per_s'], b['vertices_per_s'], b['peak_rss_mb'], b['status']))
+
+
+
+def main(sim_dir, input_type, drivers, workers, n_files, n_spills, vertices_per_spill, segments_per_cm, seed, report):
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        if sim_dir is None:
+            sim_dir = os.path.join(scratch_dir, 'sim')
+            synthetic_files.make_files(sim_dir, n_files, input_type, n_spills, vertices_per_spill, segments_per_cm, seed=seed)
+        log_dir = os.path.dirname(os.path.abspath(report)) if report is not None else os.getcwd()
+
+        benchmarks = [run_driver(driver, os.path.abspath(sim_dir), input_type, workers, log_dir) for driver in drivers]
+
+    print_benchmarks(benchmarks)
+    if report is not None:
+        with open(report, 'w') as outfile: json.dump(benchmarks, outfile, indent=4)
+
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--sim_dir', default=None, type=str, \
+                        help='''Directory of simulation files to benchmark on; if not given, synthetic files are written to a temporary directory''')
+    parser.add_argument('-t', '--input_type', default='larnd', choices=['edep', 'larnd'], type=str, \
+                        help='''string corresponding to the file type: edep or larnd''')
+    parser.add_argument('--drivers', default=list(DRIVERS), nargs='+', choices=list(DRIVERS), \
+                        help='''Drivers to benchmark''')
+    parser.add_argument('-w', '--workers', default=1, type=int, \
+                        help='''Number of worker processes passed to the drivers that support it''')
+    parser.add_argument('-n', '--n_files', default=4, type=int, \
+                        help='''Number of synthetic files''')
+    parser.add_argument('-s', '--n_spills', default=20, type=int, \
+                        help='''Number of spills per synthetic file''')
+    parser.add_argument('-v', '--vertices_per_spill', default=4, type=int, \
+                        help='''Number of neutrino vertices per spill in synthetic files''')
+    parser.add_argument('-g', '--segments_per_cm', default=0.5, type=float, \
+                        help='''Number of segments per cm of charged particle track in synthetic files''')
+    parser.add_argument('--seed', default=0, type=int, \
+                        help='''Random seed of the first synthetic file''')
+    parser.add_argument('-r', '--report', default=None, type=str, \
+                        help='''JSON file to write the benchmark report to; driver logs are written next to it''')
+    args = parser.parse_args()
+    main(**vars(args))
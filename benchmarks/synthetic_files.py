@@ -0,0 +1,193 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Methods and script to write synthetic edep-sim/larnd-sim      ##
+##              HDF5 files with the MiniRun4 datasets and compound dtypes     ##
+##              (mc_hdr, mc_stack, trajectories, vertices, segments), for     ##
+##              benchmarks and for developing without production files.      ##
+##              EVENTS ARE NOT PHYSICAL: only the structure is realistic.     ##
+##                                                                            ##
+################################################################################
+
+import argparse
+import os
+import h5py
+import numpy as np
+
+####----------------------------- MINIRUN4 DTYPES --------------------------####
+
+MC_HDR_DTYPE = np.dtype([('event_id','u4'), ('vertex_id','u8'), ('vertex','f4',(4,)), ('target','u4'), ('reaction','i4'),
+                         ('isCC','?'), ('isQES','?'), ('isMEC','?'), ('isRES','?'), ('isDIS','?'), ('isCOH','?'),
+                         ('Enu','f4'), ('nu_4mom','f4',(4,)), ('nu_pdg','i4'), ('Elep','f4'), ('lep_mom','f4'),
+                         ('lep_ang','f4'), ('lep_pdg','i4'), ('q0','f4'), ('q3','f4'), ('Q2','f4'), ('x','f4'), ('y','f4')])
+
+MC_STACK_DTYPE = np.dtype([('event_id','u4'), ('vertex_id','u8'), ('traj_id','i4'), ('part_4mom','f4',(4,)),
+                           ('part_pdg','i4'), ('part_status','i4')])
+
+TRAJECTORIES_DTYPE = np.dtype([('event_id','u4'), ('vertex_id','u8'), ('traj_id','u4'), ('local_traj_id','u4'),
+                               ('parent_id','i4'), ('E_start','f4'), ('pxyz_start','f4',(3,)), ('xyz_start','f4',(3,)),
+                               ('t_start','f4'), ('E_end','f4'), ('pxyz_end','f4',(3,)), ('xyz_end','f4',(3,)),
+                               ('t_end','f4'), ('pdg_id','i4'), ('start_process','u4'), ('start_subprocess','u4'),
+                               ('end_process','u4'), ('end_subprocess','u4')])
+
+VERTICES_DTYPE = np.dtype([('event_id','u4'), ('vertex_id','u8'), ('x_vert','f4'), ('y_vert','f4'), ('z_vert','f4'),
+                           ('t_vert','f4')])
+
+SEGMENTS_DTYPE = np.dtype([('event_id','u4'), ('vertex_id','u8'), ('segment_id','u4'), ('traj_id','u4'),
+                           ('x_start','f4'), ('y_start','f4'), ('z_start','f4'), ('t_start','f4'),
+                           ('x_end','f4'), ('y_end','f4'), ('z_end','f4'), ('t_end','f4'),
+                           ('dE','f4'), ('dx','f4'), ('dEdx','f4'), ('pdg_id','i4'), ('n_electrons','u4'),
+                           ('n_photons','u4'), ('x','f4'), ('y','f4'), ('z','f4'), ('t','f4'),
+                           ('tran_diff','f4'), ('long_diff','f4'), ('pixel_plane','i4')])
+
+DATASET_DTYPES = dict(mc_hdr=MC_HDR_DTYPE, mc_stack=MC_STACK_DTYPE, trajectories=TRAJECTORIES_DTYPE,
+                      vertices=VERTICES_DTYPE, segments=SEGMENTS_DTYPE)
+
+FILE_EXTENSIONS = dict(larnd='.LARNDSIM.h5', edep='.EDEPSIM.h5')
+
+# Approximate masses [MeV] of final state particles
+MASSES = {13:105.66, 2212:938.27, 2112:939.57, 211:139.57, 111:134.98, 11:0.511, 22:0.}
+
+VERTEX_ID_STRIDE = 10000 # vertex_id = spill_id*VERTEX_ID_STRIDE + vertex number in spill
+
+
+####---------------------------- SYNTHETIC EVENTS --------------------------####
+
+# Writes a synthetic file of n_spills spills (event_id first_spill, ...) with
+# vertices_per_spill neutrino vertices each. A fraction active_fraction of the
+# vertices are in the 2x2 active LAr volume, the others upstream (dirt). Each
+# vertex has a GENIE header and stack, and primary trajectories (muon or
+# electron, protons, neutrons, sometimes a pion) with proton rescattering
+# chains and secondary electron children; charged trajectories deposit
+# segments_per_cm segments per cm of track.
+def make_file(file_name, n_spills=20, vertices_per_spill=4, segments_per_cm=0.5, active_fraction=0.7, seed=0, first_spill=0):
+    if vertices_per_spill>=VERTEX_ID_STRIDE: raise ValueError('at most '+str(VERTEX_ID_STRIDE-1)+' vertices per spill')
+    rng = np.random.default_rng(seed)
+    records = {name: [] for name in DATASET_DTYPES}
+    counter = dict(traj_id=0, segment_id=0)
+    for spill_id in range(first_spill, first_spill+n_spills):
+        for v in range(vertices_per_spill):
+            vertex_records(rng, spill_id, spill_id*VERTEX_ID_STRIDE+v, active_fraction, segments_per_cm, counter, records)
+
+    with h5py.File(file_name, 'w') as sim_h5:
+        for name, dtype in DATASET_DTYPES.items():
+            data = np.concatenate(records[name]) if records[name] else np.zeros(0, dtype=dtype)
+            sim_h5.create_dataset(name, data=data, chunks=True, maxshape=(None,))
+
+
+# Appends the records of one vertex (one structured array per dataset) to records
+def vertex_records(rng, spill_id, vertex_id, active_fraction, segments_per_cm, counter, records):
+    if rng.random()<active_fraction:
+        pos = np.array([rng.choice([-1,1])*rng.uniform(5,60), rng.uniform(-330,-206), rng.choice([1250.,1330.])+rng.uniform(-14,14)])
+    else:
+        pos = np.array([rng.uniform(-300,300), rng.uniform(-400,-100), rng.uniform(500,1100)])
+
+    nu_pdg = int(rng.choice([-14,-14,14,12]))
+    is_cc = bool(rng.random()<0.7)
+    if not is_cc: lep_pdg = nu_pdg
+    elif abs(nu_pdg)==14: lep_pdg = -13 if nu_pdg<0 else 13
+    else: lep_pdg = -11 if nu_pdg<0 else 11
+    mode = rng.integers(0,5) # QES, MEC, RES, DIS, COH
+    enu = rng.uniform(1000,10000)
+
+    ghdr = np.zeros(1, dtype=MC_HDR_DTYPE)
+    ghdr[['event_id','vertex_id','target','reaction','isCC']] = (spill_id, vertex_id, 18, mode, is_cc)
+    for i, flag in enumerate(['isQES','isMEC','isRES','isDIS','isCOH']): ghdr[flag] = mode==i
+    ghdr['vertex'] = (*pos, 0.)
+    ghdr[['Enu','nu_pdg','Elep','lep_mom','lep_ang','lep_pdg','Q2']] = (enu, nu_pdg, enu*0.8, enu*0.79, rng.uniform(0,20), lep_pdg, rng.uniform(0,1e6))
+    ghdr['nu_4mom'] = (0., 0., enu, enu)
+    records['mc_hdr'].append(ghdr)
+
+    final_state = [lep_pdg]+[2212]*rng.integers(0,4)+[2112]*rng.integers(0,3)
+    if rng.random()<0.3: final_state.append(int(rng.choice([211,-211,111])))
+    gstack = np.zeros(len(final_state)+1, dtype=MC_STACK_DTYPE)
+    gstack[['event_id','vertex_id','traj_id']] = (spill_id, vertex_id, -1)
+    gstack['part_pdg'] = [nu_pdg]+final_state
+    gstack['part_status'] = [0]+[1]*len(final_state)
+    gstack['part_4mom'][0] = (0., 0., enu, enu)
+    records['mc_stack'].append(gstack)
+
+    for pdg in final_state:
+        start = pos.copy(); parent_id = -1
+        for c in range(rng.integers(1,3) if pdg==2212 else 1):
+            if abs(pdg)==13:
+                direction = np.array([rng.normal(0,0.1), rng.normal(0,0.1), 1.])
+                length = rng.uniform(300,1200)
+            else:
+                direction = rng.normal(size=3); direction[2] = abs(direction[2])+0.5
+                length = rng.uniform(1,80)
+            direction /= np.linalg.norm(direction)
+            end = start+direction*length
+            energy = MASSES.get(abs(pdg),100.)+rng.uniform(10,500)
+            traj_id = trajectory_records(spill_id, vertex_id, parent_id, pdg, energy, direction*rng.uniform(100,1500), direction*100,
+                                         start, end, segments_per_cm, rng, counter, records)
+            if rng.random()<0.3: # secondary electron child
+                trajectory_records(spill_id, vertex_id, traj_id, 11, 5., np.array([0.,0.,1.]), np.zeros(3),
+                                   end, end+0.5, segments_per_cm, rng, counter, records)
+            parent_id = traj_id; start = end
+
+    vert = np.zeros(1, dtype=VERTICES_DTYPE)
+    vert[['event_id','vertex_id','x_vert','y_vert','z_vert']] = (spill_id, vertex_id, *pos)
+    records['vertices'].append(vert)
+
+
+# Appends a trajectory from start to end and, for charged particles, its
+# segments to records; returns the trajectory ID
+def trajectory_records(spill_id, vertex_id, parent_id, pdg, energy, p_start, p_end, start, end, segments_per_cm, rng, counter, records):
+    traj_id = counter['traj_id']; counter['traj_id'] += 1
+    traj = np.zeros(1, dtype=TRAJECTORIES_DTYPE)
+    traj[['event_id','vertex_id','traj_id','local_traj_id','parent_id','E_start','E_end','t_end','pdg_id']] = \
+        (spill_id, vertex_id, traj_id, traj_id, parent_id, energy, max(energy-20., 0.), 1., pdg)
+    traj['pxyz_start'] = p_start; traj['xyz_start'] = start
+    traj['pxyz_end'] = p_end; traj['xyz_end'] = end
+    records['trajectories'].append(traj)
+
+    if pdg in (2112, 111, 22): return traj_id
+    n_seg = max(1, int(np.linalg.norm(end-start)*segments_per_cm))
+    points = start+np.outer(np.linspace(0,1,n_seg+1), end-start)
+    seg = np.zeros(n_seg, dtype=SEGMENTS_DTYPE)
+    seg[['event_id','vertex_id','traj_id','pdg_id','n_electrons','n_photons']] = (spill_id, vertex_id, traj_id, pdg, 100, 100)
+    seg['segment_id'] = np.arange(counter['segment_id'], counter['segment_id']+n_seg); counter['segment_id'] += n_seg
+    for i, axis in enumerate('xyz'):
+        seg[axis+'_start'] = points[:-1,i]; seg[axis+'_end'] = points[1:,i]
+        seg[axis] = (points[:-1,i]+points[1:,i])/2.
+    seg['dx'] = np.linalg.norm(points[1:]-points[:-1], axis=1)
+    seg['dE'] = rng.uniform(0.5,4,n_seg)
+    seg['dEdx'] = seg['dE']/seg['dx']
+    records['segments'].append(seg)
+    return traj_id
+
+
+# Writes n_files synthetic files named like MiniRun4 production files to
+# out_dir; file i holds spills i*n_spills, ... and uses seed+i. Returns the
+# file names.
+def make_files(out_dir, n_files, input_type='larnd', n_spills=20, vertices_per_spill=4, segments_per_cm=0.5, active_fraction=0.7, seed=0):
+    os.makedirs(out_dir, exist_ok=True)
+    file_names = []
+    for i in range(n_files):
+        file_name = os.path.join(out_dir, 'MiniRun4_1E19_RHC.'+input_type+'.'+str(i).zfill(5)+FILE_EXTENSIONS[input_type])
+        make_file(file_name, n_spills, vertices_per_spill, segments_per_cm, active_fraction, seed+i, first_spill=i*n_spills)
+        file_names.append(file_name)
+    return file_names
+
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--out_dir', default=None, required=True, type=str, \
+                        help='''string corresponding to the path of the directory to write synthetic file(s) to''')
+    parser.add_argument('-n', '--n_files', default=1, type=int, \
+                        help='''Number of files to write''')
+    parser.add_argument('-t', '--input_type', default='larnd', choices=['edep', 'larnd'], type=str, \
+                        help='''string corresponding to the file type to mimic: edep or larnd''')
+    parser.add_argument('-s', '--n_spills', default=20, type=int, \
+                        help='''Number of spills per file''')
+    parser.add_argument('-v', '--vertices_per_spill', default=4, type=int, \
+                        help='''Number of neutrino vertices per spill''')
+    parser.add_argument('-g', '--segments_per_cm', default=0.5, type=float, \
+                        help='''Number of segments per cm of charged particle track''')
+    parser.add_argument('-a', '--active_fraction', default=0.7, type=float, \
+                        help='''Fraction of vertices in the active LAr volume; the others are dirt vertices''')
+    parser.add_argument('--seed', default=0, type=int, \
+                        help='''Random seed of the first file''')
+    args = parser.parse_args()
+    make_files(**vars(args))
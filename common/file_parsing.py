@@ -6,6 +6,15 @@
 ##                                                                            ##
 ################################################################################
 import json
+import os
+import queue
+import threading
+import zipfile
+import h5py
+import numpy as np
+import pot_accounting
+import stage_timing
+import table_columns
 
 ####--------------------------- HDF5 FILE PARSING --------------------------####
 
@@ -31,10 +40,23 @@ def print_keys_attributes(sim_h5, input_type):
         print('VERTICES', sim_h5['vertices'].dtype)
         
 
-def get_spill_data(sim_h5, spill_id, input_type):
+def spill_variables(input_type):
     parse_var=''; seg_var=''
     if input_type=='edep': parse_var='event_id'; seg_var='segments' # vertexID is new for MiniRun4
-    elif input_type=='larnd': parse_var='event_id'; seg_var='segments'# vertexID is new for MiniRun4, so is segments for larnd files        
+    elif input_type=='larnd': parse_var='event_id'; seg_var='segments'# vertexID is new for MiniRun4, so is segments for larnd files
+    return parse_var, seg_var
+
+
+def get_spill_data(sim_h5, spill_id, input_type, spill_index=None, fields=None):
+    parse_var, seg_var = spill_variables(input_type)
+
+    if spill_index is not None:
+        ghdr = read_rows(dataset(sim_h5, 'mc_hdr', fields), index_rows(spill_index, 'mc_hdr', spill_id))
+        gstack = read_rows(dataset(sim_h5, 'mc_stack', fields), index_rows(spill_index, 'mc_stack', spill_id))
+        traj = read_rows(dataset(sim_h5, 'trajectories', fields), index_rows(spill_index, 'trajectories', spill_id))
+        vert = read_rows(dataset(sim_h5, 'vertices', fields), index_rows(spill_index, 'vertices', spill_id))
+        seg = read_rows(dataset(sim_h5, seg_var, fields), index_rows(spill_index, seg_var, spill_id))
+        return ghdr, gstack, traj, vert, seg
 
     ghdr_spill_mask = sim_h5['mc_hdr'][:][parse_var]==spill_id
     gstack_spill_mask = sim_h5['mc_stack'][:][parse_var]==spill_id
@@ -51,6 +73,396 @@ def get_spill_data(sim_h5, spill_id, input_type):
     return ghdr, gstack, traj, vert, seg
 
 
+####------------------ FIELD PROJECTION OF HDF5 DATASETS -------------------####
+
+# The spill readers (get_spill_data with a spill index, iterate_spills, 
+# iterate_selected_spills) accept fields, a dict of dataset name -> list of 
+# fields to read, so that only those columns of the compound records are 
+# materialized; other datasets are read in full. analysis_fields lists the
+# trajectory and segment fields used by the common methods (truth, geometry,
+# kinematics, particle association) and the signal and beam background 
+# characterizations, with the spill and vertex IDs needed to partition them.
+analysis_fields = dict(trajectories=['event_id', 'vertex_id', 'traj_id', 'parent_id', 'pdg_id', 'E_start',
+                                     'pxyz_start', 'xyz_start', 'xyz_end'],
+                       segments=['event_id', 'vertex_id', 'traj_id', 'x_start', 'y_start', 'z_start',
+                                 'x_end', 'y_end', 'z_end', 'dE'])
+
+
+# Dataset name of sim_h5, projected on fields[name] if given
+def dataset(sim_h5, name, fields=None):
+    dset = sim_h5[name]
+    if fields is None or name not in fields: return dset
+    return FieldProjection(dset, fields[name])
+
+
+# Read-only view of an HDF5 dataset reading only some fields (with h5py field 
+# selection). Has the len, dtype and chunks of a dataset used by the readers;
+# the dtype holds the selected fields only.
+class FieldProjection:
+
+    def __init__(self, dset, fields):
+        self.dset = dset
+        self.fields = [field for field in fields if field in dset.dtype.names]
+        self.dtype = np.dtype([(field, dset.dtype.fields[field][0]) for field in self.fields])
+        self.chunks = dset.chunks
+
+    def __len__(self):
+        return len(self.dset)
+
+    def __getitem__(self, selection):
+        return self.dset.fields(self.fields)[selection]
+
+
+####---------------------- SPILL INDEX FOR HDF5 DATASETS -------------------####
+
+# Index built once per file so that get_spill_data reads only the rows of the
+# requested spill instead of scanning every dataset for every spill. For each
+# dataset, rows[offsets[i]:offsets[i+1]] are the (ascending) row numbers 
+# belonging to ids[i]. Datasets are usually already ordered by spill, in
+# which case rows is None and the offsets are row numbers themselves.
+def build_spill_index(sim_h5, input_type):
+    parse_var, seg_var = spill_variables(input_type)
+    spill_index = dict()
+    for name in ['mc_hdr', 'mc_stack', 'trajectories', 'vertices', seg_var]:
+        spill_index[name] = index_column(sim_h5[name][parse_var]) # reads the spill ID column only
+    return spill_index
+
+
+# Same as build_spill_index, but partitioning each dataset by vertex ID
+def build_vertex_index(sim_h5, input_type):
+    seg_var = spill_variables(input_type)[1]
+    vertex_index = dict()
+    for name in ['mc_hdr', 'mc_stack', 'trajectories', 'vertices', seg_var]:
+        if 'vertex_id' not in sim_h5[name].dtype.names: continue
+        vertex_index[name] = index_column(sim_h5[name]['vertex_id'])
+    return vertex_index
+
+
+def index_column(col):
+    if np.all(col[1:]>=col[:-1]): rows = None
+    else:
+        rows = np.argsort(col, kind='stable')
+        col = col[rows]
+    ids, starts = np.unique(col, return_index=True)
+    return dict(ids=ids, rows=rows, offsets=np.append(starts, len(col)))
+
+
+# Rows of dataset name belonging to a spill (spill index) or vertex (vertex index)
+def index_rows(index, name, id):
+    index = index[name]
+    i = np.searchsorted(index['ids'], id)
+    if i==len(index['ids']) or index['ids'][i]!=id:
+        return np.array([], dtype=int) # id has no entries in this dataset
+    start, stop = index['offsets'][i], index['offsets'][i+1]
+    if index['rows'] is None: return np.arange(start, stop)
+    return index['rows'][start:stop]
+
+
+####------------------- SPILL/VERTEX INDEX CACHE ON DISK -------------------####
+
+# The spill and vertex indices of a file are saved next to it as a sidecar
+# .npz file (or in cache_dir, if given), keyed on the file path, size and
+# modification time so that a changed or moved file triggers a rebuild. An
+# unreadable sidecar (e.g. truncated) is rebuilt as well.
+@stage_timing.timed_function('io: spill/vertex index')
+def load_file_index(sim_h5, input_type, cache_dir=None):
+    sim_file = os.path.abspath(sim_h5.filename)
+    stat = os.stat(sim_file)
+    key = np.array([sim_file, str(stat.st_size), str(stat.st_mtime_ns), input_type])
+    cache_name = sim_file+'.index.npz'
+    if cache_dir is not None: cache_name = os.path.join(cache_dir, os.path.basename(cache_name))
+
+    try:
+        with np.load(cache_name) as cache:
+            if np.array_equal(cache['key'], key):
+                return unpack_index(cache, 'spill'), unpack_index(cache, 'vertex')
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        pass # no usable cache (missing, stale or corrupt), rebuild below
+
+    spill_index = build_spill_index(sim_h5, input_type)
+    vertex_index = build_vertex_index(sim_h5, input_type)
+    arrays = dict(key=key)
+    arrays.update(pack_index(spill_index, 'spill'))
+    arrays.update(pack_index(vertex_index, 'vertex'))
+    try:
+        with open(cache_name+'.tmp', 'wb') as outfile: np.savez(outfile, **arrays)
+        os.replace(cache_name+'.tmp', cache_name)
+    except OSError:
+        print('Could not write index cache: ', cache_name)
+    return spill_index, vertex_index
+
+
+def pack_index(index, kind):
+    out = {}
+    for name in index.keys():
+        for field in index[name].keys():
+            if index[name][field] is not None: out[kind+'/'+name+'/'+field] = index[name][field]
+    return out
+
+
+def unpack_index(cache, kind):
+    index = {}
+    for array_name in cache.files:
+        if not array_name.startswith(kind+'/'): continue
+        name, field = array_name.split('/')[1:]
+        if name not in index: index[name] = dict(rows=None)
+        index[name][field] = cache[array_name]
+    return index
+
+
+def read_rows(dset, rows):
+    if len(rows)==0: return dset[0:0]
+    if rows[-1]-rows[0]+1==len(rows): return dset[rows[0]:rows[-1]+1] # contiguous
+    return dset[rows]
+
+
+####-------------------- STREAMING SPILLS FROM HDF5 FILES ------------------####
+
+default_block_size = 256*1024**2 # [bytes] block of rows held in memory per dataset by iterate_spills
+
+# Generator over the spills of a file. Each dataset is read in blocks of whole 
+# HDF5 chunks covering several consecutive spills, so peak memory is set by 
+# block_size (per dataset) rather than by the size of the largest dataset. A
+# spill larger than block_size is read on its own. Yielded arrays are views of
+# the current block and should not be kept beyond the spill they belong to.
+def iterate_spills(sim_h5, input_type, block_size=default_block_size, spill_index=None, fields=None):
+    seg_var = spill_variables(input_type)[1]
+    if spill_index is None: spill_index = load_file_index(sim_h5, input_type)[0]
+
+    names = ['mc_hdr', 'mc_stack', 'trajectories', 'vertices', seg_var]
+    dsets = dict(); blocks = dict()
+    for name in names:
+        dsets[name] = dataset(sim_h5, name, fields)
+        blocks[name] = dict(start=0, stop=0, data=None)
+
+    for spill_id in spill_index['trajectories']['ids']:
+        with stage_timing.timed('io: read spill'):
+            ghdr, gstack, traj, vert, seg = [read_rows_buffered(dsets[name], index_rows(spill_index, name, spill_id),
+                                                                blocks[name], block_size) for name in names]
+        yield spill_id, ghdr, gstack, traj, vert, seg
+
+
+def read_rows_buffered(dset, rows, block, block_size):
+    if len(rows)==0 or rows[-1]-rows[0]+1!=len(rows): return read_rows(dset, rows) # empty or unordered spill
+    lo = rows[0]; hi = rows[-1]+1
+    if lo<block['start'] or hi>block['stop']:
+        chunk_rows = dset.chunks[0] if getattr(dset, 'chunks', None) else 1
+        block_rows = max(chunk_rows, (block_size//dset.dtype.itemsize)//chunk_rows*chunk_rows)
+        start = lo - lo%chunk_rows # align block to HDF5 chunk boundaries
+        stop = min(len(dset), max(start+block_rows, hi))
+        block['data'] = None # release previous block before reading the next one
+        block.update(start=start, stop=stop, data=dset[start:stop])
+    return block['data'][lo-block['start']:hi-block['start']]
+
+
+####------------------- SELECTION-FIRST SPILL READING ----------------------####
+
+# Two-phase alternative to iterate_spills for drivers which only characterize
+# vertices passing truth-level cuts. Phase one reads the small mc_hdr, mc_stack
+# and vertices datasets of the whole file and evaluates select(vert, ghdr,
+# gstack), a boolean array over the vertex records (e.g.
+# truth_methods.signal_truth_selection). Phase two reads trajectories only for
+# the selected vertices and segments only for those of them kept by
+# select_trajectories(vert_ids, traj) (optional, a boolean array over vert_ids),
+# using the vertex index. Reads are planned for the whole file (see plan_reads),
+# so that nearby rows are read together. Spills without selected vertices are
+# skipped. Yielded ghdr, gstack and vert are the whole spill; traj and seg hold
+# the rows of the kept vertices in file order, so per-trajectory results are
+# unchanged as long as trajectory IDs are unique within a spill.
+def iterate_selected_spills(sim_h5, input_type, select, select_trajectories=None, block_size=default_block_size,
+                            spill_index=None, vertex_index=None, fields=None):
+    parse_var, seg_var = spill_variables(input_type)
+    if spill_index is None or vertex_index is None: spill_index, vertex_index = load_file_index(sim_h5, input_type)
+
+    with stage_timing.timed('io: read truth datasets'):
+        ghdr_all, gstack_all, vert_all = [dataset(sim_h5, name, fields)[:] for name in ['mc_hdr', 'mc_stack', 'vertices']]
+    selected_all = select(vert_all, ghdr_all, gstack_all)
+    selected_spills = np.unique(vert_all[parse_var][selected_all])
+
+    dsets = dict(); plans = dict()
+    for name in ['trajectories', seg_var]:
+        dsets[name] = dataset(sim_h5, name, fields)
+        plans[name] = plan_reads(dsets[name], selected_rows(name, vert_all['vertex_id'][selected_all], selected_spills,
+                                                            spill_index, vertex_index), block_size)
+
+    for spill_id in selected_spills:
+        vert_rows = index_rows(spill_index, 'vertices', spill_id)
+        vert_ids = vert_all['vertex_id'][vert_rows][selected_all[vert_rows]]
+
+        with stage_timing.timed('io: read selected spill'):
+            ghdr, gstack, vert = [a[index_rows(spill_index, name, spill_id)] for a, name in \
+                                  [(ghdr_all, 'mc_hdr'), (gstack_all, 'mc_stack'), (vert_all, 'vertices')]]
+            traj = read_planned_rows(dsets['trajectories'], plans['trajectories'],
+                                     selected_rows('trajectories', vert_ids, [spill_id], spill_index, vertex_index))
+            if select_trajectories is not None: vert_ids = vert_ids[select_trajectories(vert_ids, traj)]
+            seg = read_planned_rows(dsets[seg_var], plans[seg_var],
+                                    selected_rows(seg_var, vert_ids, [spill_id], spill_index, vertex_index))
+        yield spill_id, ghdr, gstack, traj, vert, seg
+
+
+# Sorted rows of dataset name belonging to the vertices vert_ids; rows of the 
+# spills spill_ids for a dataset without a vertex_id column
+def selected_rows(name, vert_ids, spill_ids, spill_index, vertex_index):
+    if name in vertex_index: parts = [index_rows(vertex_index, name, vert_id) for vert_id in vert_ids]
+    else: parts = [index_rows(spill_index, name, spill_id) for spill_id in spill_ids]
+    if len(parts)==0: return np.array([], dtype=int)
+    return np.sort(np.concatenate(parts))
+
+
+# Plan of the reads covering sorted rows of dset: runs of consecutive rows are
+# merged into one read when less than an HDF5 chunk (1 MiB if not chunked)
+# apart, up to block_size per read. Returns the state used by read_planned_rows.
+def plan_reads(dset, rows, block_size=default_block_size):
+    dtype = dset.dtype
+    chunk_rows = dset.chunks[0] if getattr(dset, 'chunks', None) else max(1, (1024**2)//dtype.itemsize)
+    block_rows = max(chunk_rows, block_size//dtype.itemsize)
+    starts = []; stops = []
+    breaks = np.flatnonzero(np.diff(rows)!=1)+1
+    for run in np.split(rows, breaks) if len(rows) else []:
+        start, stop = run[0], run[-1]+1
+        if starts and start-stops[-1]<=chunk_rows and stop-starts[-1]<=block_rows: stops[-1] = stop
+        else: starts.append(start); stops.append(stop)
+    return dict(dtype=dtype, starts=np.array(starts, dtype=int), stops=np.array(stops, dtype=int), current=-1, data=None)
+
+
+# Rows (sorted, covered by plan) of dset, reading each planned range once as 
+# long as rows are requested in increasing order
+def read_planned_rows(dset, plan, rows):
+    if len(rows)==0: return np.zeros(0, dtype=plan['dtype'])
+    which = np.searchsorted(plan['stops'], rows, side='right') # planned range of each row
+    parts = []
+    for r in np.unique(which):
+        if r!=plan['current']:
+            plan['data'] = None # release previous range before reading the next one
+            plan.update(current=r, data=dset[plan['starts'][r]:plan['stops'][r]])
+        parts.append(plan['data'][rows[which==r]-plan['starts'][r]])
+    return parts[0] if len(parts)==1 else np.concatenate(parts)
+
+
+# Selected spills of sim_file (see iterate_selected_spills), read one at a time
+# while the file is open
+def selected_spills(sim_file, input_type, select, select_trajectories=None, fields=None, block_size=default_block_size):
+    with h5py.File(sim_file, 'r') as sim_h5:
+        yield from iterate_selected_spills(sim_h5, input_type, select, select_trajectories, block_size, fields=fields)
+
+
+####------------------------- PREFETCHING SPILLS ---------------------------####
+
+# Generator over the elements of iterable, produced in a background thread so
+# that the next elements are read while the current one is processed. At most
+# depth produced elements wait in the queue (plus the one being produced),
+# which bounds memory. depth=0 produces them in the calling thread. An
+# exception raised by iterable is raised by the generator at that element.
+def prefetch(iterable, depth=1):
+    if depth<1:
+        yield from iterable
+        return
+
+    loaded = queue.Queue(maxsize=depth)
+    stop = threading.Event() # set if the consumer stops early
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                loaded.put(entry, timeout=0.1)
+                return True
+            except queue.Full: continue
+        return False
+
+    def produce():
+        elements = iter(iterable)
+        try:
+            while True:
+                try: entry = (next(elements), None)
+                except StopIteration: break
+                except Exception as error: entry = (None, error)
+                if not put(entry) or entry[1] is not None: return
+            put(None)
+        finally:
+            if hasattr(elements, 'close'): elements.close() # e.g. closes the file being read
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            entry = loaded.get()
+            if entry is None: return
+            element, error = entry
+            if error is not None: raise error
+            yield element
+    finally:
+        stop.set()
+        thread.join()
+
+
+# Generator over (item, spills) for items in order, spills iterating over 
+# iterate(item) (e.g. a partial of selected_spills). Spills, not whole files, 
+# are read ahead: at most depth spills (plus the one being read and the small
+# truth datasets of the file being read, see iterate_selected_spills) are held
+# besides the one being processed. The spills of an item are to be processed 
+# before the next item is taken; spills left unprocessed are skipped. The 
+# reader thread is stopped as soon as the generator is closed (e.g. on break),
+# even while the spills of an item are still referenced.
+def prefetch_spills(items, iterate, depth=1):
+    def entries():
+        for item in items:
+            yield 'file', item
+            for spill in iterate(item): yield 'spill', spill
+            yield 'end', None
+
+    loaded = prefetch(entries(), depth)
+
+    def file_spills():
+        for kind, spill in loaded:
+            if kind=='end': return
+            yield spill
+
+    try:
+        for kind, item in loaded:
+            spills = file_spills()
+            yield item, spills
+            for spill in spills: continue # skip spills left unprocessed
+    finally: loaded.close()
+
+
+####-------------------- SPILL DATASETS GROUPED BY VERTEX -------------------####
+
+# Per-spill grouping of a dataset (e.g. traj, ghdr or gstack) by vertex ID. The
+# records are sorted by vertex ID once per spill (stable, so the order within 
+# a vertex is unchanged) and vertex_records returns a slice instead of masking
+# the whole spill for every vertex. Methods which select records by vertex ID
+# accept either the raw spill array or its vertex grouping. Derived per-record
+# columns (aligned with data, e.g. truth_methods.trajectory_origin) may be 
+# added to a grouping and are read per vertex with vertex_column.
+def group_by_vertex(a):
+    index = index_column(a['vertex_id'])
+    data = a if index['rows'] is None else a[index['rows']]
+    return dict(data=data, ids=index['ids'], offsets=index['offsets'])
+
+
+def vertex_records(a, vert_id):
+    if not isinstance(a, dict): return a[a['vertex_id']==vert_id]
+    if np.size(vert_id)!=1: return a['data'][a['data']['vertex_id']==vert_id]
+    return a['data'][vertex_slice(a, vert_id)]
+
+
+def vertex_column(a, name, vert_id):
+    if np.size(vert_id)!=1: return a[name][a['data']['vertex_id']==vert_id]
+    return a[name][vertex_slice(a, vert_id)]
+
+
+def vertex_slice(a, vert_id):
+    i = np.searchsorted(a['ids'], np.ravel(vert_id)[0])
+    if i==len(a['ids']) or a['ids'][i]!=np.ravel(vert_id)[0]: return slice(0, 0)
+    return slice(a['offsets'][i], a['offsets'][i+1])
+
+
+# All records of the spill, whether or not a has been grouped by vertex
+def spill_records(a):
+    if isinstance(a, dict): return a['data']
+    return a
+
+
 ####----------------------- OUTPUT DICTIONARY TO JSON ----------------------####
 
 def tuple_key_to_string(d):
@@ -74,6 +486,26 @@ def save_dict_to_json(d, name, if_tuple):
             json.dump(d, outfile, indent=4)    
 
 
+# Save d in the requested output format: 'json' (save_dict_to_json) or 'npz'
+# (table_columns.save_dict_to_npz, which always expects tuple keys), with its
+# POT record (see pot_accounting) if given
+@stage_timing.timed_function('output writing')
+def save_dict(d, name, if_tuple, output_format='json', pot=None):
+    if output_format=='npz': table_columns.save_dict_to_npz(d, name)
+    else: save_dict_to_json(d, name, if_tuple)
+    if pot is not None: pot_accounting.save_pot_record(pot, name)
+
+
+# Load a dictionary saved by save_dict_to_json, save_dict_to_npz or a 
+# RecordSink (see record_sinks), with keys as strings (e.g. "spill-vertex") as
+# in the JSON file
+def load_dict(file_name):
+    if file_name.endswith('.npz'): return table_columns.columns_to_dict(table_columns.load_columns(file_name))
+    with open(file_name) as infile:
+        if file_name.endswith('.jsonl'): return dict(json.loads(line) for line in infile)
+        return json.load(infile)
+
+
 ####-------------------- NUMPY/PYTHON OBJECT CONVERSIONS -------------------####
 
 def np_array_of_array_to_flat_list(a):
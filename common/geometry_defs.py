@@ -107,3 +107,10 @@ def MINERvA_bounds(i):
         bounds_relative_to_NDhall.append(bound[i] + MINERvA_center[i])
             
     return np.unique(np.array(bounds_relative_to_NDhall), axis = 0)
+
+
+####--------------- BOUNDARIES PRECOMPUTED ONCE AT IMPORT ------------------####
+
+# Index by dimension i: 0, 1, 2 -> x, y, z, e.g. tpc_bounds_table[0] == tpc_bounds(0)
+tpc_bounds_table = [tpc_bounds(i) for i in range(3)]
+MINERvA_bounds_table = [MINERvA_bounds(i) for i in range(3)]
@@ -8,57 +8,75 @@
 
 import numpy as np
 import geometry_defs
+import file_parsing
 
 
 ####------------------ POSITION LOCATION CLASSIFICATION --------------------####
 
 def fiducialized_particle_origin(traj, vert_id):
-    traj_vert_mask = traj['vertex_id']==vert_id
-    final_states = traj[traj_vert_mask]
-    for fs in final_states:
-        if fiducialized_vertex(fs['xyz_start'])==True:
-            return True
-    return False
-
-
-def fiducialized_vertex(vert_pos):
-    flag=False; x_drift_flag=False; y_vertical_flag=False; z_beam_flag=False
+    final_states = file_parsing.vertex_records(traj, vert_id)
+    return bool(np.any(fiducialized_vertices(final_states['xyz_start'])))
+
+
+# Fiducial volume containment: takes an (N,3) array of positions (or a single
+# position) and returns a boolean array of length N, using bounds precomputed 
+# in geometry_defs. There is no scalar form, so that every caller classifies 
+# positions at the TPC edges the same way.
+# Positions are compared in float64, as the scalar comparisons did: float32
+# positions compared with the float64 bounds would otherwise be compared in
+# float32, which moves the boundaries.
+def fiducialized_vertices(positions):
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    flag = np.ones(len(positions), dtype=bool)
     for i in range(3):
-        for i_bounds, bounds in enumerate(geometry_defs.tpc_bounds(i)):
-            if vert_pos[i]>bounds[0] and vert_pos[i]<bounds[1]:
-                if i==0: x_drift_flag=True; break
-                if i==1: y_vertical_flag=True
-                if i==2: z_beam_flag=True
-    if x_drift_flag==True and y_vertical_flag==True and z_beam_flag==True: flag\
-=True
+        in_bounds = np.zeros(len(positions), dtype=bool)
+        for bounds in geometry_defs.tpc_bounds_table[i]:
+            in_bounds |= (positions[:,i]>bounds[0]) & (positions[:,i]<bounds[1])
+        flag &= in_bounds
     return flag
 
 
+def segment_midpoints(seg):
+    return np.column_stack(((seg['x_start']+seg['x_end'])/2.,
+                            (seg['y_start']+seg['y_end'])/2.,
+                            (seg['z_start']+seg['z_end'])/2.))
+
+
 def tpc_vertex(vert_pos):
-    temp=[]
-    for i in range(3): temp.append(geometry_defs.tpc_bounds(i).tolist())
     tpc_fv={}
     for i in range(8): tpc_fv[i]=False
-    tpc=0
-    enclosed=False
-    for x in range(4):
-        for y in range(1):
-            for z in range(2):
-                if vert_pos[0]>temp[0][x][0] and vert_pos[0]<temp[0][x][1] and\
-                   vert_pos[1]>temp[1][y][0] and vert_pos[1]<temp[1][y][1] and\
-                   vert_pos[2]>temp[2][z][0] and vert_pos[2]<temp[2][z][1]:
-                    tpc_fv[tpc]=True
-                    return tpc_fv
-                tpc+=1
+    tpc=tpc_indices(vert_pos)[0]
+    if tpc>=0: tpc_fv[tpc]=True
     return tpc_fv
 
 
+# Vectorized TPC assignment: takes an (N,3) array of positions and returns the
+# TPC index (0-7, numbered as in tpc_vertex: 2*x_index + z_index) of each 
+# position, or -1 for positions outside the TPC active volumes
+def tpc_indices(positions):
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3) # float64, as in fiducialized_vertices
+    x_index = bounds_index(positions[:,0], geometry_defs.tpc_bounds_table[0])
+    y_index = bounds_index(positions[:,1], geometry_defs.tpc_bounds_table[1])
+    z_index = bounds_index(positions[:,2], geometry_defs.tpc_bounds_table[2])
+    inside = (x_index>=0) & (y_index==0) & (z_index>=0) & (z_index<2)
+    return np.where(inside, 2*x_index+z_index, -1)
+
+
+# Index of the (sorted, non-overlapping) [low, high] interval of bounds strictly 
+# containing each value, or -1 if there is none
+def bounds_index(values, bounds):
+    edges = np.ravel(bounds)
+    i = np.searchsorted(edges, values, side='right') # edges[i-1] <= value < edges[i]
+    inside = (i%2==1) & (values!=edges[np.maximum(i-1, 0)])
+    return np.where(inside, (i-1)//2, -1)
+
+
 def minerva_vertex(vert_pos):
     upstream=False
     flag=False; x_flag=False; y_flag=False; z_upstream_flag=False; z_downstream_flag=False
     for i in range(3):
         ctr=0
-        for i_bounds, bounds in enumerate(geometry_defs.MINERvA_bounds(i)):
+        for i_bounds, bounds in enumerate(geometry_defs.MINERvA_bounds_table[i]):
             if i==0 and vert_pos[i]>bounds[0] and vert_pos[i]<bounds[1]:
                 x_flag=True
             if i==1 and vert_pos[i]>bounds[0] and vert_pos[i]<bounds[1]:
@@ -80,9 +98,9 @@ def minerva_vertex(vert_pos):
 ####------------------ PARTICLE CONTAINMENT / ENDPOINTS --------------------####
 
 def particle_containment(traj, traj_id):
+    traj = file_parsing.spill_records(traj)
     mask = traj['traj_id']==traj_id
-    start=fiducialized_vertex(traj[mask]['xyz_start'][0].tolist())
-    end=fiducialized_vertex(traj[mask]['xyz_end'][0].tolist())
+    start, end = fiducialized_vertices([traj[mask]['xyz_start'][0], traj[mask]['xyz_end'][0]])
     if start==True and end==True: return 'fc' # fully contained
     elif (start==True and end==False) or (start==False and end==True): return 'pc' # partially contained
     else: return 'tg' # through going
@@ -96,17 +114,17 @@ def particle_end_loc(particle_start, particle_end):
     ## TO DO: add possibility of particle leaving from side or front of minerva upstream
     end_pt_loc = ''
 
-    if fiducialized_vertex(particle_end):
+    if fiducialized_vertices(particle_end)[0]:
         end_pt_loc = 'f'
     elif minerva_vertex(particle_end)[0]==True and minerva_vertex(particle_end)[1]==True:
         end_pt_loc = 'u'
     elif minerva_vertex(particle_end)[0]==True and minerva_vertex(particle_end)[1]==False:
         end_pt_loc = 'd'
     else:
-        x_MINERvA = geometry_defs.MINERvA_bounds(0)[0]
-        y_MINERvA = geometry_defs.MINERvA_bounds(1)[0]
-        z_MINERvA_down = geometry_defs.MINERvA_bounds(2)[1]
-        z_tpc_down = geometry_defs.tpc_bounds(2)[1]
+        x_MINERvA = geometry_defs.MINERvA_bounds_table[0][0]
+        y_MINERvA = geometry_defs.MINERvA_bounds_table[1][0]
+        z_MINERvA_down = geometry_defs.MINERvA_bounds_table[2][1]
+        z_tpc_down = geometry_defs.tpc_bounds_table[2][1]
 
         # Check whether endpoint Z is between 2x2 and MINERvA Downstream
         if particle_end[2]<z_MINERvA_down[0] and particle_end[2]>z_tpc_down[1]:
@@ -0,0 +1,82 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Methods to fill the histograms described by a table of        ##
+##              histogram specifications from the columns of an event         ##
+##              dictionary (see table_columns.as_columns). Filling does not   ##
+##              draw anything; filled histograms are drawn afterwards with    ##
+##              truth_kinematics/plotting/plot_histograms.py                  ##
+##                                                                            ##
+################################################################################
+
+import numpy as np
+import table_columns
+
+
+####------------------------- HISTOGRAM SPECIFICATIONS ---------------------####
+
+# A histogram specification is a dict with:
+#  - name: output file name, appended to the sample type (e.g. 'signal')
+#  - field: quantity to histogram, or a list of quantities drawn on the same 
+#    axes
+#  - bins: bin edges
+#  - filter (optional): boolean quantity selecting the events
+#  - stack (optional): dict(field, values, labels, colors) splitting the events
+#    into stacked categories by the value of a column (a column name)
+#  - skip_empty (optional): no histogram if no event passes the filter
+#  - drawing options (optional): xlabel, ylabel, title ('{sample}' is replaced
+#    by the sample title), labels and linestyles (one per field), log, grid,
+#    legend (location), xlim, figsize
+# A quantity is a column name (e.g. 'total_edep') or a function of the dict of
+# columns (e.g. lambda c: c['proton_mult_over_thresh']>1). A function used by
+# several specifications is evaluated once if they share the same object.
+
+
+####--------------------------- FILL HISTOGRAMS ----------------------------####
+
+# Fills every histogram of specs from the columns of d in one pass: each
+# distinct quantity (field, filter or stack category) is evaluated once on
+# whole columns and shared by all specifications using it. Returns one dict per
+# histogram to draw: the specification's drawing options with 'counts', a list
+# of per-bin counts scaled by scale_factor (one per field, or one per stack
+# category).
+def fill_histograms(d, specs, scale_factor):
+    columns = table_columns.as_columns(d)
+    evaluated = dict()
+    hists = []
+    for spec in specs:
+        selected = evaluate(spec['filter'], columns, evaluated) if 'filter' in spec else None
+        if spec.get('skip_empty') and selected is not None and not np.any(selected): continue
+
+        fields = spec['field'] if isinstance(spec['field'], list) else [spec['field']]
+        masks = [selected]
+        if 'stack' in spec:
+            masks = [stack_mask(spec['stack']['field'], value, columns, evaluated) for value in spec['stack']['values']]
+            if selected is not None: masks = [mask & selected for mask in masks]
+
+        counts = []
+        for field in fields:
+            values = evaluate(field, columns, evaluated)
+            for mask in masks:
+                counts.append(np.histogram(values if mask is None else values[mask], bins=spec['bins'])[0]*scale_factor)
+
+        hist = {key: value for key, value in spec.items() if key not in ('field', 'filter', 'skip_empty')}
+        hist['counts'] = counts
+        hists.append(hist)
+    return hists
+
+
+# Value of quantity (a column name or a function of the columns) on the 
+# columns, cached in evaluated
+def evaluate(quantity, columns, evaluated):
+    if quantity not in evaluated:
+        if callable(quantity):
+            with np.errstate(divide='ignore', invalid='ignore'): # e.g. ratios, for rows excluded by a filter
+                evaluated[quantity] = quantity(columns)
+        else: evaluated[quantity] = columns[quantity]
+    return evaluated[quantity]
+
+
+# Events of the stack category where column field has value, cached in evaluated
+def stack_mask(field, value, columns, evaluated):
+    if (field, value) not in evaluated: evaluated[(field, value)] = columns[field]==value
+    return evaluated[(field, value)]
@@ -25,6 +25,7 @@ threshold = 1.2 # stand-in threshold in cm (~3 pixels)
 def truth_primary_particle_kinetic_energy(pdg, track_id_set, vertex_assoc_traj, traj, ghdr):
 
     traj_id_at_vertex = particle_assoc.find_trajectory_at_vertex(track_id_set, vertex_assoc_traj, traj, ghdr)
+    vertex_assoc_traj = particle_assoc.trajectory_records(vertex_assoc_traj)
     traj_id_at_vertex_mask = vertex_assoc_traj['traj_id']==traj_id_at_vertex
     track_at_vertex = vertex_assoc_traj[traj_id_at_vertex_mask] 
     energy = track_at_vertex['E_start']
@@ -36,6 +37,7 @@ def truth_primary_particle_kinetic_energy(pdg, track_id_set, vertex_assoc_traj,
 def truth_primary_particle_momentum(track_id_set, vertex_assoc_traj, traj, ghdr):
 
     traj_id_at_vertex = particle_assoc.find_trajectory_at_vertex(track_id_set, vertex_assoc_traj, traj, ghdr)
+    vertex_assoc_traj = particle_assoc.trajectory_records(vertex_assoc_traj)
     traj_id_at_vertex_mask = vertex_assoc_traj['traj_id']==traj_id_at_vertex
     track_at_vertex = vertex_assoc_traj[traj_id_at_vertex_mask] 
     mom = np.sqrt(np.sum(track_at_vertex['pxyz_start']**2))
@@ -43,19 +45,51 @@ def truth_primary_particle_momentum(track_id_set, vertex_assoc_traj, traj, ghdr)
     return mom
 
 
+####---------------- PER-TRAJECTORY SEGMENT SUMMARY (SPILL) -----------------####
+
+# Segment energy and length sums (total, in the FV and per TPC) for every
+# trajectory in a spill, computed once with np.bincount keyed on traj_id. The
+# charged energy deposition and track length methods below accept this summary
+# in place of the seg dataset and look the trajectory up instead of masking and
+# looping over all segments.
+def track_summary(seg):
+    traj_ids, seg_traj = np.unique(seg['traj_id'], return_inverse=True)
+    n_traj = len(traj_ids)
+    length = np.sqrt( (seg['x_start']-seg['x_end'])**2+
+                      (seg['y_start']-seg['y_end'])**2.+
+                      (seg['z_start']-seg['z_end'])**2. )
+    midpoints = geometry_methods.segment_midpoints(seg)
+    fv = geometry_methods.fiducialized_vertices(midpoints)
+    tpc = geometry_methods.tpc_indices(midpoints)
+    in_tpc = tpc>=0
+    tpc_edep = np.bincount(seg_traj[in_tpc]*8+tpc[in_tpc], weights=seg['dE'][in_tpc], minlength=n_traj*8)
+    return dict(traj_ids=traj_ids,
+                tpc_edep=tpc_edep.reshape(n_traj, 8), # per trajectory (row) and TPC (column)
+                total_edep=np.bincount(seg_traj, weights=seg['dE'], minlength=n_traj),
+                fv_edep=np.bincount(seg_traj, weights=np.where(fv, seg['dE'], 0.), minlength=n_traj),
+                total_length=np.bincount(seg_traj, weights=length, minlength=n_traj),
+                fv_length=np.bincount(seg_traj, weights=np.where(fv, length, 0.), minlength=n_traj))
+
+
+def track_summary_value(summary, traj_id, field):
+    i = np.searchsorted(summary['traj_ids'], traj_id)
+    if i==len(summary['traj_ids']) or summary['traj_ids'][i]!=traj_id: return 0. # no segments
+    return float(summary[field][i])
+
+
 ####--------------------- ENERGY DEPOSITION (IN TPC) -----------------------####
 
 def tpc_edep_charged_e(traj_id, traj, seg):
-    seg_id_mask=seg['traj_id']==traj_id
+    if isinstance(seg, dict):
+        i = np.searchsorted(seg['traj_ids'], traj_id)
+        found = i<len(seg['traj_ids']) and seg['traj_ids'][i]==traj_id
+        tpc_e = seg['tpc_edep'][i] if found else np.zeros(8)
+    else:
+        sg = seg[seg['traj_id']==traj_id]
+        tpc = geometry_methods.tpc_indices(geometry_methods.segment_midpoints(sg))
+        tpc_e = np.bincount(tpc[tpc>=0], weights=sg['dE'][tpc>=0], minlength=8)
     contained_e={}
-    for i in range(8): contained_e[i]=0.
-    for sg in seg[seg_id_mask]:
-        tpc_fv=geometry_methods.tpc_vertex([(sg['x_start']+sg['x_end'])/2.,
-                                         (sg['y_start']+sg['y_end'])/2.,
-                                         (sg['z_start']+sg['z_end'])/2.])
-        for key in tpc_fv.keys():
-            if tpc_fv[key]==True:
-                contained_e[key]+=sg['dE']
+    for i in range(8): contained_e[i]=float(tpc_e[i])
     return contained_e
 
 
@@ -70,13 +104,11 @@ def tpc_contained_energy(pdg, traj_id, traj, seg):
 ####---------------- ENERGY DEPOSITION (FIDUCIAL VOLUME) -------------------####
 
 def fv_edep_charged_e(traj_id, traj, seg):
+    if isinstance(seg, dict): return track_summary_value(seg, traj_id, 'fv_edep')
     seg_id_mask=seg['traj_id']==traj_id
-    contained_e=0.
-    for sg in seg[seg_id_mask]:
-        if geometry_methods.fiducialized_vertex([(sg['x_start']+sg['x_end'])/2.,
-                                              (sg['y_start']+sg['y_end'])/2.,
-                                              (sg['z_start']+sg['z_end'])/2.]):
-            contained_e+=sg['dE']
+    sg=seg[seg_id_mask]
+    fv_mask=geometry_methods.fiducialized_vertices(geometry_methods.segment_midpoints(sg))
+    contained_e=float(np.sum(sg['dE'][fv_mask], dtype=float))
     return contained_e
 
 
@@ -109,6 +141,7 @@ def fv_contained_energy(pdg, traj_id, traj, seg):
 ####------------------ ENERGY DEPOSITION (TOTAL VOLUME) --------------------####
 
 def total_edep_charged_e(traj_id, traj, seg):
+    if isinstance(seg, dict): return track_summary_value(seg, traj_id, 'total_edep')
     seg_id_mask=seg['traj_id']==traj_id
     total_e=0.
     for sg in seg[seg_id_mask]: total_e+=sg['dE']
@@ -144,15 +177,13 @@ def total_energy(pdg, traj_id, traj, seg):
 ####------------------- TRACK LENGTH (FIDUCIAL VOLUME) ---------------------####
 
 def fv_edep_charged_length(traj_id, traj, seg):
+    if isinstance(seg, dict): return track_summary_value(seg, traj_id, 'fv_length')
     seg_id_mask=seg['traj_id']==traj_id
-    contained_length=0.
-    for sg in seg[seg_id_mask]:
-        if geometry_methods.fiducialized_vertex([(sg['x_start']+sg['x_end'])/2.,
-                                              (sg['y_start']+sg['y_end'])/2.,
-                                              (sg['z_start']+sg['z_end'])/2.]):
-            contained_length+=np.sqrt( (sg['x_start']-sg['x_end'])**2+
-                                       (sg['y_start']-sg['y_end'])**2.+
-                                       (sg['z_start']-sg['z_end'])**2. )
+    sg=seg[seg_id_mask]
+    fv_mask=geometry_methods.fiducialized_vertices(geometry_methods.segment_midpoints(sg))
+    contained_length=float(np.sum(np.sqrt( (sg['x_start']-sg['x_end'])**2+
+                                           (sg['y_start']-sg['y_end'])**2.+
+                                           (sg['z_start']-sg['z_end'])**2. )[fv_mask], dtype=float))
     return contained_length
 
 
@@ -165,6 +196,7 @@ def fv_contained_length(pdg, traj_id, traj, seg):
 
 
 def total_edep_charged_length(traj_id, traj, seg):
+    if isinstance(seg, dict): return track_summary_value(seg, traj_id, 'total_length')
     seg_id_mask=seg['traj_id']==traj_id
     contained_length=0.
     for sg in seg[seg_id_mask]:
@@ -185,6 +217,7 @@ def angle_wrt_beam_direction(traj_id_set, vertex_assoc_traj,traj, ghdr):
 
     traj_id_at_vertex = particle_assoc.find_trajectory_at_vertex(traj_id_set, vertex_assoc_traj,traj, ghdr) # find track id for trajectory at vertex
 
+    vertex_assoc_traj = particle_assoc.trajectory_records(vertex_assoc_traj)
     traj_id_at_vertex_mask = vertex_assoc_traj['traj_id']==traj_id_at_vertex
     track_at_vertex = vertex_assoc_traj[traj_id_at_vertex_mask] # primary particle trajectory from vertex
 
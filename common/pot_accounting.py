@@ -0,0 +1,97 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: POT (protons on target) bookkeeping: POT of each simulation   ##
+##              file, POT records saved next to every output table, merging   ##
+##              of records and scale factors to the target exposure.          ##
+##                                                                            ##
+################################################################################
+
+import json
+import os
+import h5py
+
+####------------------------------ POT PER FILE ----------------------------####
+
+# MiniRun4 production: 1024 larnd files for 1E19 POT. A file without a 'pot'
+# root attribute is taken to cover production_pot/production_n_files POT.
+production_n_files = 1024
+production_pot = 1e19
+pot_attribute = 'pot'
+
+# Event counts are scaled to 2.5e19 POT
+target_pot = 2.5e19
+
+
+def default_file_pot():
+    return production_pot/production_n_files
+
+
+# POT of one simulation file: its 'pot' root attribute if it has one, otherwise
+# the production default
+def file_pot(sim_file):
+    with h5py.File(sim_file, 'r') as sim_h5:
+        if pot_attribute in sim_h5.attrs: return float(sim_h5.attrs[pot_attribute])
+    return default_file_pot()
+
+
+####------------------------------ POT RECORDS -----------------------------####
+
+# A POT record describes the exposure behind a table: total POT, number of
+# files and the POT of each file (absolute path -> POT), in processing order.
+# Records of tables from files of unknown names (see load_pot_record) have an
+# empty 'files'.
+def pot_record(file_pots):
+    return dict(pot=sum(file_pots.values()), n_files=len(file_pots), files=dict(file_pots))
+
+
+def files_pot_record(sim_files):
+    return pot_record({os.path.abspath(sim_file): file_pot(sim_file) for sim_file in sim_files})
+
+
+# Record of the union of records, e.g. of the batch shards of a production; a
+# file counted by more than one record is an error
+def merge_pot_records(records):
+    file_pots, pot, n_files = dict(), 0., 0
+    for record in records:
+        repeated = set(file_pots).intersection(record['files'])
+        if repeated: raise ValueError('POT of files counted twice: '+str(sorted(repeated)))
+        file_pots.update(record['files'])
+        pot += record['pot']
+        n_files += record['n_files']
+    return dict(pot=pot, n_files=n_files, files=file_pots)
+
+
+# File holding the POT record of a table, e.g. signal_dict.json or
+# signal_dict.npz -> signal_dict.pot.json
+def pot_file_name(table_file):
+    return os.path.splitext(table_file)[0]+'.pot.json'
+
+
+# Saves record as the POT record of the table saved as name (without extension)
+def save_pot_record(record, name):
+    with open(name+'.pot.json.tmp', 'w') as outfile: json.dump(record, outfile, indent=4)
+    os.replace(name+'.pot.json.tmp', name+'.pot.json')
+
+
+# POT record of table_file. Tables written before POT records were kept have
+# none: their record is then made from n_files production files, if given.
+def load_pot_record(table_file, n_files=None):
+    if os.path.exists(pot_file_name(table_file)):
+        with open(pot_file_name(table_file)) as infile: record = json.load(infile)
+        if n_files is not None and n_files!=record['n_files']:
+            print('WARNING: ', table_file, ' was made from ', record['n_files'], ' files, not ', n_files, '; using its POT record')
+        return record
+    if n_files is None: raise ValueError('no POT record '+pot_file_name(table_file)+'; give the number of files processed')
+    return dict(pot=n_files*default_file_pot(), n_files=n_files, files=dict())
+
+
+####----------------------------- SCALE FACTORS ----------------------------####
+
+# Factor scaling event counts from pot to the target exposure
+def scale_factor(pot, target=target_pot):
+    if pot<=0: raise ValueError('no POT processed')
+    return target/pot
+
+
+def table_scale_factor(table_file, n_files=None, target=target_pot):
+    return scale_factor(load_pot_record(table_file, n_files)['pot'], target)
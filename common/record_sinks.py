@@ -0,0 +1,203 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Dictionary-like sinks streaming the records of the output     ##
+##              dictionaries of the drivers to JSON Lines files, and the      ##
+##              block by block conversion of these files to the JSON and .npz ##
+##              output formats (see file_parsing.save_dict).                  ##
+##                                                                            ##
+################################################################################
+
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+import numpy as np
+import file_parsing
+import pot_accounting
+import stage_timing
+import table_columns
+
+####------------------ OUTPUT DICTIONARY TO JSON LINES ---------------------####
+
+# Dictionary-like sink for per-event records, used in place of the output 
+# dictionaries of the drivers. Records are buffered and appended to name.jsonl 
+# (one [key, record] JSON array per line, keys as in 
+# file_parsing.save_dict_to_json) every flush_every records, so memory use does
+# not grow with the number of events and an interrupted run still leaves the 
+# records written so far. Read back with file_parsing.load_dict or 
+# jsonl_columns; close_output_dict converts the file to the final output and 
+# removes it. Keys must not repeat once flushed (the keys of the drivers, e.g.
+# spill, vertex and trajectory ID, are unique): a record under a key already 
+# written is appended, not overwritten.
+class RecordSink:
+
+    def __init__(self, name, flush_every=1000):
+        self.file_name = name+'.jsonl'
+        self.flush_every = flush_every
+        self.buffer = dict()
+        self.n_written = 0
+        open(self.file_name, 'w').close()
+
+    def __setitem__(self, key, record):
+        self.buffer[key] = record
+        if len(self.buffer)>=self.flush_every: self.flush()
+
+    def __len__(self):
+        return self.n_written+len(self.buffer)
+
+    def update(self, d):
+        for key in d.keys(): self[key] = d[key]
+
+    @stage_timing.timed_function('output writing')
+    def flush(self):
+        with open(self.file_name, 'a') as outfile:
+            for key, record in self.buffer.items():
+                string_key = '-'.join(str(k) for k in key) if isinstance(key, tuple) else str(key)
+                outfile.write(json.dumps([string_key, record])+'\n')
+        self.n_written += len(self.buffer)
+        self.buffer = dict()
+
+    def close(self):
+        self.flush()
+
+
+# Output dictionary of a driver: a plain dictionary, or a RecordSink writing 
+# name.jsonl if flush_every > 0
+def open_output_dict(name, flush_every=0):
+    if flush_every>0: return RecordSink(name, flush_every)
+    return dict()
+
+
+# Save an output dictionary opened with open_output_dict in the requested 
+# format, with its POT record if given, and return it. A RecordSink's records
+# are converted from its JSON Lines file block by block, without holding the 
+# table in memory, and are returned as columns (see jsonl_columns); the JSON 
+# Lines file is removed once converted.
+def close_output_dict(d, name, output_format='json', pot=None):
+    if not isinstance(d, RecordSink):
+        file_parsing.save_dict(d, name, True, output_format, pot)
+        return d
+    d.close()
+    with stage_timing.timed('output writing'):
+        if output_format=='npz': jsonl_to_npz(d.file_name, name, d.flush_every)
+        else: jsonl_to_json(d.file_name, name)
+    if pot is not None: pot_accounting.save_pot_record(pot, name)
+    columns = jsonl_columns(d.file_name, d.flush_every)
+    os.remove(d.file_name)
+    return columns
+
+
+# Output file name of a table saved by close_output_dict
+def table_file_name(name, output_format='json'):
+    return name+('.npz' if output_format=='npz' else '.json')
+
+
+####------------------- JSON LINES TO JSON AND COLUMNS ---------------------####
+
+# Blocks of at most block_records [key, record] pairs of a JSON Lines file
+def jsonl_blocks(file_name, block_records=1000):
+    block = []
+    with open(file_name) as infile:
+        for line in infile:
+            block.append(json.loads(line))
+            if len(block)>=block_records:
+                yield block
+                block = []
+    if block: yield block
+
+
+# Writes the records of a JSON Lines file to name.json one at a time, in the 
+# format of file_parsing.save_dict_to_json
+def jsonl_to_json(file_name, name):
+    with open(name+'.json.tmp', 'w') as outfile:
+        outfile.write('{')
+        first = True
+        with open(file_name) as infile:
+            for line in infile:
+                key, record = json.loads(line)
+                outfile.write(('\n' if first else ',\n')+json.dumps({key: record}, indent=4)[2:-2])
+                first = False
+        outfile.write('}' if first else '\n}')
+    os.replace(name+'.json.tmp', name+'.json')
+
+
+# Columns (see table_columns) of a JSON Lines file, converted block_records 
+# records at a time
+def jsonl_columns(file_name, block_records=1000):
+    return concatenate_columns(jsonl_column_blocks(file_name, block_records))
+
+
+def jsonl_column_blocks(file_name, block_records=1000):
+    for block in jsonl_blocks(file_name, block_records): yield table_columns.dict_to_columns(dict(block))
+
+
+# Columns of consecutive blocks of records (e.g. jsonl_column_blocks) joined 
+# into one set of columns: each column takes the type of the values of all 
+# blocks, as dict_to_columns on all records would, and the list offsets of a
+# block continue from those of the blocks before it
+def concatenate_columns(blocks):
+    blocks = list(blocks)
+    if not blocks: return table_columns.dict_to_columns(dict())
+    columns = dict()
+    for field in blocks[0].keys():
+        arrays = [block[field] for block in blocks]
+        if field.endswith('/offsets'): columns[field] = np.concatenate(offsets_continued(arrays))
+        else: columns[field] = np.concatenate([a for a in arrays if len(a)>0] or arrays[:1])
+    return columns
+
+
+# Offsets of consecutive blocks, each continuing from the end of the previous
+# one (only the first block keeps its leading 0)
+def offsets_continued(offsets):
+    continued, base = [], 0
+    for i, block_offsets in enumerate(offsets):
+        continued.append(block_offsets[(0 if i==0 else 1):]+base)
+        base += block_offsets[-1]
+    return continued
+
+
+# Writes the records of a JSON Lines file to name.npz column by column: a first
+# pass over the file finds the type and length of each column, a second one 
+# appends the column values of each block of records to a raw file per column,
+# and the raw files are then copied into the .npz archive (as 
+# table_columns.save_dict_to_npz would write it) behind their .npy headers
+def jsonl_to_npz(file_name, name, block_records=1000):
+    dtypes, lengths, key_width = column_types(jsonl_column_blocks(file_name, block_records))
+    if not dtypes:
+        table_columns.save_dict_to_npz(dict(), name)
+        return
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(name))) as tmp_dir:
+        raw_names = {field: os.path.join(tmp_dir, str(i)) for i, field in enumerate(dtypes)}
+        raw_files = {field: open(raw_name, 'wb') for field, raw_name in raw_names.items()}
+        bases = dict() # last offset written, per list-valued field
+        for block in jsonl_column_blocks(file_name, block_records):
+            for field, a in block.items():
+                if field.endswith('/offsets'):
+                    a, bases[field] = (a, a[-1]) if field not in bases else (a[1:]+bases[field], a[-1]+bases[field])
+                raw_files[field].write(np.ascontiguousarray(a, dtype=dtypes[field]).tobytes())
+        for raw_file in raw_files.values(): raw_file.close()
+
+        with zipfile.ZipFile(name+'.npz.tmp', 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for field, dtype in dtypes.items():
+                shape = (lengths[field], key_width) if field=='key' else (lengths[field],)
+                header = dict(descr=np.lib.format.dtype_to_descr(dtype), fortran_order=False, shape=shape)
+                with archive.open(field+'.npy', 'w', force_zip64=True) as outfile:
+                    np.lib.format.write_array_header_1_0(outfile, header)
+                    with open(raw_names[field], 'rb') as infile: shutil.copyfileobj(infile, outfile)
+    os.replace(name+'.npz.tmp', name+'.npz')
+
+
+# Type and length of each column of consecutive blocks of columns once joined
+# (see concatenate_columns), and the key length
+def column_types(blocks):
+    dtypes, empty_dtypes, lengths, key_width = dict(), dict(), dict(), 0
+    for block in blocks:
+        key_width = block['key'].shape[1]
+        for field, a in block.items():
+            empty_dtypes.setdefault(field, a.dtype)
+            if len(a)>0: dtypes[field] = np.result_type(dtypes[field], a.dtype) if field in dtypes else a.dtype
+            if field.endswith('/offsets'): lengths[field] = lengths.get(field, 1)+len(a)-1
+            else: lengths[field] = lengths.get(field, 0)+len(a)
+    return {field: dtypes.get(field, dtype) for field, dtype in empty_dtypes.items()}, lengths, key_width
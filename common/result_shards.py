@@ -0,0 +1,121 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Per-file result shards and the manifest of resumable driver   ##
+##              runs (--shard_dir), and the split of a production over batch  ##
+##              jobs (--shard i/N) whose records are merged by                ##
+##              truth_kinematics/file_parsing/merge_shards.py.                ##
+##                                                                            ##
+################################################################################
+
+import hashlib
+import json
+import os
+import file_parsing
+import stage_timing
+
+####-------------------- PER-FILE RESULT SHARDS AND MANIFEST ----------------####
+
+# A driver run with a shard directory saves the output dictionaries of each 
+# simulation file as a shard (shard_dir/<file name>.json) and records the file 
+# in shard_dir/manifest.json with its content fingerprint once its shard is 
+# written. A restarted run only reprocesses files without a shard or whose 
+# fingerprint changed, then merges all shards in file order. Shards and the 
+# manifest are written to a temporary file first, so a run killed while writing
+# never leaves a truncated shard or manifest behind.
+
+# Content fingerprint of a file: SHA-1 of its size and its first and last
+# block_size bytes, cheap enough for multi-GB simulation files
+def file_fingerprint(file_name, block_size=1<<20):
+    sha = hashlib.sha1()
+    size = os.path.getsize(file_name)
+    sha.update(str(size).encode())
+    with open(file_name, 'rb') as infile:
+        sha.update(infile.read(block_size))
+        if size>block_size:
+            infile.seek(max(size-block_size, block_size))
+            sha.update(infile.read())
+    return sha.hexdigest()
+
+
+def load_manifest(shard_dir):
+    try:
+        with open(os.path.join(shard_dir, 'manifest.json')) as infile: return json.load(infile)
+    except (OSError, ValueError):
+        return dict() # no usable manifest, every file is processed
+
+
+def save_manifest(manifest, shard_dir):
+    write_json_atomic(manifest, os.path.join(shard_dir, 'manifest.json'))
+
+
+def shard_name(sim_file, shard_dir):
+    return os.path.join(shard_dir, os.path.basename(sim_file)+'.json')
+
+
+# Whether the manifest records sim_file, with the given fingerprint, as done
+def shard_done(manifest, sim_file, fingerprint, shard_dir):
+    entry = manifest.get(os.path.abspath(sim_file))
+    return entry is not None and entry['fingerprint']==fingerprint and os.path.exists(shard_name(sim_file, shard_dir))
+
+
+# Save the output dictionaries of sim_file (tuple keys) as its shard and 
+# record it in the manifest
+@stage_timing.timed_function('output writing: shards')
+def save_shard(dicts, sim_file, fingerprint, manifest, shard_dir):
+    write_json_atomic([file_parsing.tuple_key_to_string(d) for d in dicts], shard_name(sim_file, shard_dir))
+    manifest[os.path.abspath(sim_file)] = dict(fingerprint=fingerprint, shard=os.path.basename(shard_name(sim_file, shard_dir)))
+    save_manifest(manifest, shard_dir)
+
+
+# Output dictionaries of sim_file saved by save_shard, with tuple keys
+@stage_timing.timed_function('io: read shard')
+def load_shard(sim_file, shard_dir):
+    with open(shard_name(sim_file, shard_dir)) as infile:
+        return [string_key_to_tuple(d) for d in json.load(infile)]
+
+
+def string_key_to_tuple(d):
+    return {tuple(int(k) for k in key.split('-')): d[key] for key in d.keys()}
+
+
+def write_json_atomic(obj, file_name):
+    with open(file_name+'.tmp', 'w') as outfile: json.dump(obj, outfile)
+    os.replace(file_name+'.tmp', file_name)
+
+
+####-------------------- BATCH JOBS OVER A PRODUCTION -----------------------####
+
+# A production (the sorted list of files a driver would process) can be split
+# over N batch jobs with --shard i/N: job i processes the i-th of N contiguous
+# blocks of files, writes its tables with a batch_shard_suffix and a record 
+# (save_batch_record) listing its files, their POT and its tables. Merging the
+# tables of jobs 0, ..., N-1 in order (merge_shards.py) therefore gives the 
+# same tables, in the same order, as a single job over the whole production.
+
+# 'i/N' -> (i, N), e.g. as an argparse type
+def parse_shard(shard):
+    i, n = [int(k) for k in shard.split('/')]
+    if n<1 or not 0<=i<n: raise ValueError('shard must be i/N with 0 <= i < N')
+    return i, n
+
+
+# Files of batch shard (i, N) of sorted_files; all files if shard is None
+def batch_shard_files(sorted_files, shard):
+    if shard is None: return sorted_files
+    i, n = shard
+    return sorted_files[i*len(sorted_files)//n:(i+1)*len(sorted_files)//n]
+
+
+def batch_shard_suffix(shard):
+    if shard is None: return ''
+    return '_shard'+str(shard[0])+'of'+str(shard[1])
+
+
+# Saves the record of a batch shard as driver+suffix+'.json': the shard, the
+# files processed and their POT (from the POT record pot of the job, see 
+# pot_accounting) and the file names of the tables (table name -> file name) 
+# written by the job
+def save_batch_record(driver, shard, input_type, pot, tables):
+    record = dict(driver=driver, shard=list(shard), input_type=input_type, files=list(pot['files']),
+                  n_files=pot['n_files'], pot=pot['pot'], file_pots=pot['files'], tables=tables)
+    write_json_atomic(record, driver+batch_shard_suffix(shard)+'.json')
@@ -10,6 +10,9 @@
 ##                                                                            ##
 ################################################################################
 
+import numpy as np
+import file_parsing
+import particlePDG_defs
 import truth_methods
 
 
@@ -22,47 +25,154 @@ import truth_methods
 # ensuring that the original particle/traj_id (and any other traj_id accepted as 
 # being the same particle) does not have the same parent as any other 
 # particles/traj_ids (is an "only child") and also does not have multiple children.
+# vertex_assoc_traj may be the vertex trajectories or their trajectory_graph; 
+# passing the graph avoids rebuilding it for every track in the vertex.
 def same_pdg_connected_trajectories(track_pdg, track_id, vertex_assoc_traj,\
                                     traj, ghdr):
     traj_id_set = {track_id} # initialize a set of traj_ids associated with a single particle
-    
+
+    graph = vertex_assoc_traj
+    if not isinstance(graph, dict): graph = trajectory_graph(vertex_assoc_traj, traj, ghdr)
+    track_row = graph_row(graph, track_id)
+    if track_row<0: return traj_id_set
+
     ## WALK UP THE FAMILY TREE
-    this_pdg = track_pdg
-    this_track_id = track_id
-
-    while this_pdg==track_pdg: # stop if a member of an older generation has a different PDG ID than the original track/particle
-        particle_mask = vertex_assoc_traj['traj_id'] == this_track_id # mask to find trajectories assoc. w/ current track
-        parent_track_id = vertex_assoc_traj[particle_mask]['parent_id'] # find parent ID of current track
-        parent_mask = vertex_assoc_traj['parent_id'] == parent_track_id # mask to find trajectories w/ current track AS PARENT TRACK
-        this_generation =  vertex_assoc_traj[parent_mask] # find all tracks with the same parent as the current track
-        if len(this_generation) == 1: # only move forward if current track is an "only child"
-            this_pdg = truth_methods.find_parent_pdg(vertex_assoc_traj[particle_mask]['parent_id'],
-                                   vertex_assoc_traj[particle_mask]['vertex_id'],
-                                   traj, ghdr) # get parent PDG ID of current track
-            if this_pdg==track_pdg: # if parent PDG ID of track matches current/original track's PDG ID, add parent to track id set
-                this_track_id = vertex_assoc_traj[particle_mask]['parent_id'].tolist()[0] # also makes parent track the new "current" track
-                traj_id_set.add(this_track_id)
-        else: break # break while loop if current track/particle is not an "only child"
+    this_row = track_row
+    while this_row>=0 and graph['n_siblings'][this_row]==1: # only move forward if current track is an "only child"
+        if graph['parent_pdg'][this_row]!=track_pdg: break # stop if a member of an older generation has a different PDG ID than the original track/particle
+        traj_id_set.add(int(graph['traj']['parent_id'][this_row])) # if parent PDG ID of track matches original track's PDG ID, add parent to track id set
+        this_row = graph['parent_row'][this_row] # also makes parent track the new "current" track
 
     ## WALK DOWN THE FAMILY TREE
-    this_pdg = track_pdg
-    this_track_id = track_id
-
-    while this_pdg==track_pdg: # stop if/when a child has a different PDG ID than the original track
-        particle_mask = vertex_assoc_traj['parent_id'] == this_track_id  # mask to find trajectories w/ current track AS PARENT TRACK
-        child_particle=vertex_assoc_traj[particle_mask] # find all tracks which are children of the current track
-        if len(child_particle)==1: # only move forward if current track has only one child
-            this_pdg = child_particle['pdg_id']
-            if child_particle['pdg_id']==track_pdg: # if the child's PDG ID matches the original track PDG ID, add child track id to set
-                this_track_id = child_particle['traj_id'].tolist()[0] # also makes child track the new "current" track
-                traj_id_set.add(this_track_id)
-        else: break # break while loop if current track/particle has more than one child particle
+    this_row = track_row
+    while True:
+        children = graph['children'][graph['child_offsets'][this_row]:graph['child_offsets'][this_row+1]]
+        if len(children)!=1: break # break if current track/particle does not have exactly one child particle
+        if graph['traj']['pdg_id'][children[0]]!=track_pdg: break # stop when a child has a different PDG ID than the original track
+        this_row = children[0] # also makes child track the new "current" track
+        traj_id_set.add(int(graph['traj']['traj_id'][this_row]))
 
     return traj_id_set
-    
+
+
+# Parent/child structure of the trajectories associated with a vertex, built 
+# once so that walking the family tree is a sequence of O(1) lookups:
+#  - sorted_ids/id_rows: traj_id -> row map (see graph_row)
+#  - parent_row: row of each trajectory's parent (-1 if the parent is the 
+#    neutrino or is not associated with the vertex)
+#  - parent_pdg: PDG ID of each trajectory's parent (see truth_methods.parent_pdgs;
+#    0 if the parent is not found)
+#  - is_primary: parent of the trajectory is a muon (anti)neutrino
+#  - n_siblings: number of trajectories sharing each trajectory's parent
+#  - children[child_offsets[row]:child_offsets[row+1]]: rows of a row's children (CSR)
+# If traj is a vertex grouping carrying the truth_methods.trajectory_origin 
+# columns, parent_pdg and is_primary are read from it instead of looked up.
+def trajectory_graph(vertex_assoc_traj, traj, ghdr):
+    traj_id = vertex_assoc_traj['traj_id']
+    parent_id = vertex_assoc_traj['parent_id']
+    n_rows = len(vertex_assoc_traj)
+
+    id_rows = np.argsort(traj_id, kind='stable')
+    sorted_ids = traj_id[id_rows]
+    graph = dict(traj=vertex_assoc_traj, sorted_ids=sorted_ids, id_rows=id_rows)
+
+    parent_row = np.full(n_rows, -1, dtype=int) # parent_id -> row with one search over the sorted traj_ids
+    if n_rows>0:
+        i = np.minimum(np.searchsorted(sorted_ids, parent_id), n_rows-1)
+        found = (parent_id!=-1) & (sorted_ids[i]==parent_id)
+        parent_row[found] = id_rows[i[found]]
+    has_parent = parent_row>=0
+    children = np.flatnonzero(has_parent)[np.argsort(parent_row[has_parent], kind='stable')]
+    child_offsets = np.searchsorted(parent_row[children], np.arange(n_rows+1))
+
+    sibling_inverse, sibling_counts = np.unique(parent_id, return_inverse=True, return_counts=True)[1:]
+
+    if isinstance(traj, dict) and 'parent_pdg' in traj and n_rows>0:
+        parent_pdg = file_parsing.vertex_column(traj, 'parent_pdg', vertex_assoc_traj['vertex_id'][0])
+    else:
+        parent_pdg = np.zeros(n_rows, dtype=int)
+        parent_pdg[has_parent] = vertex_assoc_traj['pdg_id'][parent_row[has_parent]]
+        outside = ~has_parent # neutrino parent, or parent outside of vertex
+        parent_pdg[outside] = truth_methods.parent_pdgs(parent_id[outside], vertex_assoc_traj['vertex_id'][outside], traj, ghdr)
+
+    graph.update(parent_row=parent_row, parent_pdg=parent_pdg,
+                 is_primary=np.abs(parent_pdg)==particlePDG_defs.nu_mu_pdg,
+                 n_siblings=sibling_counts[sibling_inverse],
+                 children=children, child_offsets=child_offsets)
+    return graph
+
+
+def graph_row(graph, traj_id):
+    i = np.searchsorted(graph['sorted_ids'], traj_id)
+    if i==len(graph['sorted_ids']) or graph['sorted_ids'][i]!=traj_id: return -1
+    return graph['id_rows'][i]
+
+
+# Labels every trajectory of a vertex with the same-PDG chain (particle) it
+# belongs to, using the same rules as same_pdg_connected_trajectories: a
+# trajectory is linked to its parent if it is an only child and has the same PDG
+# ID as its parent. Chains are numbered in order of their first row in the
+# vertex trajectories, so iterating over chains visits particles in the order
+# the characterizers previously visited them with exclude_track_ids. Per chain:
+#  - first_row: first row of the chain in the vertex trajectories
+#  - head: row of the first (oldest) trajectory of the chain
+#  - end: row of the forward-most trajectory (largest end z, or the head if no
+#    trajectory ends downstream of the head's start point), the end trajectory
+#    of a primary particle formerly found by find_forward_primary_particle_end_trajectory
+#  - pdg: PDG ID of the chain
+#  - vertex_row: row of the chain's trajectory at the vertex (its head, if the
+#    chain is a primary particle; -1 otherwise)
+#  - rows[offsets[c]:offsets[c+1]]: rows of chain c
+def same_pdg_chains(graph):
+    vertex_assoc_traj = graph['traj']
+    pdg = vertex_assoc_traj['pdg_id']
+    n_rows = len(vertex_assoc_traj)
+
+    only_child_same_pdg = (graph['n_siblings']==1) & (graph['parent_pdg']==pdg)
+    linked = only_child_same_pdg & (graph['parent_row']>=0)
+    head = np.where(linked, graph['parent_row'], np.arange(n_rows))
+    while True: # pointer jumping: follow links until every row points to its chain head
+        next_head = head[head]
+        if np.array_equal(next_head, head): break
+        head = next_head
+
+    heads, first_row, label = np.unique(head, return_index=True, return_inverse=True)
+    order = np.argsort(first_row, kind='stable')
+    rank = np.empty_like(order); rank[order] = np.arange(len(order))
+    heads = heads[order]; first_row = first_row[order]; label = rank[label]
+
+    rows = np.argsort(label, kind='stable')
+    offsets = np.searchsorted(label[rows], np.arange(len(heads)+1))
+
+    end_z = vertex_assoc_traj['xyz_end'][:,2]
+    by_end_z = np.lexsort((np.arange(n_rows), -end_z, label)) # per chain, largest end z first
+    end = by_end_z[offsets[:-1]]
+    end = np.where(end_z[end]>vertex_assoc_traj['xyz_start'][heads,2], end, heads)
+
+    # a head whose same-PDG parent is not associated with the vertex still
+    # counts that parent as part of the particle
+    external_parent = np.where(only_child_same_pdg[heads] & (graph['parent_row'][heads]<0) & \
+                               (vertex_assoc_traj['parent_id'][heads]!=-1),
+                               vertex_assoc_traj['parent_id'][heads], -1)
+
+    vertex_row = np.where(graph['is_primary'][heads], heads, -1)
+
+    return dict(label=label, first_row=first_row, head=heads, end=end, pdg=pdg[heads], vertex_row=vertex_row,
+                rows=rows, offsets=offsets, external_parent=external_parent)
+
+
+# Set of traj_ids of chain c (see same_pdg_chains), as returned by
+# same_pdg_connected_trajectories for any trajectory of the chain
+def chain_traj_ids(chains, graph, c):
+    rows = chains['rows'][chains['offsets'][c]:chains['offsets'][c+1]]
+    traj_id_set = set(graph['traj']['traj_id'][rows].tolist())
+    if chains['external_parent'][c]!=-1: traj_id_set.add(int(chains['external_parent'][c]))
+    return traj_id_set
+
 
 ####-------- FIND TRAJECTORY AT END OR BEGINNING OF PARTICLE TRACK ---------####
 
+# vertex_assoc_traj may be the vertex trajectories or their trajectory_graph
 def find_trajectory_at_vertex(traj_id_set, vertex_assoc_traj,traj, ghdr):
     
     is_prim = truth_methods.is_primary_particle(traj_id_set, vertex_assoc_traj,traj, ghdr)
@@ -71,6 +181,10 @@ def find_trajectory_at_vertex(traj_id_set, vertex_assoc_traj,traj, ghdr):
         print("Track ID set does not represent a primary particle. Therefore, \
               there does not exist a trajectory coming from the vertex.")
         return 
+    elif isinstance(vertex_assoc_traj, dict):
+        for tid in traj_id_set: # first trajectory in set with muon (anti)neutrino parent
+            row = graph_row(vertex_assoc_traj, tid)
+            if row>=0 and vertex_assoc_traj['is_primary'][row]: return tid
     else:
         traj_id_at_vertex = 0 # initialize traj_id_at_vertex variable
         for tid in traj_id_set: # loop through trajectories in set to find trajectory with muon (anti)neutrino parent
@@ -87,20 +201,9 @@ def find_trajectory_at_vertex(traj_id_set, vertex_assoc_traj,traj, ghdr):
     return traj_id_at_vertex
 
 
-def find_forward_primary_particle_end_trajectory(traj_id_set, vertex_assoc_traj,traj, ghdr):
-    
-    tid_at_vertex = find_trajectory_at_vertex(traj_id_set, vertex_assoc_traj,traj, ghdr)
-    particle_mask = vertex_assoc_traj['traj_id'] == tid_at_vertex
-    start_pt = vertex_assoc_traj[particle_mask]['xyz_start']
-
-    traj_id_at_end = tid_at_vertex # initialize traj_id_at_vertex variable
-    end_z = start_pt[2] # initialize end z value
-    for tid in traj_id_set: # loop through trajectories in set to find trajectory with largest z value
-        traj_mask = vertex_assoc_traj['traj_id'] == tid
-        tid_end = vertex_assoc_traj[traj_mask]['xyz_end']
-        if tid_end[2]>end_z:
-            end_z = tid_end[2]
-            traj_id_at_end = tid
-        else: continue
-
-    return traj_id_at_end
\ No newline at end of file
+# Vertex trajectories, whether vertex_assoc_traj is the trajectories themselves
+# or their trajectory_graph
+def trajectory_records(vertex_assoc_traj):
+    if isinstance(vertex_assoc_traj, dict): return vertex_assoc_traj['traj']
+    return vertex_assoc_traj
+
@@ -0,0 +1,92 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Opt-in timing of the stages of the analysis drivers (I/O,     ##
+##              spill partitioning, vertex selection, characterization,       ##
+##              output writing, plotting): accumulated wall time, call counts ##
+##              and per-call percentiles, printed and saved as a JSON report. ##
+##                                                                            ##
+################################################################################
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+import numpy as np
+
+####------------------------------- STAGE TIMERS ---------------------------####
+
+# Timing is off unless enable() is called (e.g. by a driver's --timing_report
+# option); when off, timed and timed_function only check this flag. Per-call
+# wall times [s] are kept per stage name in samples, per process: worker
+# processes return theirs with take_samples and the driver adds them with
+# merge_samples.
+enabled = False
+samples = dict()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+@contextmanager
+def timed(stage):
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.setdefault(stage, []).append(time.perf_counter()-start)
+
+
+# Decorator timing every call of a function as stage
+def timed_function(stage):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled: return function(*args, **kwargs)
+            with timed(stage): return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Samples recorded so far in this process, which are then cleared
+def take_samples():
+    global samples
+    taken, samples = samples, dict()
+    return taken
+
+
+def merge_samples(other):
+    for stage, times in other.items(): samples.setdefault(stage, []).extend(times)
+
+
+####--------------------------------- REPORT -------------------------------####
+
+# Per stage: call count, accumulated wall time and per-call mean, median, 90th
+# and 99th percentiles and maximum [s]. Stages are ordered by decreasing total
+# time. With worker processes, totals add up the time spent in all workers.
+def summary():
+    report = dict()
+    for stage, times in sorted(samples.items(), key=lambda item: -sum(item[1])):
+        times = np.array(times)
+        p50, p90, p99 = np.percentile(times, [50, 90, 99])
+        report[stage] = dict(calls=len(times), total_s=float(times.sum()), mean_s=float(times.mean()),
+                             p50_s=float(p50), p90_s=float(p90), p99_s=float(p99), max_s=float(times.max()))
+    return report
+
+
+def print_report(report):
+    print('{:<40}{:>9}{:>12}{:>12}{:>12}{:>12}{:>12}'.format('stage', 'calls', 'total [s]', 'p50 [ms]', 'p90 [ms]', 'p99 [ms]', 'max [ms]'))
+    for stage, s in report.items():
+        print('{:<40}{:>9}{:>12.3f}{:>12.3f}{:>12.3f}{:>12.3f}{:>12.3f}'.format(stage, s['calls'], s['total_s'], 1e3*s['p50_s'],
+                                                                             1e3*s['p90_s'], 1e3*s['p99_s'], 1e3*s['max_s']))
+
+
+# Print the timing summary and save it to file_name as JSON
+def save_report(file_name):
+    report = summary()
+    print_report(report)
+    with open(file_name, 'w') as outfile: json.dump(report, outfile, indent=4)
@@ -0,0 +1,74 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Columnar format of the output dictionaries of the drivers:    ##
+##              one array per field instead of one JSON object per key,       ##
+##              saved as .npz files, and conversions between records and      ##
+##              columns.                                                      ##
+##                                                                            ##
+################################################################################
+
+import json
+import numpy as np
+
+####---------------------- OUTPUT DICTIONARY TO COLUMNS ---------------------####
+
+# Columnar alternative to the JSON dictionaries: one array per field instead of
+# one JSON object per key. The keys (e.g. spill ID, vertex ID) are stored as an
+# integer (N, key length) array 'key'. List-valued fields (e.g. hadron_pdg) are 
+# stored flat, with field+'/offsets' marking where each record's list starts.
+def save_dict_to_npz(d, name):
+    np.savez(name+'.npz', **dict_to_columns(d))
+
+
+# Columns of a file saved by save_dict_to_npz, or of a JSON dictionary file
+def load_columns(file_name):
+    if not file_name.endswith('.npz'):
+        with open(file_name) as infile: return dict_to_columns(json.load(infile))
+    with np.load(file_name) as infile:
+        return {field: infile[field] for field in infile.files}
+
+
+def dict_to_columns(d):
+    keys = [key if isinstance(key, tuple) else tuple(key.split('-')) for key in d.keys()]
+    columns = dict(key=np.array(keys, dtype=np.int64).reshape(len(keys), -1) if keys else np.zeros((0, 0), dtype=np.int64))
+    records = list(d.values())
+    for field in (records[0].keys() if records else []):
+        values = [record[field] for record in records]
+        if isinstance(values[0], list):
+            columns[field] = np.array([v for value in values for v in value])
+            columns[field+'/offsets'] = np.cumsum([0]+[len(value) for value in values])
+        else: columns[field] = np.array(values)
+    return columns
+
+
+# Column view of d, converted once so that plotting code can select and bin
+# whole columns; d may be a dictionary of records or already a column view
+def as_columns(d):
+    if isinstance(d.get('key'), np.ndarray): return d
+    return dict_to_columns(d)
+
+
+# Number of records of d, a dictionary of records or a column view
+def n_records(d):
+    if isinstance(d.get('key'), np.ndarray): return len(d['key'])
+    return len(d)
+
+
+# Per-record lists of a list-valued column
+def column_lists(columns, field):
+    offsets = columns[field+'/offsets']
+    return [columns[field][offsets[i]:offsets[i+1]].tolist() for i in range(len(offsets)-1)]
+
+
+def columns_to_dict(columns):
+    d = {}
+    fields = [field for field in columns.keys() if field!='key' and not field.endswith('/offsets')]
+    for i, key in enumerate(columns['key']):
+        record = {}
+        for field in fields:
+            if field+'/offsets' in columns:
+                offsets = columns[field+'/offsets']
+                record[field] = columns[field][offsets[i]:offsets[i+1]].tolist()
+            else: record[field] = columns[field][i].item()
+        d['-'.join(str(k) for k in key)] = record
+    return d
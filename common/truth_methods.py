@@ -7,33 +7,32 @@
 ##                                                                            ##
 ################################################################################
 
+import numpy as np
 import particlePDG_defs
+import file_parsing
+import geometry_methods
 
 
 ####---------------------- SIGNAL BASIC CHARACTERISTICS --------------------####
 
 def signal_nu_pdg(ghdr, vert_id):
-    ghdr_vert_mask = ghdr['vertex_id']==vert_id
-    ghdr_nu_interaction = ghdr[ghdr_vert_mask]['nu_pdg']
+    ghdr_nu_interaction = file_parsing.vertex_records(ghdr, vert_id)['nu_pdg']
     if abs(ghdr_nu_interaction[0])==particlePDG_defs.nu_mu_pdg: return True
     else: return False
 
 
 def signal_cc(ghdr, vert_id):
-    ghdr_vert_mask = ghdr['vertex_id']==vert_id
-    return ghdr[ghdr_vert_mask]['isCC'][0]
+    return file_parsing.vertex_records(ghdr, vert_id)['isCC'][0]
 
 
 def signal_meson_status(gstack, vert_id):
-    gstack_vert_mask = gstack['vertex_id']==vert_id
-    gstack_pdg_set = set(gstack[gstack_vert_mask]['part_pdg'])
+    gstack_pdg_set = set(file_parsing.vertex_records(gstack, vert_id)['part_pdg'])
     if len(particlePDG_defs.meson_pdg.intersection(gstack_pdg_set))==0: return True
     else: return False
 
 
 def nu_int_type(ghdr, vert_id):
-    ghdr_vert_mask = ghdr['vertex_id']==vert_id
-    ghdr_nu_interaction = ghdr[ghdr_vert_mask]
+    ghdr_nu_interaction = file_parsing.vertex_records(ghdr, vert_id)
     int_type = ''
     if ghdr_nu_interaction['isQES'] == True:
         int_type = 'QES'
@@ -49,9 +48,68 @@ def nu_int_type(ghdr, vert_id):
         int_type = 'UND'
     return int_type
 
+####------------------------- VECTORIZED SELECTION -------------------------####
+
+# Selection criteria evaluated for every vertex of a spill (or file) at once 
+# (traj, ghdr and gstack may be raw arrays or vertex groupings). Returns boolean
+# arrays aligned with vert: vertex in the LAr active volume, nu_mu(_bar) (as 
+# signal_nu_pdg), CC (signal_cc), no final state mesons (signal_meson_status)
+# and a final state particle starting in the FV (fiducialized_particle_origin).
+# A vertex without a GENIE header record is neither nu_mu nor CC.
+def selection_criteria(vert, ghdr, gstack, traj):
+    criteria = truth_criteria(vert, ghdr, gstack)
+    criteria['fv_particle_origin'] = fv_particle_origin(vert['vertex_id'], traj)
+    return criteria
+
+
+# The criteria of selection_criteria which need no trajectories
+def truth_criteria(vert, ghdr, gstack):
+    ghdr = file_parsing.spill_records(ghdr)
+    gstack = file_parsing.spill_records(gstack)
+    vert_ids = vert['vertex_id']
+
+    vert_pos = np.column_stack((vert['x_vert'], vert['y_vert'], vert['z_vert']))
+    row, found = first_rows(ghdr['vertex_id'], vert_ids)
+    if len(ghdr)==0: ghdr = np.zeros(1, dtype=ghdr.dtype) # rows are not found anyway
+    meson_vertices = gstack['vertex_id'][np.isin(gstack['part_pdg'], list(particlePDG_defs.meson_pdg))]
+
+    return dict(in_active_LAr=geometry_methods.fiducialized_vertices(vert_pos),
+                nu_mu=found & (np.abs(ghdr['nu_pdg'][row])==particlePDG_defs.nu_mu_pdg),
+                is_cc=found & ghdr['isCC'][row],
+                mesonless=~np.isin(vert_ids, meson_vertices))
+
+
+# Whether each of vert_ids has a final state particle starting in the FV
+def fv_particle_origin(vert_ids, traj):
+    traj = file_parsing.spill_records(traj)
+    return np.isin(vert_ids, traj['vertex_id'][geometry_methods.fiducialized_vertices(traj['xyz_start'])])
+
+
+# IDs of the signal candidate vertices of a spill, in vert order: vertex in the
+# LAr active volume, nu_mu(_bar) CC, no final state mesons and a final state 
+# particle starting in the FV
+def signal_vertices(vert, ghdr, gstack, traj):
+    c = selection_criteria(vert, ghdr, gstack, traj)
+    return vert['vertex_id'][c['in_active_LAr'] & c['nu_mu'] & c['is_cc'] & c['mesonless'] & c['fv_particle_origin']]
+
+
+# Truth-level part of the signal selection, for file_parsing.iterate_selected_spills
+def signal_truth_selection(vert, ghdr, gstack):
+    c = truth_criteria(vert, ghdr, gstack)
+    return c['in_active_LAr'] & c['nu_mu'] & c['is_cc'] & c['mesonless']
+
+
 ####--------------------- PARTICLE ORIGIN INFORMATION ----------------------####
 
+# traj_id_set represents a primary particle if the parent of any of its 
+# trajectories is a muon (anti)neutrino. vertex_assoc_traj may be the vertex 
+# trajectories or their trajectory graph (see singleParticleAssociation_methods),
+# in which case the precomputed is_primary column is used.
 def is_primary_particle(traj_id_set, vertex_assoc_traj,traj, ghdr):
+    if isinstance(vertex_assoc_traj, dict):
+        in_set = np.isin(vertex_assoc_traj['traj']['traj_id'], list(traj_id_set))
+        return bool(np.any(vertex_assoc_traj['is_primary'][in_set]))
+
     is_prim = False
 
     for tid in traj_id_set:
@@ -61,7 +119,7 @@ def is_primary_particle(traj_id_set, vertex_assoc_traj,traj, ghdr):
                                      vertex_assoc_traj[particle_mask]['vertex_id'],
                                      traj, ghdr)
         #print("Parent PDG:", parent_pdg)
-        if abs(parent_pdg)==14:
+        if abs(parent_pdg)==particlePDG_defs.nu_mu_pdg:
             is_prim = True
             break
         else: continue
@@ -71,11 +129,47 @@ def is_primary_particle(traj_id_set, vertex_assoc_traj,traj, ghdr):
 
 def find_parent_pdg(parent_id, vertex_id, traj, ghdr):
     if parent_id==-1:
-        ghdr_mask = ghdr['vertex_id']==vertex_id
-        parent_pdg=ghdr[ghdr_mask]['nu_pdg']
+        parent_pdg=file_parsing.vertex_records(ghdr, vertex_id)['nu_pdg']
     else:
+        traj = file_parsing.spill_records(traj)
         parent_mask = traj['traj_id']==parent_id
         parent_pdg = traj[parent_mask]['pdg_id']
     if parent_pdg==[]: parent_pdg=[0]
     return parent_pdg
 
+
+# Parent PDG ID (as returned by find_parent_pdg, 0 if the parent is not found) 
+# and primary flag for every trajectory of a spill, computed once with 
+# vectorized traj_id -> row and vertex_id -> row lookups. Columns are aligned
+# with file_parsing.spill_records(traj), so that they can be added to a vertex
+# grouping of traj: traj.update(trajectory_origin(traj, ghdr))
+def trajectory_origin(traj, ghdr):
+    traj = file_parsing.spill_records(traj)
+    parent_pdg = parent_pdgs(traj['parent_id'], traj['vertex_id'], traj, ghdr)
+    return dict(parent_pdg=parent_pdg, is_primary=np.abs(parent_pdg)==particlePDG_defs.nu_mu_pdg)
+
+
+# Vectorized find_parent_pdg for arrays of parent and vertex IDs: the neutrino
+# PDG ID of the vertex for parent ID -1, otherwise the PDG ID of the parent 
+# trajectory in the spill, and 0 if the parent is not found
+def parent_pdgs(parent_id, vertex_id, traj, ghdr):
+    traj = file_parsing.spill_records(traj)
+    ghdr = file_parsing.spill_records(ghdr)
+    nu_parent = parent_id==-1
+
+    parent_pdg = np.zeros(len(parent_id), dtype=int)
+    row, found = first_rows(traj['traj_id'], parent_id)
+    found &= ~nu_parent
+    parent_pdg[found] = traj['pdg_id'][row[found]]
+    row, found = first_rows(ghdr['vertex_id'], vertex_id)
+    found &= nu_parent
+    parent_pdg[found] = ghdr['nu_pdg'][row[found]]
+    return parent_pdg
+
+
+# First row of ids matching each of values, and whether there is one
+def first_rows(ids, values):
+    if len(ids)==0: return np.zeros(len(values), dtype=int), np.zeros(len(values), dtype=bool)
+    order = np.argsort(ids, kind='stable')
+    i = np.minimum(np.searchsorted(ids[order], values), len(ids)-1)
+    return order[i], ids[order][i]==values
@@ -0,0 +1,90 @@
+import os
+import sys
+import h5py
+import numpy as np
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(root, 'common'))
+sys.path.append(os.path.join(root, 'truth_kinematics', 'file_parsing'))
+sys.path.append(os.path.join(root, 'benchmarks'))
+import file_parsing
+import geometry_defs
+import synthetic_files
+import dirt_backgrounds
+
+
+# Scalar fiducial volume check of the baseline analysis
+def fiducialized_vertex_scalar(vert_pos):
+    return all(any(float(vert_pos[i])>bounds[0] and float(vert_pos[i])<bounds[1] \
+                   for bounds in geometry_defs.tpc_bounds_table[i]) for i in range(3))
+
+
+# Baseline dirt muon characterization (masks over the whole spill, scalar FV
+# checks and per-segment sums), with the MiniRun4 field names
+def dirt_muon_reference(spill_id, vert_id, ghdr, traj, seg, dirt_dict):
+    final_states = traj[traj['vertex_id']==vert_id]
+    truth_level_summ = ghdr[ghdr['vertex_id']==vert_id]
+    length = lambda t: np.linalg.norm(np.subtract(t['xyz_end'], t['xyz_start']))
+    for fs in final_states:
+        if fs['pdg_id'] not in [13, -13]: continue
+        if length(fs)<10 or not fiducialized_vertex_scalar(fs['xyz_start']): continue
+        if fs['parent_id']==-1: parent_pdg = truth_level_summ['nu_pdg'][0]
+        else:
+            parent = final_states[final_states['traj_id']==fs['parent_id']][0]
+            parent_pdg = parent['pdg_id']
+            if length(parent)>3 or parent['parent_id']==-1: continue
+            grandparent = final_states[final_states['traj_id']==parent['parent_id']][0]
+            if grandparent['pdg_id']!=2112:
+                if length(grandparent)>3 or grandparent['parent_id']==-1: continue
+                if length(final_states[final_states['traj_id']==grandparent['parent_id']][0])>3: continue
+        total_edep=0.; contained_edep=0.; total_length=0.; contained_length=0.
+        for sg in seg[seg['traj_id']==fs['traj_id']]:
+            sg_length = float(np.sqrt(sum((float(sg[a+'_start'])-float(sg[a+'_end']))**2 for a in 'xyz')))
+            total_edep+=float(sg['dE']); total_length+=sg_length
+            if fiducialized_vertex_scalar([(sg[a+'_start']+sg[a+'_end'])/2. for a in 'xyz']):
+                contained_edep+=float(sg['dE']); contained_length+=sg_length
+        if contained_edep>5:
+            dirt_dict[(spill_id, vert_id, fs['traj_id'])] = dict(
+                pdg=int(fs['pdg_id']), parent_pdg=int(parent_pdg), total_edep=total_edep, contained_edep=contained_edep,
+                total_length=total_length, contained_length=contained_length,
+                true_mom=float(truth_level_summ['lep_mom'][0]), true_angle=float(truth_level_summ['lep_ang'][0]),
+                true_energy=float(truth_level_summ['Elep'][0]), nu_energy=float(truth_level_summ['Enu'][0]),
+                q_sq=float(truth_level_summ['Q2'][0]))
+
+
+# Gives the first primary muon of traj a short pi+ parent whose parent is a
+# neutron, the chain the dirt selection looks for
+def add_meson_parent(traj):
+    muons = np.flatnonzero((np.abs(traj['pdg_id'])==13) & (traj['parent_id']==-1))
+    if len(muons)==0: return traj
+    mu = traj[muons[0]]
+    extra = np.zeros(2, dtype=traj.dtype)
+    extra[['event_id','vertex_id']] = (mu['event_id'], mu['vertex_id'])
+    extra['traj_id'] = traj['traj_id'].max()+1+np.arange(2)
+    extra['pdg_id'] = [2112, 211]
+    extra['parent_id'] = [-1, extra['traj_id'][0]]
+    extra['xyz_start'] = mu['xyz_start']-[[0,0,2],[0,0,1]]
+    extra['xyz_end'] = mu['xyz_start']-[[0,0,1],[0,0,0]]
+    traj = np.concatenate([traj, extra])
+    traj['parent_id'][muons[0]] = extra['traj_id'][1]
+    return traj
+
+
+def test_dirt_muons_match_baseline(tmp_path):
+    sim_file = str(tmp_path/'sim.LARNDSIM.h5')
+    synthetic_files.make_file(sim_file, n_spills=8, vertices_per_spill=6, segments_per_cm=0.3, seed=3)
+    result, expected = dict(), dict()
+    with h5py.File(sim_file, 'r') as sim_h5:
+        for spill_id, ghdr, gstack, traj, vert, seg in file_parsing.iterate_spills(sim_h5, 'larnd'):
+            traj = add_meson_parent(traj)
+            for vert_id in vert['vertex_id']:
+                dirt_muon_reference(spill_id, vert_id, ghdr, traj, seg, expected)
+            ghdr_grouped, traj_grouped = file_parsing.group_by_vertex(ghdr), file_parsing.group_by_vertex(traj)
+            for vert_id in vert['vertex_id']:
+                dirt_backgrounds.dirt_muon_characterization(spill_id, vert_id, ghdr_grouped, gstack, traj_grouped, vert, seg, result)
+    assert len(expected)>0 and any(r['parent_pdg']==211 for r in expected.values())
+    assert list(result)==list(expected)
+    for key in expected:
+        assert set(result[key])==set(expected[key])
+        for field, value in expected[key].items():
+            assert type(result[key][field])==type(value)
+            assert np.isclose(result[key][field], value, rtol=1e-5), (key, field)
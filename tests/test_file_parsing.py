@@ -0,0 +1,182 @@
+import os
+import sys
+import threading
+import h5py
+import numpy as np
+import pytest
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(root, 'common'))
+sys.path.append(os.path.join(root, 'benchmarks'))
+import file_parsing
+import synthetic_files
+
+
+def make_file(tmp_path, name='sim.LARNDSIM.h5', **kwargs):
+    sim_file = str(tmp_path/name)
+    synthetic_files.make_file(sim_file, **dict(dict(n_spills=6, vertices_per_spill=3, segments_per_cm=0.2), **kwargs))
+    return sim_file
+
+
+####------------------- SPILL/VERTEX INDEX CACHE ON DISK -------------------####
+
+def assert_index_equal(index, expected):
+    assert set(index)==set(expected)
+    for name in expected:
+        np.testing.assert_array_equal(index[name]['ids'], expected[name]['ids'])
+        for id in expected[name]['ids']:
+            np.testing.assert_array_equal(file_parsing.index_rows(index, name, id), file_parsing.index_rows(expected, name, id))
+
+
+# load_file_index of sim_file, and whether the index was built (not read from the sidecar)
+def load_index(sim_file, monkeypatch):
+    built = []
+    build = file_parsing.build_spill_index
+    monkeypatch.setattr(file_parsing, 'build_spill_index', lambda *args: built.append(True) or build(*args))
+    with h5py.File(sim_file, 'r') as sim_h5:
+        spill_index, vertex_index = file_parsing.load_file_index(sim_h5, 'larnd')
+        assert_index_equal(spill_index, file_parsing.build_spill_index(sim_h5, 'larnd'))
+        assert_index_equal(vertex_index, file_parsing.build_vertex_index(sim_h5, 'larnd'))
+    return len(built)>1
+
+
+def test_index_cache_reused(tmp_path, monkeypatch):
+    sim_file = make_file(tmp_path)
+    assert load_index(sim_file, monkeypatch)
+    assert os.path.exists(sim_file+'.index.npz')
+    assert not load_index(sim_file, monkeypatch)
+
+
+def test_index_cache_rebuilt_on_size_change(tmp_path, monkeypatch):
+    sim_file = make_file(tmp_path)
+    load_index(sim_file, monkeypatch)
+    make_file(tmp_path, n_spills=9, seed=1)
+    assert load_index(sim_file, monkeypatch)
+
+
+def test_index_cache_rebuilt_on_mtime_change(tmp_path, monkeypatch):
+    sim_file = make_file(tmp_path)
+    load_index(sim_file, monkeypatch)
+    stat = os.stat(sim_file)
+    os.utime(sim_file, ns=(stat.st_atime_ns, stat.st_mtime_ns+10**9))
+    assert load_index(sim_file, monkeypatch)
+    assert not load_index(sim_file, monkeypatch)
+
+
+def test_index_cache_stale_sidecar(tmp_path, monkeypatch):
+    sim_file = make_file(tmp_path)
+    other_file = make_file(tmp_path, 'other.LARNDSIM.h5', n_spills=4, seed=2)
+    load_index(other_file, monkeypatch)
+    os.replace(other_file+'.index.npz', sim_file+'.index.npz') # index of another file
+    assert load_index(sim_file, monkeypatch)
+
+
+@pytest.mark.parametrize('content', [b'', b'not an index', b'PK\x03\x04 truncated zip'])
+def test_index_cache_corrupt_sidecar(tmp_path, monkeypatch, content):
+    sim_file = make_file(tmp_path)
+    load_index(sim_file, monkeypatch)
+    with open(sim_file+'.index.npz', 'rb') as infile: valid = infile.read()
+    for data in [content, valid[:len(valid)//2]]:
+        with open(sim_file+'.index.npz', 'wb') as outfile: outfile.write(data)
+        assert load_index(sim_file, monkeypatch)
+        assert not load_index(sim_file, monkeypatch) # rewritten
+
+
+####------------------- SELECTION-FIRST SPILL READING ----------------------####
+
+# Vertices selected by the truth datasets, and those kept by their trajectories,
+# leaving gaps in the rows read
+select_vertices = lambda vert, ghdr, gstack: vert['vertex_id']%3!=1
+keep_vertices = lambda vert_ids, traj: vert_ids%2==0
+
+
+# Whether the rows of some spill are read by more than one planned read
+def spill_split(sim_file, name, block_size):
+    with h5py.File(sim_file, 'r') as sim_h5:
+        spill_index, vertex_index = file_parsing.load_file_index(sim_h5, 'larnd')
+        vert = sim_h5['vertices'][:]
+        vert_ids = vert['vertex_id'][select_vertices(vert, None, None)]
+        vert_ids = vert_ids[keep_vertices(vert_ids, None)]
+        spill_ids = np.unique(vert['event_id'][np.isin(vert['vertex_id'], vert_ids)])
+        plan = file_parsing.plan_reads(sim_h5[name], file_parsing.selected_rows(name, vert_ids, spill_ids, spill_index, vertex_index), block_size)
+    for spill_id in spill_ids:
+        rows = file_parsing.selected_rows(name, vert_ids[vert_ids//synthetic_files.VERTEX_ID_STRIDE==spill_id], [spill_id], spill_index, vertex_index)
+        if len(np.unique(np.searchsorted(plan['stops'], rows, side='right')))>1: return True
+    return False
+
+
+@pytest.mark.parametrize('block_size', [1, 4096, file_parsing.default_block_size])
+def test_selected_spills_match_get_spill_data(tmp_path, block_size):
+    sim_file = make_file(tmp_path, n_spills=6, vertices_per_spill=5)
+    if block_size==1: assert spill_split(sim_file, 'segments', block_size)
+
+    spills = list(file_parsing.selected_spills(sim_file, 'larnd', select_vertices, keep_vertices, block_size=block_size))
+    with h5py.File(sim_file, 'r') as sim_h5:
+        vert_all = sim_h5['vertices'][:]
+        expected_spills = np.unique(vert_all['event_id'][select_vertices(vert_all, None, None)])
+        assert [spill[0] for spill in spills]==expected_spills.tolist()
+        for spill_id, ghdr, gstack, traj, vert, seg in spills:
+            expected = file_parsing.get_spill_data(sim_h5, spill_id, 'larnd')
+            for a, b in zip([ghdr, gstack, vert], [expected[0], expected[1], expected[3]]):
+                np.testing.assert_array_equal(a, b)
+            selected = expected[3]['vertex_id'][select_vertices(expected[3], None, None)]
+            np.testing.assert_array_equal(traj, expected[2][np.isin(expected[2]['vertex_id'], selected)])
+            kept = selected[keep_vertices(selected, None)]
+            np.testing.assert_array_equal(seg, expected[4][np.isin(expected[4]['vertex_id'], kept)])
+
+####------------------------- PREFETCHING SPILLS ---------------------------####
+
+# Generator over range(n), raising error (if given) after it, recording in 
+# state the elements produced and whether it was closed
+def elements(state, n, error=None):
+    try:
+        for i in range(n):
+            state['produced'] = i+1
+            yield i
+        if error is not None: raise error
+    finally: state['closed'] = True
+
+
+@pytest.mark.parametrize('depth', [0, 1, 3])
+def test_prefetch_raises_reader_exception(depth):
+    state = dict()
+    received = []
+    with pytest.raises(ValueError, match='bad spill'):
+        for element in file_parsing.prefetch(elements(state, 5, ValueError('bad spill')), depth):
+            received.append(element)
+    assert received==list(range(5)) and state['closed']
+
+
+@pytest.mark.parametrize('depth', [0, 1, 3])
+def test_prefetch_stops_reader_when_consumer_stops(depth):
+    threads = set(threading.enumerate())
+    state = dict()
+    loaded = file_parsing.prefetch(elements(state, 10**6), depth)
+    assert [next(loaded) for i in range(3)]==[0, 1, 2]
+    loaded.close()
+    assert state['closed'] and state['produced']<=3+depth+1 # at most depth waiting, plus the one being produced
+    assert set(threading.enumerate())<=threads
+
+    state = dict()
+    for element in file_parsing.prefetch(elements(state, 10**6), depth):
+        if element==2: break
+    assert state['closed'] and set(threading.enumerate())<=threads
+
+
+def test_prefetch_spills_reader_exception_and_early_stop():
+    threads = set(threading.enumerate())
+    states = {item: dict() for item in 'abc'}
+    iterate = lambda item: elements(states[item], 3, ValueError(item) if item=='b' else None)
+    received = []
+    with pytest.raises(ValueError, match='b'):
+        for item, spills in file_parsing.prefetch_spills('abc', iterate, depth=2):
+            for spill in spills: received.append((item, spill))
+    assert received==[('a', 0), ('a', 1), ('a', 2), ('b', 0), ('b', 1), ('b', 2)]
+    assert 'produced' not in states['c'] and set(threading.enumerate())<=threads
+
+    states = {item: dict() for item in 'abc'}
+    received = []
+    for item, spills in file_parsing.prefetch_spills('abc', lambda item: elements(states[item], 1000), depth=2):
+        received.append(item) # spills left unprocessed
+        if item=='b': break
+    assert received==['a', 'b'] and states['a']['produced']==1000
+    assert states['b']['closed'] and 'produced' not in states['c'] and set(threading.enumerate())<=threads
@@ -0,0 +1,60 @@
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import geometry_defs
+import geometry_methods as geo_methods
+
+
+# Scalar fiducial volume check on float64 values, as before vectorization
+def fiducialized_vertex_scalar(vert_pos):
+    flags = []
+    for i in range(3):
+        flags.append(any(float(vert_pos[i])>bounds[0] and float(vert_pos[i])<bounds[1] \
+                         for bounds in geometry_defs.tpc_bounds_table[i]))
+    return all(flags)
+
+
+# float32 positions at and next to the TPC boundaries in each coordinate, the
+# other coordinates inside or outside the TPCs at random
+def edge_positions(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = [np.mean(bounds, axis=1) for bounds in geometry_defs.tpc_bounds_table]
+    edges = [np.ravel(bounds) for bounds in geometry_defs.tpc_bounds_table]
+    positions = np.zeros((n, 3), dtype=np.float32)
+    for k in range(n):
+        for i in range(3):
+            if rng.random()<0.5: value = rng.choice(edges[i])
+            else: value = rng.choice(centers[i])+rng.uniform(-1, 1)
+            positions[k, i] = np.float32(value)+rng.integers(-2, 3)*np.spacing(np.float32(value))
+    return positions
+
+
+def test_fiducialized_vertices_edges_match_scalar():
+    positions = edge_positions()
+    expected = np.array([fiducialized_vertex_scalar(p) for p in positions])
+    np.testing.assert_array_equal(geo_methods.fiducialized_vertices(positions), expected)
+
+
+def test_fiducialized_vertices_edges_match_tpc_indices():
+    positions = edge_positions(seed=1)
+    np.testing.assert_array_equal(geo_methods.fiducialized_vertices(positions), geo_methods.tpc_indices(positions)>=0)
+
+
+def test_boundary_is_outside():
+    low, high = geometry_defs.tpc_bounds_table[2][0]
+    x, y = np.mean(geometry_defs.tpc_bounds_table[0][0]), np.mean(geometry_defs.tpc_bounds_table[1][0])
+    positions = np.array([[x, y, low], [x, y, high], [x, y, (low+high)/2.]], dtype=np.float32)
+    assert geo_methods.fiducialized_vertices(positions).tolist()==[False, False, True]
+
+
+def test_containment_and_end_location_at_edges():
+    positions = edge_positions(n=400, seed=2)
+    traj = np.zeros(len(positions)//2, dtype=[('traj_id','u4'), ('xyz_start','f4',(3,)), ('xyz_end','f4',(3,))])
+    traj['traj_id'] = np.arange(len(traj))
+    traj['xyz_start'], traj['xyz_end'] = positions[0::2], positions[1::2]
+    for t in traj:
+        start, end = fiducialized_vertex_scalar(t['xyz_start']), fiducialized_vertex_scalar(t['xyz_end'])
+        expected = 'fc' if start and end else 'pc' if start or end else 'tg'
+        assert geo_methods.particle_containment(traj, t['traj_id'])==expected
+        assert (geo_methods.particle_end_loc(t['xyz_start'], t['xyz_end'])=='f')==end
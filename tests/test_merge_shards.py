@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+import numpy as np
+import pytest
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(root, 'common'))
+sys.path.append(os.path.join(root, 'truth_kinematics', 'file_parsing'))
+sys.path.append(os.path.join(root, 'truth_kinematics', 'plotting'))
+sys.path.append(os.path.join(root, 'benchmarks'))
+import record_sinks
+import result_shards
+import table_columns
+import synthetic_files
+import beam_background_kinematics
+import merge_shards
+import signal_kinematics
+
+# Driver module, its tables and the other files it writes
+DRIVERS = dict(signal_kinematics=(signal_kinematics, ['signal_dict', 'muon_dict', 'hadron_dict'], ['signal_event_counts.txt']),
+               beam_background_kinematics=(beam_background_kinematics, ['nc_pion_backgrounds', 'nc_primaries'], []))
+
+
+@pytest.fixture
+def sim_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(signal_kinematics, 'plot_muons', lambda *args, **kwargs: None) # plots are not compared
+    monkeypatch.setattr(signal_kinematics, 'plot_hadrons', lambda *args, **kwargs: None)
+    synthetic_files.make_files(str(tmp_path/'sim'), 5, n_spills=4, vertices_per_spill=4, segments_per_cm=0.2)
+    return str(tmp_path/'sim')
+
+
+# Runs driver on the files of sim_dir in work_dir
+def run(driver, sim_dir, work_dir, monkeypatch, **kwargs):
+    os.makedirs(work_dir, exist_ok=True)
+    monkeypatch.chdir(work_dir)
+    DRIVERS[driver][0].main(sim_dir, 'larnd', n_files_processed=None, **kwargs)
+
+
+def read(file_name):
+    with open(file_name, 'rb') as infile: return infile.read()
+
+
+def assert_tables_equal(name, output_format, work_dir, expected_dir):
+    if output_format=='json':
+        assert read(os.path.join(work_dir, name+'.json'))==read(os.path.join(expected_dir, name+'.json')), name
+    else:
+        columns = table_columns.load_columns(os.path.join(work_dir, name+'.npz'))
+        expected = table_columns.load_columns(os.path.join(expected_dir, name+'.npz'))
+        assert list(columns)==list(expected)
+        for field in expected: np.testing.assert_array_equal(columns[field], expected[field])
+    with open(os.path.join(work_dir, name+'.pot.json')) as infile: pot = json.load(infile)
+    with open(os.path.join(expected_dir, name+'.pot.json')) as infile: expected_pot = json.load(infile)
+    assert pot==expected_pot and list(pot['files'])==list(expected_pot['files'])
+
+
+@pytest.mark.parametrize('output_format', ['json', 'npz'])
+@pytest.mark.parametrize('driver', sorted(DRIVERS))
+def test_merged_shards_match_single_run(sim_dir, tmp_path, monkeypatch, driver, output_format):
+    tables, other_files = DRIVERS[driver][1:]
+    run(driver, sim_dir, str(tmp_path/'single'), monkeypatch, output_format=output_format)
+    for i in range(3):
+        run(driver, sim_dir, str(tmp_path/'shards'), monkeypatch, output_format=output_format, shard=(i, 3))
+
+    monkeypatch.chdir(str(tmp_path))
+    os.makedirs('merged')
+    records = [os.path.join('shards', driver+result_shards.batch_shard_suffix((i, 3))+'.json') for i in [2, 0, 1]]
+    monkeypatch.chdir(str(tmp_path/'merged'))
+    merge_shards.main([os.path.join('..', record) for record in records], output_format)
+
+    if driver=='signal_kinematics':
+        assert table_columns.n_records(table_columns.load_columns(str(tmp_path/'single'/record_sinks.table_file_name('signal_dict', output_format))))>0
+    for name in tables: assert_tables_equal(name, output_format, str(tmp_path/'merged'), str(tmp_path/'single'))
+    for file_name in other_files: assert read(str(tmp_path/'merged'/file_name))==read(str(tmp_path/'single'/file_name))
+
+
+def test_merge_shards_rejects_repeated_shard(sim_dir, tmp_path, monkeypatch):
+    run('beam_background_kinematics', sim_dir, str(tmp_path/'shards'), monkeypatch, shard=(0, 2))
+    with pytest.raises(ValueError, match='shard merged twice'):
+        merge_shards.main(['beam_background_kinematics_shard0of2.json']*2)
+
+
+def test_resumed_run_reads_back_shards(sim_dir, tmp_path, monkeypatch):
+    shard_dir = str(tmp_path/'shards')
+    run('signal_kinematics', sim_dir, str(tmp_path/'first'), monkeypatch, shard_dir=shard_dir)
+    shards = sorted(os.listdir(shard_dir))
+    written = {name: os.stat(os.path.join(shard_dir, name)).st_mtime_ns for name in shards}
+
+    monkeypatch.setattr(signal_kinematics, 'read_file', lambda *args, **kwargs: pytest.fail('file processed again'))
+    run('signal_kinematics', sim_dir, str(tmp_path/'resumed'), monkeypatch, shard_dir=shard_dir)
+    assert sorted(os.listdir(shard_dir))==shards
+    assert {name: os.stat(os.path.join(shard_dir, name)).st_mtime_ns for name in shards}==written
+    for name in DRIVERS['signal_kinematics'][1]: assert_tables_equal(name, 'json', str(tmp_path/'resumed'), str(tmp_path/'first'))
+    assert read(str(tmp_path/'resumed'/'signal_event_counts.txt'))==read(str(tmp_path/'first'/'signal_event_counts.txt'))
+
+
+def test_resumed_run_processes_changed_files(sim_dir, tmp_path, monkeypatch):
+    shard_dir = str(tmp_path/'shards')
+    run('signal_kinematics', sim_dir, str(tmp_path/'first'), monkeypatch, shard_dir=shard_dir)
+    sim_files = sorted(name for name in os.listdir(sim_dir) if name.endswith(synthetic_files.FILE_EXTENSIONS['larnd']))
+    synthetic_files.make_file(os.path.join(sim_dir, sim_files[1]), n_spills=4, vertices_per_spill=4, segments_per_cm=0.2,
+                              seed=11, first_spill=4)
+
+    processed = []
+    read_file = signal_kinematics.read_file
+    monkeypatch.setattr(signal_kinematics, 'read_file', lambda sim_file, *args, **kwargs: \
+                        processed.append(os.path.basename(sim_file)) or read_file(sim_file, *args, **kwargs))
+    run('signal_kinematics', sim_dir, str(tmp_path/'resumed'), monkeypatch, shard_dir=shard_dir)
+    assert processed==[sim_files[1]]
+    run('signal_kinematics', sim_dir, str(tmp_path/'fresh'), monkeypatch)
+    for name in DRIVERS['signal_kinematics'][1]: assert_tables_equal(name, 'json', str(tmp_path/'resumed'), str(tmp_path/'fresh'))
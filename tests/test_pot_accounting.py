@@ -0,0 +1,22 @@
+import os
+import sys
+import pytest
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(root, 'common'))
+import pot_accounting
+
+
+def test_merge_pot_records():
+    records = [pot_accounting.pot_record({'/sim/a.h5': 1e16, '/sim/b.h5': 2e16}), pot_accounting.pot_record({'/sim/c.h5': 3e16})]
+    merged = pot_accounting.merge_pot_records(records)
+    assert merged==dict(pot=6e16, n_files=3, files={'/sim/a.h5': 1e16, '/sim/b.h5': 2e16, '/sim/c.h5': 3e16})
+    assert list(merged['files'])==['/sim/a.h5', '/sim/b.h5', '/sim/c.h5']
+
+
+def test_merge_pot_records_rejects_repeated_files():
+    records = [pot_accounting.pot_record({'/sim/a.h5': 1e16, '/sim/b.h5': 2e16}), pot_accounting.pot_record({'/sim/c.h5': 3e16}),
+               pot_accounting.pot_record({'/sim/b.h5': 2e16})]
+    with pytest.raises(ValueError, match='counted twice.*b.h5'):
+        pot_accounting.merge_pot_records(records)
+    with pytest.raises(ValueError, match='counted twice'):
+        pot_accounting.merge_pot_records([records[0], records[0]])
@@ -0,0 +1,45 @@
+import os
+import sys
+import numpy as np
+import pytest
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(root, 'common'))
+import file_parsing
+import record_sinks
+import table_columns
+
+
+# Records with integer, float (an integer in the first records), boolean, 
+# string and list fields; the lists are empty in whole flushes
+def records(n):
+    return {(1000+i//4, i, 3*i): dict(pdg=13 if i%2 else 2212, energy=float(i)/3. if i>2 else i,
+                                       contained=bool(i%3), kind='mu' if i%2 else 'proton',
+                                       hadron_pdg=[211]*(i%5) if i>=6 else [])
+            for i in range(n)}
+
+
+@pytest.mark.parametrize('output_format', ['json', 'npz'])
+@pytest.mark.parametrize('n', [0, 1, 3, 10])
+def test_record_sink_matches_save_dict(tmp_path, output_format, n):
+    d = records(n)
+    file_parsing.save_dict(d, str(tmp_path/'saved'), True, output_format)
+    sink = record_sinks.open_output_dict(str(tmp_path/'streamed'), flush_every=3)
+    for key, record in d.items(): sink[key] = record
+    columns = record_sinks.close_output_dict(sink, str(tmp_path/'streamed'), output_format)
+
+    assert not os.path.exists(str(tmp_path/'streamed.jsonl'))
+    expected = table_columns.dict_to_columns(d)
+    assert list(columns)==list(expected)
+    for field in expected:
+        np.testing.assert_array_equal(columns[field], expected[field])
+        if n>0: assert columns[field].dtype==expected[field].dtype, field
+
+    if output_format=='json':
+        with open(str(tmp_path/'saved.json'), 'rb') as saved, open(str(tmp_path/'streamed.json'), 'rb') as streamed:
+            assert streamed.read()==saved.read()
+        return
+    saved, streamed = table_columns.load_columns(str(tmp_path/'saved.npz')), table_columns.load_columns(str(tmp_path/'streamed.npz'))
+    assert list(streamed)==list(saved)
+    for field in saved:
+        assert streamed[field].dtype==saved[field].dtype and streamed[field].shape==saved[field].shape, field
+        np.testing.assert_array_equal(streamed[field], saved[field])
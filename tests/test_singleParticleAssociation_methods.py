@@ -0,0 +1,142 @@
+import os
+import sys
+import numpy as np
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(root, 'common'))
+sys.path.append(os.path.join(root, 'benchmarks'))
+import file_parsing
+import singleParticleAssociation_methods as particle_assoc
+import synthetic_files
+import truth_methods as truth
+
+
+# Trajectories (traj_id, parent_id, pdg_id, start z, end z) of a spill with
+# vertex 7 and another vertex 8:
+#  - a primary muon rescattering into a muon (0 -> 1) with an electron child
+#  - a primary proton rescattering twice (3 -> 4 -> 5) with a neutron sibling
+#    of the last proton, which ends the chain at 4
+#  - a non-primary pi+ chain (8 -> 9) whose head has a neutron parent
+#  - a proton whose same-PDG parent belongs to vertex 8 (external parent), and
+#    a proton whose parent is not in the spill
+VERTEX_TRAJECTORIES = [(0, -1, 13, 0., 100.), (1, 0, 13, 100., 300.), (2, 1, 11, 300., 301.),
+                       (3, -1, 2212, 0., 10.), (4, 3, 2212, 10., 30.), (5, 4, 2212, 30., 20.), (6, 4, 2112, 30., 60.),
+                       (8, 6, 211, 60., 70.), (9, 8, 211, 70., 90.),
+                       (10, 100, 2212, 5., 15.), (11, 999, 2212, 0., 4.)]
+OTHER_TRAJECTORIES = [(100, -1, 2212, -50., 5.)]
+
+
+def trajectories(records, vertex_id):
+    traj = np.zeros(len(records), dtype=synthetic_files.TRAJECTORIES_DTYPE)
+    traj['vertex_id'] = vertex_id
+    for i, (traj_id, parent_id, pdg, z_start, z_end) in enumerate(records):
+        traj[['traj_id','parent_id','pdg_id']][i] = (traj_id, parent_id, pdg)
+        traj['xyz_start'][i] = (0., 0., z_start); traj['xyz_end'][i] = (0., 0., z_end)
+    return traj
+
+
+def spill():
+    traj = np.concatenate([trajectories(OTHER_TRAJECTORIES, 8), trajectories(VERTEX_TRAJECTORIES, 7)])
+    ghdr = np.zeros(2, dtype=synthetic_files.MC_HDR_DTYPE)
+    ghdr['vertex_id'] = (7, 8); ghdr['nu_pdg'] = -14
+    return traj, ghdr
+
+
+def test_trajectory_graph_parent_rows():
+    traj, ghdr = spill()
+    final_states = file_parsing.vertex_records(traj, 7)
+    graph = particle_assoc.trajectory_graph(final_states, traj, ghdr)
+    expected = [particle_assoc.graph_row(graph, pid) if pid!=-1 else -1 for pid in final_states['parent_id']]
+    assert graph['parent_row'].tolist()==expected
+    assert graph['children'].tolist()==[1, 2, 4, 5, 6, 7, 8]
+
+
+def test_trajectory_graph_parent_pdg_paths_agree():
+    traj, ghdr = spill()
+    final_states = file_parsing.vertex_records(traj, 7)
+    graph = particle_assoc.trajectory_graph(final_states, traj, ghdr)
+
+    grouped_traj, grouped_ghdr = file_parsing.group_by_vertex(traj), file_parsing.group_by_vertex(ghdr)
+    grouped_traj.update(truth.trajectory_origin(grouped_traj, grouped_ghdr))
+    grouped_graph = particle_assoc.trajectory_graph(file_parsing.vertex_records(grouped_traj, 7), grouped_traj, grouped_ghdr)
+
+    assert graph['parent_pdg'].tolist()==grouped_graph['parent_pdg'].tolist()
+    assert graph['parent_pdg'].tolist()==[-14, 13, 13, -14, 2212, 2212, 2212, 2112, 211, 2212, 0]
+    assert graph['is_primary'].tolist()==grouped_graph['is_primary'].tolist()
+
+
+# Baseline find_parent_pdg and same_pdg_connected_trajectories, which walked
+# the lineage of one track with masks over the vertex trajectories; the breaks
+# on empty lookups stand for the baseline's comparisons with empty arrays
+def find_parent_pdg_reference(parent_id, vertex_id, traj, ghdr):
+    if parent_id==-1: parent_pdg = ghdr[ghdr['vertex_id']==vertex_id]['nu_pdg']
+    else: parent_pdg = traj[traj['traj_id']==parent_id]['pdg_id']
+    return parent_pdg
+
+
+def same_pdg_connected_trajectories_reference(track_pdg, track_id, vertex_assoc_traj, traj, ghdr):
+    traj_id_set = {track_id}
+    this_pdg = track_pdg
+    this_track_id = track_id
+    while this_pdg==track_pdg:
+        particle_mask = vertex_assoc_traj['traj_id'] == this_track_id
+        parent_track_id = vertex_assoc_traj[particle_mask]['parent_id']
+        if len(parent_track_id)==0: break # track outside of the vertex: no generation to compare
+        this_generation = vertex_assoc_traj[vertex_assoc_traj['parent_id'] == parent_track_id]
+        if len(this_generation) == 1:
+            this_pdg = find_parent_pdg_reference(parent_track_id, vertex_assoc_traj[particle_mask]['vertex_id'], traj, ghdr)
+            if len(this_pdg)==0: break
+            if this_pdg==track_pdg:
+                this_track_id = parent_track_id.tolist()[0]
+                traj_id_set.add(this_track_id)
+        else: break
+
+    this_pdg = track_pdg
+    this_track_id = track_id
+    while this_pdg==track_pdg:
+        child_particle = vertex_assoc_traj[vertex_assoc_traj['parent_id'] == this_track_id]
+        if len(child_particle)==1:
+            this_pdg = child_particle['pdg_id']
+            if child_particle['pdg_id']==track_pdg:
+                this_track_id = child_particle['traj_id'].tolist()[0]
+                traj_id_set.add(this_track_id)
+        else: break
+    return traj_id_set
+
+
+# Baseline find_forward_primary_particle_end_trajectory (indexing the first 
+# record of each mask): trajectory of the set ending furthest downstream of the
+# start of the trajectory at the vertex
+def forward_end_reference(traj_id_set, vertex_assoc_traj, vertex_traj_id):
+    start_z = vertex_assoc_traj[vertex_assoc_traj['traj_id']==vertex_traj_id]['xyz_start'][0][2]
+    traj_id_at_end = vertex_traj_id; end_z = start_z
+    for tid in traj_id_set:
+        tid_end_z = vertex_assoc_traj[vertex_assoc_traj['traj_id']==tid]['xyz_end'][0][2]
+        if tid_end_z>end_z: end_z = tid_end_z; traj_id_at_end = tid
+    return traj_id_at_end
+
+
+def test_same_pdg_chains_match_connected_trajectories():
+    traj, ghdr = spill()
+    final_states = file_parsing.vertex_records(traj, 7)
+    graph = particle_assoc.trajectory_graph(final_states, traj, ghdr)
+    chains = particle_assoc.same_pdg_chains(graph)
+
+    for row, fs in enumerate(final_states):
+        expected = same_pdg_connected_trajectories_reference(fs['pdg_id'], int(fs['traj_id']), final_states, traj, ghdr)
+        assert particle_assoc.chain_traj_ids(chains, graph, chains['label'][row])==expected, int(fs['traj_id'])
+        assert particle_assoc.same_pdg_connected_trajectories(fs['pdg_id'], int(fs['traj_id']), graph, traj, ghdr)==expected
+
+    chain_sets = [particle_assoc.chain_traj_ids(chains, graph, c) for c in range(len(chains['head']))]
+    assert chain_sets==[{0, 1}, {2}, {3, 4}, {5}, {6}, {8, 9}, {10, 100}, {11}]
+    assert chains['vertex_row'].tolist()==[0, -1, 3, -1, -1, -1, -1, -1]
+
+
+def test_same_pdg_chains_forward_end():
+    traj, ghdr = spill()
+    final_states = file_parsing.vertex_records(traj, 7)
+    graph = particle_assoc.trajectory_graph(final_states, traj, ghdr)
+    chains = particle_assoc.same_pdg_chains(graph)
+    for c in np.flatnonzero(chains['vertex_row']>=0):
+        vertex_traj_id = final_states['traj_id'][chains['vertex_row'][c]]
+        expected = forward_end_reference(particle_assoc.chain_traj_ids(chains, graph, c), final_states, vertex_traj_id)
+        assert final_states['traj_id'][chains['end'][c]]==expected
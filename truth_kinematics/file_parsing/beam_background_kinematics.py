@@ -6,58 +6,76 @@
 ##                                                                            ##
 ################################################################################
 
-import h5py
 import argparse
-import numpy as np
 import glob
+from functools import partial
 import mip_backgrounds
 import sys
 sys.path.append('../../common')
 import file_parsing
-import geometry_methods as geo_methods
+import record_sinks
+import result_shards
+import pot_accounting
+import stage_timing
 import truth_methods as truth
 
 
-def main(sim_dir, input_type):
-    cc_dict, nc_dict, cc_primaries_dict, nc_primaries_dict = [dict() for i in range(4)]
+# Truth-level part of the PID background selection: vertex in the LAr active
+# volume, NC interaction with final state mesons
+def pid_background_truth_selection(vert, ghdr, gstack):
+    c = truth.truth_criteria(vert, ghdr, gstack)
+    return c['in_active_LAr'] & ~c['is_cc'] & ~c['mesonless']
+
+
+def main(sim_dir, input_type, n_files_processed=10, output_format='json', flush_every=0, timing_report=None, prefetch=1, shard=None, block_size=file_parsing.default_block_size):
+    if timing_report is not None: stage_timing.enable()
+    cc_dict, cc_primaries_dict = [dict() for i in range(2)]
+    suffix = result_shards.batch_shard_suffix(shard) # output names of a batch shard
+    nc_dict = record_sinks.open_output_dict('nc_pion_backgrounds'+suffix, flush_every)
+    nc_primaries_dict = record_sinks.open_output_dict('nc_primaries'+suffix, flush_every)
     file_ctr=0
 
     file_ext = '' ### modified by commandline argument
-    event_spill_id = '' ## Changes based on input type
 
     if input_type == 'larnd': 
         file_ext = '.LARNDSIM.h5'
-        event_spill_id = 'eventID'
     elif input_type == 'edep':
         file_ext = '.EDEPSIM.h5'
-        event_spill_id = 'spillID'
 
-    for sim_file in glob.glob(sim_dir+'/*'+file_ext):
+    ### spills with vertices passing the truth-level cuts (only their trajectories and segments are read), 
+    ### reading the next prefetch spills in a background thread
+    read_file = partial(file_parsing.selected_spills, input_type=input_type, select=pid_background_truth_selection, \
+                        select_trajectories=truth.fv_particle_origin, fields=file_parsing.analysis_fields, block_size=block_size)
+    # Sort files so that merged batch shards give the same output as a single job
+    files = sorted(glob.glob(sim_dir+'/*'+file_ext))[:n_files_processed]
+    files = result_shards.batch_shard_files(files, shard)
+    for sim_file, spills in file_parsing.prefetch_spills(files, read_file, prefetch):
         file_ctr+=1
-        if file_ctr>10: break
 #        if file_ctr%10==0: print('FILE #: ',file_ctr)
         print('FILE #: ',file_ctr)
-        sim_h5 = h5py.File(sim_file,'r')
     
         ### partition file by spill
-        unique_spill = np.unique(sim_h5['trajectories'][event_spill_id])
-        for spill_id in unique_spill:
-            ghdr, gstack, traj, vert, seg = file_parsing.get_spill_data(sim_h5, spill_id, input_type)
+        for spill_id, ghdr, gstack, traj, vert, seg in spills:
 
-            ### partition by vertex ID within beam spill
-            for v_i in range(len(vert['vertexID'])):
-                vert_pos= [vert['x_vert'][v_i], vert['y_vert'][v_i], vert['z_vert'][v_i]]
-                vert_in_active_LAr = geo_methods.fiducialized_vertex( vert_pos )
+            with stage_timing.timed('spill partitioning'):
+                ### group GENIE and trajectory records by vertex ID once per spill
+                ghdr = file_parsing.group_by_vertex(ghdr)
+                traj = file_parsing.group_by_vertex(traj)
+                traj.update(truth.trajectory_origin(traj, ghdr)) # parent PDG ID and primary flag per trajectory
 
+            ### selection criteria for all vertices of the spill at once
+            with stage_timing.timed('vertex selection'):
+                criteria = truth.selection_criteria(vert, ghdr, gstack, traj)
+            for v_i in range(len(vert['vertex_id'])):
                 ##### REQUIRE neutrino vertex in LAr active volume #####
-                if vert_in_active_LAr==False: continue
+                if criteria['in_active_LAr'][v_i]==False: continue
 
-                vert_id = vert['vertexID'][v_i]
+                vert_id = vert['vertex_id'][v_i]
             
-                nu_mu_bar = truth.signal_nu_pdg(ghdr, vert_id)
-                is_cc = truth.signal_cc(ghdr, vert_id)
-                pionless = truth.signal_meson_status(gstack, vert_id)
-                fv_particle_origin=geo_methods.fiducialized_particle_origin(traj, vert_id)
+                nu_mu_bar = criteria['nu_mu'][v_i]
+                is_cc = criteria['is_cc'][v_i]
+                pionless = criteria['mesonless'][v_i]
+                fv_particle_origin = criteria['fv_particle_origin'][v_i]
                         
                 ##### THRESHOLD BACKGROUNDS #####
 #                if is_cc==True and pionless==False and fv_particle_origin==True:
@@ -71,8 +89,15 @@ def main(sim_dir, input_type):
 
 #    file_parsing.save_dict_to_json(cc_dict, 'cc_pion_backgrounds', True)
 #    file_parsing.save_dict_to_json(cc_primaries_dict, 'cc_primaries', True)
-    file_parsing.save_dict_to_json(nc_dict, 'nc_pion_backgrounds', True)
-    file_parsing.save_dict_to_json(nc_primaries_dict, 'nc_primaries', True)
+    pot = pot_accounting.files_pot_record(files) # POT of the files processed, saved with every table
+    record_sinks.close_output_dict(nc_dict, 'nc_pion_backgrounds'+suffix, output_format, pot)
+    record_sinks.close_output_dict(nc_primaries_dict, 'nc_primaries'+suffix, output_format, pot)
+    if shard is not None:
+        result_shards.save_batch_record('beam_background_kinematics', shard, input_type, pot, \
+                                       {name: record_sinks.table_file_name(name+suffix, output_format) \
+                                        for name in ['nc_pion_backgrounds', 'nc_primaries']})
+
+    if timing_report is not None: stage_timing.save_report(timing_report)
     
 
 
@@ -82,5 +107,19 @@ if __name__=='__main__':
                         help='''string corresponding to the path of the directory containing edep-sim or larnd ouput simulation file(s)''')
     parser.add_argument('-t', '--input_type', default='edep', choices=['edep', 'larnd'], type=str, \
                         help='''string corresponding to the output file type: edep or larnd''')
+    parser.add_argument('-o', '--output_format', default='json', choices=['json', 'npz'], type=str, \
+                        help='''Output dictionary file format: indented JSON or columnar NumPy .npz''')
+    parser.add_argument('-f', '--flush_every', default=0, type=int, \
+                        help='''If > 0, write records to JSON Lines files every this many events instead of holding them in memory''')
+    parser.add_argument('--timing_report', default=None, type=str, \
+                        help='''If given, time the processing stages and write the timing report to this JSON file''')
+    parser.add_argument('-p', '--prefetch', default=1, type=int, \
+                        help='''Number of spills read ahead by a background thread (0 to read in the main thread); memory grows with it by about one selected spill each''')
+    parser.add_argument('-n', '--n_files_processed', default=10, type=int, \
+                        help='''Process only the first n files of the sorted file list (before selecting a --shard)''')
+    parser.add_argument('-s', '--shard', default=None, type=result_shards.parse_shard, \
+                        help='''Process only batch shard i/N (0 <= i < N) of the sorted file list; combine the shards with merge_shards.py''')
+    parser.add_argument('-b', '--block_size', default=file_parsing.default_block_size, type=int, \
+                        help='''Largest read of a dataset held in memory [bytes] (default: 256 MiB); smaller blocks lower peak memory at the cost of more reads''')
     args = parser.parse_args()
     main(**vars(args))
@@ -9,22 +9,26 @@ import h5py
 import argparse
 import numpy as np
 import glob
-import os
 import dirt_backgrounds
 import sys
 sys.path.append('../../common')
 import file_parsing
+import record_sinks
+import result_shards
+import table_columns
+import pot_accounting
+import stage_timing
 import geometry_methods as geo_methods
-import particlePDG_defs as pdg_defs
-import truth_methods as truth
 sys.path.append('../plotting')
 from plot_dirt_background import plot_dirt_backgrounds
 
     
-def main(sim_dir, input_type):
+def main(sim_dir, input_type, n_files_processed=9, output_format='json', flush_every=0, workers=1, timing_report=None, shard=None, block_size=file_parsing.default_block_size):
+    if timing_report is not None: stage_timing.enable()
  
     #sim_h5 = h5py.File(sim_file,'r')
-    dirt_muon_dict = dict()
+    suffix = result_shards.batch_shard_suffix(shard) # output names of a batch shard
+    dirt_muon_dict = record_sinks.open_output_dict("dirt_muon_dict"+suffix, flush_every)
     file_count =0
 
     file_ext = '' ## Changes based on input type
@@ -35,42 +39,44 @@ def main(sim_dir, input_type):
         file_ext = '.EDEPSIM.h5'
     
     #print('start')
-    files = glob.glob(sim_dir+'/*'+file_ext)
-    files.sort(key=os.path.getctime)
+    # Sort files so that merged batch shards give the same output as a single job
+    files = sorted(glob.glob(sim_dir+'/*'+file_ext))[:n_files_processed]
+    files = result_shards.batch_shard_files(files, shard)
     #print("Files:",files)
     
     for sim_file in files:
         file_count+=1
-        if file_count ==10:
-            print('search aborted, File count: ', file_count)
-            break
         
         sim_h5 = h5py.File(sim_file, 'r')
         print('Openning new file: ', sim_file)
         #file_parsing.print_keys_attributes(sim_h5)    
         print('file count: ', file_count)
         ### partition file by spill
-        unique_spill = np.unique(sim_h5['trajectories']['eventID']) #spillID
-        for spill_id in unique_spill:
+        for spill_id, ghdr, gstack, traj, vert, seg in file_parsing.iterate_spills(sim_h5, input_type, block_size):
 
-            ghdr, gstack, traj, vert, seg = file_parsing.get_spill_data(sim_h5, spill_id, input_type)
+            with stage_timing.timed('spill partitioning'):
+                ### group GENIE and trajectory records by vertex ID once per spill
+                ghdr = file_parsing.group_by_vertex(ghdr)
+                traj = file_parsing.group_by_vertex(traj)
 
             ### partition by vertex ID within beam spill
-            for v_i in range(len(vert['vertexID'])):
-                vert_pos= [vert['x_vert'][v_i], vert['y_vert'][v_i], vert['z_vert'][v_i]]
-                vert_in_active_LAr = geo_methods.fiducialized_vertex( vert_pos )
+            with stage_timing.timed('vertex selection: active volume'):
+                vert_pos = np.column_stack((vert['x_vert'], vert['y_vert'], vert['z_vert']))
+                vert_in_active_LAr = geo_methods.fiducialized_vertices(vert_pos) # Check vertex locations relative to FV
+            for v_i in range(len(vert['vertex_id'])):
                 #print(vert_pos)
                 
                 ##### REQUIRE neutrino vertex out of LAr active volume #####
-                if vert_in_active_LAr==True: continue
+                if vert_in_active_LAr[v_i]==True: continue
 
-                vert_id = vert['vertexID'][v_i]
+                vert_id = vert['vertex_id'][v_i]
 
                 #nu_mu_bar = pdg_defs.signal_nu_pdg(ghdr, vert_id)
                 #is_cc = truth.signal_cc(ghdr, vert_id)
                 #pionless = truth.signal_meson_status(gstack, vert_id)
                 
-                fv_particle_origin=geo_methods.fiducialized_particle_origin(traj, vert_id)
+                with stage_timing.timed('vertex selection: background definition'):
+                    fv_particle_origin=geo_methods.fiducialized_particle_origin(traj, vert_id)
 
                 ##### Dirt Muon BACKGROUNDS #####
                 ##### REQUIRE: (A) nu_mu_bar, (B) CC, (C) pions present, (D) final state particle start point in FV
@@ -83,11 +89,21 @@ def main(sim_dir, input_type):
         #end spill loop
     #end of file loop
 
-    plot_dirt_backgrounds(dirt_muon_dict,1) #plotting
+    pot = pot_accounting.files_pot_record(files) # POT of the files processed, saved with the table
+    dirt_muon_dict = record_sinks.close_output_dict(dirt_muon_dict, "dirt_muon_dict"+suffix, output_format, pot)
+    if flush_every>0: dirt_muon_dict = table_columns.columns_to_dict(dirt_muon_dict) # returned as columns; the plots read records
 
-    file_parsing.save_dict_to_json(dirt_muon_dict, "dirt_muon_dict", True)
+    # A batch shard records its files and tables; plots are made after merging (merge_shards.py)
+    if shard is not None:
+        result_shards.save_batch_record('dirt_background_kinematics', shard, input_type, pot, \
+                                       dict(dirt_muon_dict=record_sinks.table_file_name("dirt_muon_dict"+suffix, output_format)))
+    else:
+        with stage_timing.timed('plotting'):
+            plot_dirt_backgrounds(dirt_muon_dict,1,workers) #plotting
 
     print (dirt_muon_dict)
+
+    if timing_report is not None: stage_timing.save_report(timing_report)
     
     #end
     
@@ -96,5 +112,19 @@ if __name__=='__main__':
     parser.add_argument('-d', '--sim_dir', default=None, type = str, help = ''' string path to the directory of simulation files ''' )
     #parser.add_argument('-f', '--sim_file', default=None, type=str, help='''string corresponding to the path of the edep-sim ouput simulation file to be considered''')
     parser.add_argument('-t', '--input_type', default='edep', choices=['edep', 'larnd'], type=str, help='''string corresponding to the output file type: edep or larnd''')
+    parser.add_argument('-o', '--output_format', default='json', choices=['json', 'npz'], type=str, \
+                        help='''Output dictionary file format: indented JSON or columnar NumPy .npz''')
+    parser.add_argument('-f', '--flush_every', default=0, type=int, \
+                        help='''If > 0, write records to JSON Lines files every this many events instead of holding them in memory''')
+    parser.add_argument('-w', '--workers', default=1, type=int, \
+                        help='''Number of worker processes used to draw plots''')
+    parser.add_argument('--timing_report', default=None, type=str, \
+                        help='''If given, time the processing stages and write the timing report to this JSON file''')
+    parser.add_argument('-n', '--n_files_processed', default=9, type=int, \
+                        help='''Process only the first n files of the sorted file list (before selecting a --shard)''')
+    parser.add_argument('-s', '--shard', default=None, type=result_shards.parse_shard, \
+                        help='''Process only batch shard i/N (0 <= i < N) of the sorted file list; combine the shards with merge_shards.py''')
+    parser.add_argument('-b', '--block_size', default=file_parsing.default_block_size, type=int, \
+                        help='''Largest read of a dataset held in memory [bytes] (default: 256 MiB); smaller blocks lower peak memory at the cost of more reads''')
     args = parser.parse_args()
     main(**vars(args))
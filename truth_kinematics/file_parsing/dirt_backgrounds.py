@@ -8,27 +8,28 @@
 import numpy as np
 import sys
 sys.path.append('../../common')
+import file_parsing
 import geometry_methods as geo_methods
+import stage_timing
 
+@stage_timing.timed_function('characterization: dirt')
 def dirt_muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, dirt_dict):
 
-    traj_vert_mask = traj['vertexID']==vert_id
-    final_states = traj[traj_vert_mask]
-
-    ghdr_vert_mask = ghdr['vertexID']==vert_id
-    truth_level_summ = ghdr[ghdr_vert_mask]
+    final_states = file_parsing.vertex_records(traj, vert_id)
+    truth_level_summ = file_parsing.vertex_records(ghdr, vert_id)
 
 
     total_edep=0.; contained_edep=0.; total_length=0.; contained_length=0.
     
 
-    #print("PDG IDs of F.S. Particles:", final_states['pdgId'])
-    #gstack_vert_mask = gstack['vertexID']==vert_id
-    #gstack_pdg_set = set(gstack[gstack_vert_mask]['part_pdg'])
+    #print("PDG IDs of F.S. Particles:", final_states['pdg_id'])
+    #gstack_vert = file_parsing.vertex_records(gstack, vert_id)
+    #gstack_pdg_set = set(gstack_vert['part_pdg'])
     #print("Event PDG Stack:", gstack_pdg_set)
     
-    for fs in final_states:
-        if fs['pdgId'] not in [13, -13]: continue # [111,211,-211]: continue
+    fv_start = geo_methods.fiducialized_vertices(final_states['xyz_start']) # start point in FV, for all trajectories at once
+    for i_fs, fs in enumerate(final_states):
+        if fs['pdg_id'] not in [13, -13]: continue # [111,211,-211]: continue
 
         #cut on mu length
         if np.linalg.norm(np.subtract(fs['xyz_end'],fs['xyz_start']))< 10: continue
@@ -36,31 +37,25 @@ def dirt_muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg,
         ##place a cut for backgrounds
         #print('muon start point', fs['xyz_start'])
         #print('muon end point', fs['xyz_end'])
-        if( geo_methods.fiducialized_vertex(fs['xyz_start'])):
-            mu_length = np.linalg.norm(np.subtract(fs['xyz_end'],fs['xyz_start']))
-            #print('This is a dirt background')
-            #print('Neutrino vertex: ', truth_level_summ['vertex'])
-            #print('muon start point: ', fs['xyz_start'])
-            #print('muon end point: ', fs['xyz_end'])
-        else:
+        if not fv_start[i_fs]:
             #print('started out of FV')
             continue
 
-        pdg = fs['pdgId'] # *** pdg ***
+        pdg = fs['pdg_id'] # *** pdg ***
         
-        parent_id = fs['parentID']
-        parent = final_states['trackID']==parent_id
-
-        #parent_pdg = final_states[parent]['pdgId'] # *** parent pdg ***
+        parent_id = fs['parent_id']
+        parent = final_states['traj_id']==parent_id
 
         if parent_id ==-1:
             print('mu parent was a neutrino')
-            ghdr_mask = ghdr['vertexID']=fs['vertexID']
-            parent_pdg = ghdr[ghdr_mask]['nu_pdg']
+            parent_pdg = truth_level_summ['nu_pdg']
             parent_pdg = parent_pdg.tolist()[0]
 
         else: ##probably a meson
-            parent_pdg = final_states[parent]['pdgId'] # *** parent pdg ***
+            if not np.any(parent): # parent not among the trajectories of the vertex: no parent PDG to record
+                print('mu parent ', parent_id, ' not found in vertex ', vert_id, '; muon skipped')
+                continue
+            parent_pdg = final_states[parent]['pdg_id'] # *** parent pdg ***
             parent_pdg = parent_pdg.tolist()[0]
             parent_true_length= np.linalg.norm(np.subtract(final_states[parent]['xyz_end'],final_states[parent]['xyz_start']))
             if parent_true_length>3: continue
@@ -71,14 +66,17 @@ def dirt_muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg,
             print('parent start E: ',final_states[parent]['E_start'])
             print('parent length [cm]: ', parent_true_length)
             #check grandparent                                                     
-            grandparent_id = final_states[parent]['parentID']
+            grandparent_id = final_states[parent]['parent_id'][0]
 
             if grandparent_id ==-1:
                 print('mu grandparent was a nutrino')
                 continue
             else:
-               grandparent_mask = final_states['trackID']==grandparent_id
-               grandparent_pdg = final_states[grandparent_mask]['pdgId']
+               grandparent_mask = final_states['traj_id']==grandparent_id
+               if not np.any(grandparent_mask):
+                   print('mu grandparent ', grandparent_id, ' not found in vertex ', vert_id, '; muon skipped')
+                   continue
+               grandparent_pdg = final_states[grandparent_mask]['pdg_id']
                grandparent_pdg = grandparent_pdg.tolist()[0]
                print('mu grandparent pdg:', grandparent_pdg)
                grandparent_length = np.linalg.norm(np.subtract(final_states[grandparent_mask]['xyz_end'],final_states[grandparent_mask]['xyz_start']))
@@ -89,9 +87,12 @@ def dirt_muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg,
                    print('mu grandparent length: ', grandparent_length)
                    if grandparent_length>3: continue
                    print('need to check higher up in the family')
-                   if final_states[grandparent_mask]['parentID'] == -1: continue
-                   grandparent_mask = final_states['trackID']= final_states[grandparent_mask]['parentID']
-                   grandparent_pdg = final_states[grandparent_mask]['pdgId']
+                   if final_states[grandparent_mask]['parent_id'][0] == -1: continue
+                   grandparent_mask = final_states['traj_id']==final_states[grandparent_mask]['parent_id'][0]
+                   if not np.any(grandparent_mask):
+                       print('mu grandparent2 not found in vertex ', vert_id, '; muon skipped')
+                       continue
+                   grandparent_pdg = final_states[grandparent_mask]['pdg_id']
                    grandparent_pdg = grandparent_pdg.tolist()[0]
                    print('mu grandparent2 pdg:', grandparent_pdg)
                    grandparent_length = np.linalg.norm(np.subtract(final_states[grandparent_mask]['xyz_end'],final_states[grandparent_mask]['xyz_start']))
@@ -102,30 +103,22 @@ def dirt_muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg,
                        print('still check higher up')
 
 
-        track_id = fs['trackID']
+        track_id = fs['traj_id']
         total_edep=0.; contained_edep=0.; total_length=0.; contained_length=0.
 
         #### checking dirt muons
         if abs(pdg)==13:
-            seg_id_mask = seg['trackID']==track_id
+            seg_id_mask = seg['traj_id']==track_id
             total_edep = sum(seg[seg_id_mask]['dE']) # *** total visible energy ***
-            contained_edep = 0
-            contained_length = 0
-            
-            for sg in seg[seg_id_mask]:
-                total_length+=np.sqrt((sg['x_start']-sg['x_end'])**2+
-                                      (sg['y_start']-sg['y_end'])**2+
-                                      (sg['z_start']-sg['z_end'])**2) # *** total length *** This is not correct
-
-            for sg in seg[seg_id_mask]:
-                if geo_methods.fiducialized_vertex( [(sg['x_start']+sg['x_end'])/2.,
-                                         (sg['y_start']+sg['y_end'])/2.,
-                                         (sg['z_start']+sg['z_end'])/2.] ):
-                    contained_edep+=sg['dE'] # *** contained visible energy ***
+            mu_seg = seg[seg_id_mask]
+            seg_length = np.sqrt((mu_seg['x_start']-mu_seg['x_end'])**2+
+                                 (mu_seg['y_start']-mu_seg['y_end'])**2+
+                                 (mu_seg['z_start']-mu_seg['z_end'])**2)
+            total_length = float(np.sum(seg_length, dtype=float)) # *** total length *** This is not correct
 
-                    contained_length+=np.sqrt((sg['x_start']-sg['x_end'])**2+
-                                              (sg['y_start']-sg['y_end'])**2+
-                                              (sg['z_start']-sg['z_end'])**2) # *** contained length ***
+            fv_mask = geo_methods.fiducialized_vertices(geo_methods.segment_midpoints(mu_seg))
+            contained_edep = float(np.sum(mu_seg['dE'][fv_mask], dtype=float)) # *** contained visible energy ***
+            contained_length = float(np.sum(seg_length[fv_mask], dtype=float)) # *** contained length ***
 
         if contained_edep>5:
             print(pdg,'\t',parent_pdg,'\t',total_edep,' MeV\t',contained_edep,' MeV\t', total_length,' cm\t',contained_length,' cm')
@@ -133,16 +126,16 @@ def dirt_muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg,
 
             dirt_dict[(spill_id,vert_id, track_id)]=dict(
                 pdg=int(pdg),
-                parent_pdg=parent_pdg,
-                total_edep=total_edep,
-                contained_edep=contained_edep,
-                total_length=total_length,
-                contained_length=contained_length,
-                true_mom=truth_level_summ['lep_mom'],
-                true_angle= truth_level_summ['lep_ang'],
-                true_energy=truth_level_summ['Elep'],
-                nu_energy=truth_level_summ['Enu'],
-                q_sq = truth_level_summ['Q2'])
+                parent_pdg=int(parent_pdg),
+                total_edep=float(total_edep),
+                contained_edep=float(contained_edep),
+                total_length=float(total_length),
+                contained_length=float(contained_length),
+                true_mom=float(truth_level_summ['lep_mom'][0]),
+                true_angle=float(truth_level_summ['lep_ang'][0]),
+                true_energy=float(truth_level_summ['Elep'][0]),
+                nu_energy=float(truth_level_summ['Enu'][0]),
+                q_sq=float(truth_level_summ['Q2'][0]))
             
             ## end if
     return
@@ -0,0 +1,95 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Script to merge the outputs of batch shards of a production   ##
+##              (drivers run with --shard i/N): combines the tables of the    ##
+##              shards in shard order with the POT record of the files the    ##
+##              shards processed, rescales to it and optionally makes plots.  ##
+##                                                                            ##
+################################################################################
+
+import argparse
+import json
+import os
+import sys
+sys.path.append('../../common')
+import file_parsing
+import record_sinks
+import result_shards
+import pot_accounting
+sys.path.append('../plotting')
+
+
+# Records (see result_shards.save_batch_record) of the shards of one driver,
+# sorted by shard, with table file names resolved relative to each record
+def load_records(record_files):
+    records = []
+    for record_file in record_files:
+        with open(record_file) as infile: record = json.load(infile)
+        record_dir = os.path.dirname(os.path.abspath(record_file))
+        record['tables'] = {name: os.path.join(record_dir, table) for name, table in record['tables'].items()}
+        records.append(record)
+
+    if len(set(record['driver'] for record in records))!=1: raise ValueError('records of different drivers: '+str(record_files))
+    if len(set(record['shard'][1] for record in records))!=1: raise ValueError('records of different numbers of shards')
+    records.sort(key=lambda record: record['shard'][0])
+    shards = [record['shard'][0] for record in records]
+    if len(set(shards))!=len(shards): raise ValueError('shard merged twice: '+str(shards))
+
+    missing = sorted(set(range(records[0]['shard'][1]))-set(shards))
+    if missing: print('WARNING: missing shards ', missing, '; scaling to the files of the merged shards only')
+    return records
+
+
+# Tables of the shards merged in shard order (i.e. in file order), with keys as
+# strings, e.g. "spill-vertex"
+def merge_tables(records):
+    tables = dict()
+    for name in records[0]['tables'].keys():
+        tables[name] = dict()
+        for record in records: tables[name].update(file_parsing.load_dict(record['tables'][name]))
+    return tables
+
+
+
+def main(records, output_format='json', plot=False, workers=1):
+    records = load_records(records)
+    driver = records[0]['driver']
+    tables = merge_tables(records)
+
+    # POT of the files the merged shards processed (a file processed by more than one shard is an error)
+    pot = pot_accounting.merge_pot_records([pot_accounting.pot_record(record['file_pots']) for record in records])
+    scale_factor = pot_accounting.scale_factor(pot['pot'])
+    for name, d in tables.items(): file_parsing.save_dict(d, name, False, output_format, pot)
+
+    merged = dict(driver=driver, shards=[record['shard'] for record in records], input_type=records[0]['input_type'],
+                  files=list(pot['files']), n_files=pot['n_files'], pot=pot['pot'], scale_factor=scale_factor,
+                  tables={name: record_sinks.table_file_name(name, output_format) for name in tables})
+    result_shards.write_json_atomic(merged, driver+'_merged.json')
+    print('Merged ', len(records), ' shards of ', driver, ': ', pot['n_files'], ' files, ', pot['pot'], ' POT, scale factor ', scale_factor)
+
+    if driver=='signal_kinematics':
+        from signal_kinematics import save_signal_counts
+        save_signal_counts(tables['signal_dict'], pot, scale_factor)
+        if plot:
+            from plot_signal_muons import plot_muons
+            from plot_signal_hadrons import plot_hadrons
+            plot_muons(tables['muon_dict'], scale_factor, sig_bkg = 0, workers = workers)
+            plot_hadrons(tables['hadron_dict'], scale_factor, sig_bkg = 0, workers = workers)
+    elif driver=='dirt_background_kinematics' and plot:
+        from plot_dirt_background import plot_dirt_backgrounds
+        plot_dirt_backgrounds(tables['dirt_muon_dict'], 1, workers)
+
+
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-r', '--records', default=None, required=True, nargs='+', type=str, \
+                        help='''Shard record JSON files written by one driver run with --shard i/N, e.g. signal_kinematics_shard*of*.json''')
+    parser.add_argument('-o', '--output_format', default='json', choices=['json', 'npz'], type=str, \
+                        help='''Output dictionary file format: indented JSON or columnar NumPy .npz''')
+    parser.add_argument('-p', '--plot', action='store_true', \
+                        help='''Make the plots of the driver from the merged tables (signal and dirt backgrounds)''')
+    parser.add_argument('-w', '--workers', default=1, type=int, \
+                        help='''Number of worker processes used to draw plots''')
+    args = parser.parse_args()
+    main(**vars(args))
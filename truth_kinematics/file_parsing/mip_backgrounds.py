@@ -12,29 +12,27 @@ import matplotlib.pyplot as plt
 import numpy as np
 import sys
 sys.path.append('../../common')
-import truth_methods as truth
+import file_parsing
 import singleParticleAssociation_methods as particle_assoc
 import kinematicVariable_methods as kinematics
+import stage_timing
 
 
+@stage_timing.timed_function('characterization: primaries')
 def primaries(spill_id, vert_id, ghdr, gstack, traj, vert, seg, primary_dict):
-    traj_mask=traj['vertexID']==vert_id
-    final_states=traj[traj_mask]
+    final_states=file_parsing.vertex_records(traj, vert_id)
+    traj_graph=particle_assoc.trajectory_graph(final_states, traj, ghdr)
+    chains=particle_assoc.same_pdg_chains(traj_graph)
 
-    track_ids_seen=set()
-    for fs in final_states:
-        if fs['parentID']!=-1: continue
+    for chain in np.argsort(chains['head'], kind='stable'): # primaries are chain heads
+        fs=final_states[chains['head'][chain]]
+        if fs['parent_id']!=-1: continue
         
-        pdg = fs['pdgId']
+        pdg = fs['pdg_id']
         if pdg in [111, 211, -211]: continue
 
-        track_id = fs['trackID']
-        if track_id in track_ids_seen: continue
-
-        track_id_set = particle_assoc.same_pdg_connected_trajectories(pdg, track_id, \
-                                                                 final_states, \
-                                                                 traj, ghdr)
-        track_ids_seen.update(track_id_set)
+        track_id = fs['traj_id']
+        track_id_set = particle_assoc.chain_traj_ids(chains, traj_graph, chain)
 
         total_edep, contained_edep, total_length, contained_length=[0. for i in range(4)]
         for tis in track_id_set:
@@ -54,35 +52,32 @@ def primaries(spill_id, vert_id, ghdr, gstack, traj, vert, seg, primary_dict):
 
 
 
+@stage_timing.timed_function('characterization: pion')
 def pion_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, pion_dict):
-    traj_vert_mask = traj['vertexID']==vert_id
-    final_states = traj[traj_vert_mask]
-
-    ghdr_mask=ghdr['vertexID']==vert_id
-    nu_energy=ghdr[ghdr_mask]['Enu']
-    q2=ghdr[ghdr_mask]['Q2']
-    mom=ghdr[ghdr_mask]['lep_mom']
-    ang=ghdr[ghdr_mask]['lep_ang']
+    final_states = file_parsing.vertex_records(traj, vert_id)
+    traj_graph=particle_assoc.trajectory_graph(final_states, traj, ghdr)
+    chains=particle_assoc.same_pdg_chains(traj_graph)
+
+    ghdr_vert=file_parsing.vertex_records(ghdr, vert_id)
+    nu_energy=ghdr_vert['Enu']
+    q2=ghdr_vert['Q2']
+    mom=ghdr_vert['lep_mom']
+    ang=ghdr_vert['lep_ang']
     
-    vtx_mask = vert['vertexID']==vert_id
+    vtx_mask = vert['vertex_id']==vert_id
     vtx_x=vert[vtx_mask]['x_vert']
     vtx_y=vert[vtx_mask]['y_vert']
     vtx_z=vert[vtx_mask]['z_vert']
 
-    track_ids_seen=set()
-    for fs in final_states:
-        pdg = fs['pdgId']
+    for chain in range(len(chains['head'])):
+        fs=final_states[chains['first_row'][chain]]
+        pdg = fs['pdg_id']
         if pdg not in [111,211,-211]: continue
         
-        track_id = fs['trackID']        
-        if track_id in track_ids_seen: continue
-        
-        track_id_set = particle_assoc.same_pdg_connected_trajectories(pdg, track_id, \
-                                                                 final_states, \
-                                                                 traj, ghdr)
-        track_ids_seen.update(track_id_set)
+        track_id = fs['traj_id']
+        track_id_set = particle_assoc.chain_traj_ids(chains, traj_graph, chain)
 
-        parent_pdg = truth.find_parent_pdg(fs['parentID'], fs['vertexID'], traj, ghdr)
+        parent_pdg = traj_graph['parent_pdg'][chains['first_row'][chain]]
 
         total_edep, contained_edep, total_length, contained_length=[0. for i in range(4)]
         for tis in track_id_set:
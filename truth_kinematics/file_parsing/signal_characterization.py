@@ -14,6 +14,8 @@ import particlePDG_defs as pdg_defs
 import truth_methods as truth
 import singleParticleAssociation_methods as particle_assoc
 import kinematicVariable_methods as kinematics
+import file_parsing
+import stage_timing
 import numpy as np
 
 ''' TO DO: Add other hadron mult over threshold? '''
@@ -25,8 +27,8 @@ characterizing certain backgrounds as well.
 
 INCLUDED METHODS:
  - get_truth_dict(spill_id, vert_id, ghdr, gstack, traj, seg, signal_dict)
- - muon_characterization(spill_id, vert_id, ghdr, gstack, traj, seg, muon_dict)
- - hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, seg, hadron_dict)
+ - muon_characterization(spill_id, vert_id, ghdr, gstack, traj, seg, muon_dict, traj_graph=None)
+ - hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, seg, hadron_dict, traj_graph=None)
  '''
 
 
@@ -38,10 +40,10 @@ INCLUDED METHODS:
              empty Python dictionary (DICT)
     Outputs: Nothing returned, but signal_dict (DICT) is full after
              method runs'''
+@stage_timing.timed_function('characterization: truth dict')
 def get_truth_dict(spill_id, vert_id, ghdr, gstack, traj, vert, seg, signal_dict):
 
-    ghdr_vert_mask = ghdr['vertex_id']==vert_id
-    truth_level_summ = ghdr[ghdr_vert_mask]
+    truth_level_summ = file_parsing.vertex_records(ghdr, vert_id)
 
     mom = truth_level_summ['lep_mom'] # Truth-level outgoing muon momentum
     ang = truth_level_summ['lep_ang'] *np.pi / 180. # Truth-level muon angle with beam
@@ -68,16 +70,17 @@ def get_truth_dict(spill_id, vert_id, ghdr, gstack, traj, vert, seg, signal_dict
     Inputs : Spill ID (INT), Vertex ID (INT), genie_hdr dataset (HDF5 DATASET), 
              genie_stack dataset (HDF5 DATASET), edep-sim trajectories dataset (HDF5 DATASET), 
              vertex dataset (HDF5 DATASET), edep-sim segements dataset (HDF5 DATASET), 
-             empty Python dictionary (DICT)
+             empty Python dictionary (DICT), trajectory graph of the vertex (DICT, 
+             optional; built if not given, see particle_assoc.trajectory_graph)
     Outputs: Nothing returned, but muon_dict (DICT) is full after
              method runs'''
-def muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, muon_dict):
+@stage_timing.timed_function('characterization: muon')
+def muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, muon_dict, traj_graph=None):
 
-    traj_vert_mask = traj['vertex_id']==vert_id 
-    final_states = traj[traj_vert_mask] # Get trajectories associated with vertex
+    final_states = file_parsing.vertex_records(traj, vert_id) # Get trajectories associated with vertex
+    if traj_graph is None: traj_graph = particle_assoc.trajectory_graph(final_states, traj, ghdr) # Parent/child structure of vertex trajectories
 
-    ghdr_vert_mask = ghdr['vertex_id']==vert_id
-    truth_level_summ = ghdr[ghdr_vert_mask] # Get GENIE truth info associated with vertex
+    truth_level_summ = file_parsing.vertex_records(ghdr, vert_id) # Get GENIE truth info associated with vertex
 
     mom = truth_level_summ['lep_mom'] # Truth-level outgoing muon momentum
     ang = truth_level_summ['lep_ang'] *np.pi / 180. # Truth-level muon angle with beam
@@ -88,33 +91,27 @@ def muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, muon
 
     total_edep=0.; contained_edep=0.; total_length=0.; contained_length=0. # Set contained and total track energies and lengths to 0
 
-    gstack_vert_mask = gstack['vertex_id']==vert_id
-    gstack_pdg_set = set(gstack[gstack_vert_mask]['part_pdg']) # Get set of PDG IDs for particles associated with vertex
+    gstack_pdg_set = set(file_parsing.vertex_records(gstack, vert_id)['part_pdg']) # Get set of PDG IDs for particles associated with vertex
 
-    exclude_track_ids = set() # Create set of track IDs to exclude to eliminate redundancies
-                              # (i.e. if they've been identified as being from the same particle as an earlier track)
-    for fs in final_states:
+    chains = particle_assoc.same_pdg_chains(traj_graph) # Trajectories grouped by particle (same-PDG chains)
+    for chain in range(len(chains['head'])):
+        fs = final_states[chains['first_row'][chain]]
 
         # Choose nu_mu_bar or nu_mu vertices
         if (abs(fs['pdg_id']) != 13): continue
-        
-        track_id = fs['traj_id']
-        if track_id in exclude_track_ids: continue
 
         pdg = fs['pdg_id'] # *** pdg ***     
 
-        track_id_set = particle_assoc.same_pdg_connected_trajectories(pdg, track_id, final_states, traj, ghdr)
-        exclude_track_ids.update(track_id_set) # Exclude track IDs associated with same particle from future counting
+        track_id_set = particle_assoc.chain_traj_ids(chains, traj_graph, chain)
 
-        is_primary = truth.is_primary_particle(track_id_set, final_states, traj, ghdr) 
+        is_primary = truth.is_primary_particle(track_id_set, traj_graph, traj, ghdr) 
 
         if is_primary == False: continue # Only look at final state particles
 
-        track_id_at_vertex = particle_assoc.find_trajectory_at_vertex(track_id_set, final_states,traj, ghdr)
-        final_state_vertex_tid_mask = final_states['traj_id'] == track_id_at_vertex
-        fs_at_vertex = final_states[final_state_vertex_tid_mask]
+        track_id_at_vertex = particle_assoc.find_trajectory_at_vertex(track_id_set, traj_graph, traj, ghdr)
+        vertex_row = particle_assoc.graph_row(traj_graph, track_id_at_vertex) # Row of trajectory at vertex
 
-        parent_pdg = truth.find_parent_pdg(fs_at_vertex['parent_id'],vert_id, traj, ghdr)# *** parent pdg ***
+        parent_pdg = traj_graph['parent_pdg'][vertex_row] # *** parent pdg ***
 
         if len(track_id_set)>1:
             print("Length of Track ID Set:", len(track_id_set))
@@ -129,15 +126,9 @@ def muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, muon
         
         # Characterize Muon Endpoint/Containment
         if len(track_id_set)>1:
-            start_tid = particle_assoc.find_trajectory_at_vertex(track_id_set, final_states,traj, ghdr)
-            start_tid_mask = final_states['traj_id']==start_tid
-            muon_start_traj = final_states[start_tid_mask]
-            start_pt = muon_start_traj['xyz_start']
+            start_pt = final_states[vertex_row]['xyz_start']
             
-            end_tid = particle_assoc.find_forward_primary_particle_end_trajectory(track_id_set, final_states,traj, ghdr)
-            end_tid_mask = final_states['traj_id']==end_tid
-            muon_end_traj = final_states[end_tid_mask]
-            end_pt = muon_end_traj['xyz_end']
+            end_pt = final_states[chains['end'][chain]]['xyz_end'] # Forward-most trajectory of the muon
         else:
             end_pt = fs['xyz_end']
             start_pt = fs['xyz_start']
@@ -168,23 +159,23 @@ def muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, muon
     Inputs : Spill ID (INT), Vertex ID (INT), genie_hdr dataset (HDF5 DATASET), 
              genie_stack dataset (HDF5 DATASET), edep-sim trajectories dataset (HDF5 DATASET), 
              vertex dataset (HDF5 DATASET), edep-sim segements dataset (HDF5 DATASET), threshold length in cm (FLOAT)
-             empty Python dictionary (DICT)
+             empty Python dictionary (DICT), trajectory graph of the vertex (DICT, 
+             optional; built if not given, see particle_assoc.trajectory_graph)
     Outputs: Nothing returned, but hadron_dict (DICT) is full after
              method runs'''
-def hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, threshold, hadron_dict):
+@stage_timing.timed_function('characterization: hadron')
+def hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, threshold, hadron_dict, traj_graph=None):
         
     #print("\nHADRONS:")
-    traj_vert_mask = traj['vertex_id']==vert_id
-    final_states = traj[traj_vert_mask] # Trajectories associated with vertex
+    final_states = file_parsing.vertex_records(traj, vert_id) # Trajectories associated with vertex
+    if traj_graph is None: traj_graph = particle_assoc.trajectory_graph(final_states, traj, ghdr) # Parent/child structure of vertex trajectories
 
     leptons_abs_pdg = [11, 12, 13, 14, 15, 16] # List of lepton PDG IDs (abs value)
 
-    ghdr_vert_mask = ghdr['vertex_id']==vert_id
-    truth_level_summ = ghdr[ghdr_vert_mask] # Get GENIE truth info associated with vertex
+    truth_level_summ = file_parsing.vertex_records(ghdr, vert_id) # Get GENIE truth info associated with vertex
     nu_pdg = truth_level_summ['nu_pdg']
     
-    gstack_vert_mask = gstack['vertex_id']==vert_id
-    gstack_vert = gstack[gstack_vert_mask] # Particle ID information associated with vertex
+    gstack_vert = file_parsing.vertex_records(gstack, vert_id) # Particle ID information associated with vertex
 
     gstack_vert_fs_mask = gstack_vert['part_status']==1 # Excludes initial state particles
     gstack_vert_fs = gstack_vert[gstack_vert_fs_mask]['part_pdg'] # Final state particle PDG IDs
@@ -222,21 +213,15 @@ def hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, th
     hadron_mult_over_thresh = 0.; p_mult_over_thresh = 0.
     p_ke = 0.
 
-    exclude_track_ids = set() # Create set of track IDs to exclude to eliminate redundancies
-                              # (i.e. if they've been identified as being from the same particle as an earlier track)
-    for fs in final_states:
+    chains = particle_assoc.same_pdg_chains(traj_graph) # Trajectories grouped by particle (same-PDG chains)
+    for chain in range(len(chains['head'])):
+        fs = final_states[chains['first_row'][chain]]
 
         if abs(fs['pdg_id']) in leptons_abs_pdg: continue # No leptons
         if fs['pdg_id'] > 1000000000: continue # No nuclei
         if fs['pdg_id'] == 22: continue # No photons
-        
-        track_id = fs['traj_id']
-        if track_id in exclude_track_ids: 
-            #print("Excluding a track because it has already been studied.")
-            continue 
 
-        track_id_set = particle_assoc.same_pdg_connected_trajectories(fs['pdg_id'], track_id, final_states, traj, ghdr)
-        exclude_track_ids.update(track_id_set) # Exclude track IDs associated with same particle from future counting
+        track_id_set = particle_assoc.chain_traj_ids(chains, traj_graph, chain)
         #if fs['pdg_id'] == 2112: print("\nTrack ID Set:", track_id_set)
 
         proton_contained_length = 0.; proton_total_length=0. # Reset proton track lengths
@@ -257,14 +242,14 @@ def hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, th
                 proton_contained_length+=kinematics.fv_edep_charged_length(tid, traj, seg) # *** total contained length for protons ***
                 proton_total_length+=kinematics.total_edep_charged_length(tid, traj, seg)
 
-        if truth.is_primary_particle(track_id_set, final_states, traj, ghdr) and contained_length > threshold \
+        if truth.is_primary_particle(track_id_set, traj_graph, traj, ghdr) and contained_length > threshold \
             and fs['pdg_id'] not in pdg_defs.neutral_hadron_pdg_dict.keys():
             hadron_mult_over_thresh +=1
             if fs['pdg_id'] == 2212: 
                 p_mult_over_thresh += 1
-                p_traj_id_at_vertex = particle_assoc.find_trajectory_at_vertex(track_id_set, final_states, traj, ghdr)
-                p_mom = kinematics.truth_primary_particle_momentum(track_id_set, final_states, traj, ghdr)
-                p_ke += kinematics.truth_primary_particle_kinetic_energy(fs['pdg_id'],track_id_set, final_states, traj, ghdr)
+                p_traj_id_at_vertex = particle_assoc.find_trajectory_at_vertex(track_id_set, traj_graph, traj, ghdr)
+                p_mom = kinematics.truth_primary_particle_momentum(track_id_set, traj_graph, traj, ghdr)
+                p_ke += kinematics.truth_primary_particle_kinetic_energy(fs['pdg_id'],track_id_set, traj_graph, traj, ghdr)
                 total_edep_over_thresh += fs_total_edep # *** total visible energy ***
                 contained_edep_over_thresh+= fs_contained_edep
                 if p_mom > lead_proton_momentum:
@@ -274,11 +259,11 @@ def hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, th
 
                     lead_proton_traj_at_vertex = p_traj_id_at_vertex
                     lead_proton_momentum = p_mom
-                    lead_proton_ang_wrt_beam = kinematics.angle_wrt_beam_direction(track_id_set, final_states, traj, ghdr)
+                    lead_proton_ang_wrt_beam = kinematics.angle_wrt_beam_direction(track_id_set, traj_graph, traj, ghdr)
                 elif p_mom <= lead_proton_momentum and p_mom > sub_lead_proton_momentum:
                     sub_lead_proton_traj_at_vertex = p_traj_id_at_vertex
                     sub_lead_proton_momentum = p_mom
-                    sub_lead_proton_ang_wrt_beam = kinematics.angle_wrt_beam_direction(track_id_set, final_states, traj, ghdr)
+                    sub_lead_proton_ang_wrt_beam = kinematics.angle_wrt_beam_direction(track_id_set, traj_graph, traj, ghdr)
                 
                 if proton_contained_length > max_proton_contained_length:
                     max_proton_contained_length = proton_contained_length # Update max contained proton length in vertex
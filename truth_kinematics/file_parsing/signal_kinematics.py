@@ -7,103 +7,185 @@
 ##                                                                            ##
 ################################################################################
 
-import h5py, glob, argparse
-import numpy as np
+import glob, argparse, os
+import multiprocessing
+from functools import partial
 import sys
 import signal_characterization as sig_char
 sys.path.append('../../common')
 import file_parsing
-import geometry_methods as geo_methods
+import record_sinks
+import result_shards
+import table_columns
+import pot_accounting
+import stage_timing
 import truth_methods as truth
 import kinematicVariable_methods as kinematics
+import singleParticleAssociation_methods as particle_assoc
 sys.path.append('../plotting')
 from plot_signal_muons import plot_muons
 from plot_signal_hadrons import plot_hadrons
 
-def main(sim_dir, input_type, n_files_processed):
+# Spills of a file with vertices passing the truth-level signal cuts, read one
+# at a time (in reads of at most block_size bytes per dataset); only their
+# trajectories and segments are read
+def read_file(sim_file, input_type, block_size=file_parsing.default_block_size):
+    return file_parsing.selected_spills(sim_file, input_type, truth.signal_truth_selection, truth.fv_particle_origin, \
+                                             fields=file_parsing.analysis_fields, block_size=block_size)
 
-    test_count = 0
 
-    ### NOTE: Current POT scaling is based on MiniRun4 larnd file situation
-    if int(n_files_processed) < 1024.: 
-        scale_factor = (1./(int(n_files_processed)/1024.))*2.5
-    else:
-        scale_factor = 2.5
+def process_file(sim_file, input_type, block_size=file_parsing.default_block_size):
+    return process_spills(read_file(sim_file, input_type, block_size))
+
+
+def process_spills(spills):
 
     muon_dict = dict() # Initialize muon dictionary
     hadron_dict = dict() # Initialize hadron dictionary
-
-    # Dictionaries for combining with other background explorations
     signal_dict = dict() # Initialize dictionary for signal muons for full comparison
-    
-    file_ext = '' ## Changes based on input type
-    event_spill_id = '' ## Changes based on input type
 
-    if input_type == 'larnd': 
-        file_ext = '.LARNDSIM.h5'
-        event_spill_id = 'event_id' #new for MiniRun 4
-    elif input_type == 'edep':
-        file_ext = '.EDEPSIM.h5'
-        event_spill_id = 'event_id' #new for MiniRun 4
+    ### partition file by spill
+    for spill_id, ghdr, gstack, traj, vert, seg in spills:
+
+        with stage_timing.timed('spill partitioning'):
+            ### group GENIE and trajectory records by vertex ID once per spill
+            ghdr = file_parsing.group_by_vertex(ghdr)
+            gstack = file_parsing.group_by_vertex(gstack)
+            traj = file_parsing.group_by_vertex(traj)
+            traj.update(truth.trajectory_origin(traj, ghdr)) # parent PDG ID and primary flag per trajectory
+
+            ### per-trajectory segment energy and length sums, once per spill
+            seg = kinematics.track_summary(seg)
+
+        ### REQUIRE: (A) neutrino vertex in LAr active volume, (B) nu_mu(_bar), (C) CC interaction,
+        ### (D) NO final state mesons, (E) final state particle start point in FV
+        ### evaluated for all vertices of the spill at once; only candidates are characterized
+        with stage_timing.timed('vertex selection'):
+            signal_vert_ids = truth.signal_vertices(vert, ghdr, gstack, traj)
 
-    for sim_file in glob.glob(sim_dir+'/*'+file_ext): # Loop over simulation files
+        for vert_id in signal_vert_ids:
+            ### parent/child structure of the vertex trajectories, shared by the muon and hadron characterization
+            with stage_timing.timed('characterization: trajectory graph'):
+                traj_graph = particle_assoc.trajectory_graph(file_parsing.vertex_records(traj, vert_id), traj, ghdr)
+            sig_char.muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, muon_dict, traj_graph)
+            sig_char.hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, kinematics.threshold, hadron_dict, traj_graph)
+            sig_char.get_truth_dict(spill_id, vert_id, ghdr, gstack, traj, vert, seg, signal_dict)
 
-        if test_count ==int(n_files_processed) : break
-        test_count+=1
+    return signal_dict, muon_dict, hadron_dict
 
-        if (test_count % 5 == 0):
-            print("Processing file: ", str(test_count), "/", str(n_files_processed))
 
-        sim_h5 = h5py.File(sim_file,'r')
-        #print(sim_h5.keys(),'\n')
+# process_file, also returning the stage timings recorded while processing
+# (in a worker process, these are merged into the driver's)
+def process_file_timed(sim_file, input_type, block_size=file_parsing.default_block_size):
+    return process_file(sim_file, input_type, block_size), stage_timing.take_samples()
 
-        ### partition file by spill
-        unique_spill = np.unique(sim_h5['trajectories'][event_spill_id])
-        for spill_id in unique_spill:
 
-            ghdr, gstack, traj, vert, seg = file_parsing.get_spill_data(sim_h5, spill_id, input_type)
+def main(sim_dir, input_type, n_files_processed=None, workers=1, output_format='json', flush_every=0, shard_dir=None, timing_report=None, prefetch=1, shard=None, block_size=file_parsing.default_block_size):
 
-            ### partition by vertex ID within beam spill
-            #print("Number of unique vertices in spill:", len(vert['vertex_id']))
-            for v_i in range(len(vert['vertex_id'])):
+    if timing_report is not None: stage_timing.enable()
 
-                vert_pos= [vert['x_vert'][v_i], vert['y_vert'][v_i], vert['z_vert'][v_i]] 
-                vert_in_active_LAr = geo_methods.fiducialized_vertex( vert_pos ) # Check vertex location relative to FV
+    suffix = result_shards.batch_shard_suffix(shard) # output names of a batch shard
 
-                ##### REQUIRE: neutrino vertex in LAr active volume #####
-                if vert_in_active_LAr==False: 
-                    continue
+    muon_dict = record_sinks.open_output_dict("muon_dict"+suffix, flush_every) # Initialize muon dictionary
+    hadron_dict = record_sinks.open_output_dict("hadron_dict"+suffix, flush_every) # Initialize hadron dictionary
 
-                vert_id = vert['vertex_id'][v_i]
+    # Dictionaries for combining with other background explorations
+    signal_dict = record_sinks.open_output_dict("signal_dict"+suffix, flush_every) # Initialize dictionary for signal muons for full comparison
+    
+    file_ext = '' ## Changes based on input type
 
-                nu_mu = truth.signal_nu_pdg(ghdr, vert_id) # nu_mu OR nu_mu_bar
-                is_cc = truth.signal_cc(ghdr, vert_id)
-                mesonless = truth.signal_meson_status(gstack, vert_id)
-                fv_particle_origin=geo_methods.fiducialized_particle_origin(traj, vert_id)
+    if input_type == 'larnd': 
+        file_ext = '.LARNDSIM.h5'
+    elif input_type == 'edep':
+        file_ext = '.EDEPSIM.h5'
 
-                ### REQUIRE: (A) nu_mu(_bar), (B) CC interaction, (C) NO final state mesons, (D) final state particle start point in FV
-                if nu_mu==True and is_cc==True and mesonless==True and fv_particle_origin==True:
-                    sig_char.muon_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, muon_dict)
-                    sig_char.hadron_characterization(spill_id, vert_id, ghdr, gstack, traj, vert, seg, kinematics.threshold, hadron_dict)
-                    sig_char.get_truth_dict(spill_id, vert_id, ghdr, gstack, traj, vert, seg, signal_dict)
+    # Sort files so that the merged output does not depend on glob or worker ordering
+    sim_files = sorted(glob.glob(sim_dir+'/*'+file_ext))[:n_files_processed]
+    sim_files = result_shards.batch_shard_files(sim_files, shard)
+    n_files_processed = len(sim_files)
+
+    # POT of the files processed, saved with every table; event counts are scaled from it
+    pot = pot_accounting.files_pot_record(sim_files)
+    scale_factor = pot_accounting.scale_factor(pot['pot'])
+
+    # With a shard directory, files already processed (same content fingerprint)
+    # by an earlier, possibly interrupted, run are read back from their shards
+    files_to_process = sim_files
+    if shard_dir is not None:
+        os.makedirs(shard_dir, exist_ok=True)
+        manifest = result_shards.load_manifest(shard_dir)
+        fingerprints = {sim_file: result_shards.file_fingerprint(sim_file) for sim_file in sim_files}
+        files_to_process = [sim_file for sim_file in sim_files \
+                            if not result_shards.shard_done(manifest, sim_file, fingerprints[sim_file], shard_dir)]
+        print("Files already processed: ", str(len(sim_files)-len(files_to_process)), "/", str(n_files_processed))
+    pending = set(files_to_process)
+
+    # Each file is processed independently (in a pool of worker processes if workers > 1, 
+    # otherwise reading the next prefetch spills in a background thread); per-file 
+    # dictionaries are merged in file order
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, initializer=stage_timing.enable if stage_timing.enabled else None)
+        file_results = pool.imap(partial(process_file_timed, input_type=input_type, block_size=block_size), files_to_process)
+    else:
+        file_spills = file_parsing.prefetch_spills(files_to_process, partial(read_file, input_type=input_type, block_size=block_size), prefetch)
+        file_results = ((process_spills(spills), dict()) for sim_file, spills in file_spills)
 
-    # Save all Python dictionaries to JSON files
-    file_parsing.save_dict_to_json(signal_dict, "signal_dict", True)
-    file_parsing.save_dict_to_json(muon_dict, "muon_dict", True)
-    file_parsing.save_dict_to_json(hadron_dict, "hadron_dict", True)
+    test_count = 0
+    for sim_file in sim_files:
+
+        if sim_file not in pending:
+            file_signal_dict, file_muon_dict, file_hadron_dict = result_shards.load_shard(sim_file, shard_dir)
+        else:
+            (file_signal_dict, file_muon_dict, file_hadron_dict), file_timings = next(file_results)
+            stage_timing.merge_samples(file_timings)
+            if shard_dir is not None:
+                result_shards.save_shard([file_signal_dict, file_muon_dict, file_hadron_dict], \
+                                        sim_file, fingerprints[sim_file], manifest, shard_dir)
+            test_count += 1
+            if (test_count % 5 == 0):
+                print("Processing file: ", str(test_count), "/", str(len(files_to_process)))
+
+        signal_dict.update(file_signal_dict)
+        muon_dict.update(file_muon_dict)
+        hadron_dict.update(file_hadron_dict)
+
+    if pool is not None:
+        pool.close(); pool.join()
+
+    # Save all Python dictionaries to JSON (or NPZ) files
+    signal_dict = record_sinks.close_output_dict(signal_dict, "signal_dict"+suffix, output_format, pot)
+    muon_dict = record_sinks.close_output_dict(muon_dict, "muon_dict"+suffix, output_format, pot)
+    hadron_dict = record_sinks.close_output_dict(hadron_dict, "hadron_dict"+suffix, output_format, pot)
 
     # Save full signal and w.s. bkg counts to TXT file
-    signal_count = len(signal_dict)*scale_factor
-    outfile = open('signal_event_counts.txt', "w")
+    save_signal_counts(signal_dict, pot, scale_factor, 'signal_event_counts'+suffix+'.txt')
+
+    # A batch shard records its files and tables; plots are made after merging (merge_shards.py)
+    if shard is not None:
+        result_shards.save_batch_record('signal_kinematics', shard, input_type, pot, \
+                                       {name: record_sinks.table_file_name(name+suffix, output_format) \
+                                        for name in ['signal_dict', 'muon_dict', 'hadron_dict']})
+    else:
+        # PLOT: Signal Event Info      
+        with stage_timing.timed('plotting'):
+            plot_muons(muon_dict, scale_factor, sig_bkg = 0, workers = workers)
+            plot_hadrons(hadron_dict, scale_factor, sig_bkg = 0, workers = workers)
+
+    if timing_report is not None: stage_timing.save_report(timing_report)
+
+
+# Signal event count scaled to the target POT, with the files and POT (POT 
+# record pot, see pot_accounting) it was counted in
+def save_signal_counts(signal_dict, pot, scale_factor, file_name='signal_event_counts.txt'):
+    signal_count = table_columns.n_records(signal_dict)*scale_factor
+    outfile = open(file_name, "w")
     outfile.writelines(["Signal Events (scaled to 2.5e19 POT): "+str(signal_count)+"\n", \
-                        "Number of files used to get count: "+str(n_files_processed)+"\n", \
+                        "Number of files used to get count: "+str(pot['n_files'])+"\n", \
+                        "POT of files used to get count: "+str(pot['pot'])+"\n", \
                         "Scale factor:"+str(scale_factor)+"\n"])
     outfile.close()
 
-    # PLOT: Signal Event Info      
-    plot_muons(muon_dict, scale_factor, sig_bkg = 0)
-    plot_hadrons(hadron_dict, scale_factor, sig_bkg = 0)
-
 
 if __name__=='__main__':
     parser = argparse.ArgumentParser()
@@ -111,7 +193,23 @@ if __name__=='__main__':
                         help='''string corresponding to the path of the directory containing edep-sim or larnd ouput simulation file to be considered''')
     parser.add_argument('-t', '--input_type', default='larnd', choices=['edep', 'larnd'], type=str, \
                         help='''string corresponding to the output file type: edep or larnd''')
-    parser.add_argument('-n', '--n_files_processed', default=1, required=True, type=int, \
-                        help='''File count of number of files processed in production sample''')
+    parser.add_argument('-n', '--n_files_processed', default=None, type=int, \
+                        help='''Process only the first n files of the sorted file list (default: all); the POT of the files processed is recorded automatically''')
+    parser.add_argument('-w', '--workers', default=1, type=int, \
+                        help='''Number of worker processes used to process files and draw plots in parallel''')
+    parser.add_argument('-o', '--output_format', default='json', choices=['json', 'npz'], type=str, \
+                        help='''Output dictionary file format: indented JSON or columnar NumPy .npz''')
+    parser.add_argument('-f', '--flush_every', default=0, type=int, \
+                        help='''If > 0, write records to JSON Lines files every this many events instead of holding them in memory''')
+    parser.add_argument('-r', '--shard_dir', default=None, type=str, \
+                        help='''Directory for per-file result shards and the run manifest; a rerun with the same directory only processes new or changed files''')
+    parser.add_argument('--timing_report', default=None, type=str, \
+                        help='''If given, time the processing stages and write the timing report to this JSON file''')
+    parser.add_argument('-p', '--prefetch', default=1, type=int, \
+                        help='''Number of spills read ahead by a background thread when workers = 1 (0 to read in the main thread); memory grows with it by about one selected spill each''')
+    parser.add_argument('-s', '--shard', default=None, type=result_shards.parse_shard, \
+                        help='''Process only batch shard i/N (0 <= i < N) of the sorted file list; combine the shards with merge_shards.py''')
+    parser.add_argument('-b', '--block_size', default=file_parsing.default_block_size, type=int, \
+                        help='''Largest read of a dataset held in memory [bytes] (default: 256 MiB); smaller blocks lower peak memory at the cost of more reads''')
     args = parser.parse_args()
     main(**vars(args))
@@ -27,20 +27,16 @@ def main(sim_file, input_type):
 #    return
 
     ### partition file by spill
-    unique_spill = np.unique(sim_h5['trajectories']['spillID'])
-    for spill_id in unique_spill:
-
-        ghdr, gstack, traj, vert, seg = file_parsing.get_spill_data(sim_h5, spill_id)
+    for spill_id, ghdr, gstack, traj, vert, seg in file_parsing.iterate_spills(sim_h5, input_type):
 
         ### partition by vertex ID within beam spill
-        for v_i in range(len(vert['vertexID'])):
-            vert_pos= [vert['x_vert'][v_i], vert['y_vert'][v_i], vert['z_vert'][v_i]]
-            vert_in_active_LAr = geo_methods.fiducialized_vertex( vert_pos )
-
-            nu_mu_bar = truth.signal_nu_pdg(ghdr, vert['vertexID'][v_i])
-            is_cc = truth.signal_cc(ghdr, vert['vertexID'][v_i])
-            pionless = truth.signal_meson_status(gstack, vert['vertexID'][v_i])
-            fv_particle_origin=geo_methods.fiducialized_particle_origin(traj, vert['vertexID'][v_i])
+        vert_pos = np.column_stack((vert['x_vert'], vert['y_vert'], vert['z_vert']))
+        vert_in_active_LAr = geo_methods.fiducialized_vertices(vert_pos) # Check vertex locations relative to FV
+        for v_i in range(len(vert['vertex_id'])):
+            nu_mu_bar = truth.signal_nu_pdg(ghdr, vert['vertex_id'][v_i])
+            is_cc = truth.signal_cc(ghdr, vert['vertex_id'][v_i])
+            pionless = truth.signal_meson_status(gstack, vert['vertex_id'][v_i])
+            fv_particle_origin=geo_methods.fiducialized_particle_origin(traj, vert['vertex_id'][v_i])
 
 
 if __name__=='__main__':
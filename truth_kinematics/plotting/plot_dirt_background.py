@@ -11,9 +11,12 @@ import numpy as np
 import sys
 sys.path.append('../file_parsing')
 sys.path.append('../../common')
+from plot_histograms import render_figures
 
 
-def plot_dirt_backgrounds(d , sig_bkg =1):
+# PLOT: Dirt background muon kinematics
+#       figures are drawn in a pool of worker processes if workers > 1
+def plot_dirt_backgrounds(d , sig_bkg =1, workers =1):
 
     # DEFINE: Plotting muon kinematics for signal or background events
     
@@ -26,45 +29,20 @@ def plot_dirt_backgrounds(d , sig_bkg =1):
         sample_type = 'beam_bkg'
     else:
         return "Error: plot_muons function given undefined signal/background definition"
+    jobs = []
     
     #PLOT: total visible energy + contained visible energy
-    fig0, ax0 = plt.subplots(1,2,figsize=(8,4))
-    bins=np.linspace(0,1000,50)
-    ax0[0].hist([d[key]['total_edep'] for key in d.keys() if d[key]['pdg']==-13],
-                bins=bins, label='total', histtype='step')
-    ax0[1].hist([d[key]['total_edep'] for key in d.keys() if d[key]['pdg']==13],
-                bins=bins, label='total', histtype='step')
-
-    ax0[0].hist([d[key]['contained_edep'] for key in d.keys() if d[key]['pdg']==-13],
-                bins=bins, label='contained',histtype='step')
-    ax0[1].hist([d[key]['contained_edep'] for key in d.keys() if d[key]['pdg']==13],
-                bins=bins, label='contained', histtype='step')
-
-    for i in range(2):
-        ax0[i].set_xlabel('Visible Energy [MeV]')
-        ax0[i].set_ylabel('Count / 20 MeV')
-        ax0[i].grid(True)
-        if i==0: ax0[i].set_title(r'$\mu^+$'); ax0[i].legend()
-        if i==1: ax0[i].set_title(r'$\mu^-$')    
-    plt.savefig(sample_type + '_muon_vis_edep.png')
+    total = [[d[key]['total_edep'] for key in d.keys() if d[key]['pdg']==pdg] for pdg in (-13, 13)]
+    contained = [[d[key]['contained_edep'] for key in d.keys() if d[key]['pdg']==pdg] for pdg in (-13, 13)]
+    jobs.append((draw_muon_charge_comparison, (total, contained, np.linspace(0,1000,50), 'Visible Energy [MeV]', 'Count / 20 MeV', \
+                                               sample_type + '_muon_vis_edep.png')))
 
     #PLOT:c containment fraction
-    fig1, ax1 = plt.subplots(figsize=(6,4))
-    bins=np.linspace(0,1,20)
-    ax1.hist([d[key]['contained_edep']/d[key]['total_edep'] for key in d.keys() if d[key]['pdg']==13 and d[key]['total_edep']!=0],
-             bins=bins, label=r'$\mu^+$', histtype='step')
-    ax1.hist([d[key]['contained_edep']/d[key]['total_edep'] for key in d.keys() if d[key]['pdg']==-13 and d[key]['total_edep']!=0],
-             bins=bins, label=r'$\mu^-$', histtype='step')
-
-    ax1.set_xlabel('Visible Energy Containment Fraction')
-    ax1.set_ylabel('Count')
-    ax1.legend()
-    ax1.grid(True)
-    #plt.show()
-    plt.savefig(sample_type+'_muon_edep_containment_fraction,png')
+    fraction = [[d[key]['contained_edep']/d[key]['total_edep'] for key in d.keys() if d[key]['pdg']==pdg and d[key]['total_edep']!=0] \
+                for pdg in (13, -13)]
+    jobs.append((draw_containment_fraction, (fraction, np.linspace(0,1,20), sample_type+'_muon_edep_containment_fraction,png')))
 
     #PLOT: parent pdg pi chart
-    fig2, ax2 = plt.subplots(1,2,figsize=(8,4))
     muplus_parent_pdg_list=[d[key]['parent_pdg'] for key in d.keys() if d[key]['pdg']==-13]
     print('check parent pdg lisr: ', muplus_parent_pdg_list)
 
@@ -73,8 +51,6 @@ def plot_dirt_backgrounds(d , sig_bkg =1):
     muplus_fraction=[100*(i[1]/len(muplus_parent_pdg_list)) for i in muplus_particle_count]
     muplus_pdg_label=[str(i[0]) for i in muplus_particle_count]
     print('$\mu^+$: ',muplus_particle_count)
-    ax2[0].pie(muplus_fraction, labels=muplus_pdg_label, autopct='%1.1f%%')
-    ax2[0].set_title(r'$\mu^+$')
     
     muminus_parent_pdg_list=[d[key]['parent_pdg'] for key in d.keys() if d[key]['pdg']==13]
     muminus_parent_pdg_set=set(muminus_parent_pdg_list)
@@ -82,64 +58,79 @@ def plot_dirt_backgrounds(d , sig_bkg =1):
     muminus_fraction=[100*(i[1]/len(muminus_parent_pdg_list)) for i in muminus_particle_count]
     muminus_pdg_label=[str(i[0]) for i in muminus_particle_count]
     print('$\mu^-$: ',muminus_particle_count)
-    ax2[1].pie(muminus_fraction, labels=muminus_pdg_label, autopct='%1.1f%%')
-    ax2[1].set_title(r'$\mu^-$')
-    #plt.show()
-    plt.savefig(sample_type+'_muon_parent_pdg.png')
+    jobs.append((draw_parent_pdg_pies, ((muplus_fraction, muminus_fraction), (muplus_pdg_label, muminus_pdg_label), \
+                                        sample_type+'_muon_parent_pdg.png')))
 
     #PLOT: Visible length
-    fig3, ax3 = plt.subplots(1,2,figsize=(8,4))
-    bins=np.linspace(0,400,40)
-    ax3[0].hist([d[key]['total_length'] for key in d.keys() if d[key]['pdg']==-13],
-                bins=bins, label='total', histtype='step')
-    ax3[1].hist([d[key]['total_length'] for key in d.keys() if d[key]['pdg']==13],
-                bins=bins, label='total', histtype='step')
-    ax3[0].hist([d[key]['contained_length'] for key in d.keys() if d[key]['pdg']==-13],
-                bins=bins, label='contained',histtype='step')
-    ax3[1].hist([d[key]['contained_length'] for key in d.keys() if d[key]['pdg']==13],
-                bins=bins, label='contained', histtype='step')
-    for i in range(2):
-        ax3[i].set_xlabel('Track Length [cm]')
-        ax3[i].set_ylabel('Count / 10 cm')
-        ax3[i].grid(True)
-        if i==0: ax3[i].set_title(r'$\mu^+$'); ax3[i].legend()
-        if i==1: ax3[i].set_title(r'$\mu^-$')
-
-    #plt.show()
-    plt.savefig(sample_type+'_muon_track_length')
+    total = [[d[key]['total_length'] for key in d.keys() if d[key]['pdg']==pdg] for pdg in (-13, 13)]
+    contained = [[d[key]['contained_length'] for key in d.keys() if d[key]['pdg']==pdg] for pdg in (-13, 13)]
+    jobs.append((draw_muon_charge_comparison, (total, contained, np.linspace(0,400,40), 'Track Length [cm]', 'Count / 10 cm', \
+                                               sample_type+'_muon_track_length')))
     
     # PLOT: truth-level outgoing muon (lepton) angle                                                                
-    fig2, ax2 = plt.subplots(figsize=(6,4))
     data2 = np.cos((np.pi / 180.)*np.array([d[key]['true_angle'] for key in d.keys()]))
-    bins2 = np.linspace(0.75,1,51)
-    ax2.hist(data2, bins=bins2, histtype='step')
-    ax2.set_xlabel(r"Cosine of Outgoing Muon Angle with Beam Direction")
-    ax2.set_ylabel("Count")
-    plt.savefig(sample_type+"_events_outgoing_muon_angle_truth.png")
+    jobs.append((draw_truth_histogram, (data2, np.linspace(0.75,1,51), r"Cosine of Outgoing Muon Angle with Beam Direction", \
+                                        sample_type+"_events_outgoing_muon_angle_truth.png")))
 
     # PLOT: truth-level outgoing muon (lepton) momentum                                                                
-    fig3, ax3 = plt.subplots(figsize=(6,4))
     data3 = np.array([d[key]['true_mom'] for key in d.keys()])
-    bins3 = np.linspace(0,30000,21)
-    ax3.hist(data3, bins=bins3, histtype='step')
-    ax3.set_xlabel(r"Outgoing Muon Momentum [MeV]")
-    ax3.set_ylabel("Count")
-    plt.savefig(sample_type+"_events_outgoing_muon_momentum_truth.png")
+    jobs.append((draw_truth_histogram, (data3, np.linspace(0,30000,21), r"Outgoing Muon Momentum [MeV]", \
+                                        sample_type+"_events_outgoing_muon_momentum_truth.png")))
 
     # PLOT: truth-level 4-momentum squared of interaction                                                                
-    fig4, ax4 = plt.subplots(figsize=(6,4))
     data4 = np.array([d[key]['q_sq'] for key in d.keys()])
-    bins4 = np.linspace(0,3000000,21)
-    ax4.hist(data4, bins=bins4, histtype='step')
-    ax4.set_xlabel(r"4-Momentum Transfer Squared [MeV$^2$]")
-    ax4.set_ylabel("Count")
-    plt.savefig(sample_type+"_events_qsq_truth.png")
+    jobs.append((draw_truth_histogram, (data4, np.linspace(0,3000000,21), r"4-Momentum Transfer Squared [MeV$^2$]", \
+                                        sample_type+"_events_qsq_truth.png")))
 
     # PLOT: truth-level neutrino energy of interaction                                                                  
-    fig5, ax5 = plt.subplots(figsize=(6,4))
     data5 = np.array([d[key]['nu_energy'] for key in d.keys()])
-    bins5 = np.linspace(0,20000,21)
-    ax5.hist(data5, bins=bins5, histtype='step')
-    ax5.set_xlabel(r"Incident Neutrino Energy [MeV]")
-    ax5.set_ylabel("Count")
-    plt.savefig(sample_type+"_events_nu_energy_truth.png")
+    jobs.append((draw_truth_histogram, (data5, np.linspace(0,20000,21), r"Incident Neutrino Energy [MeV]", \
+                                        sample_type+"_events_nu_energy_truth.png")))
+
+    render_figures(jobs, workers)
+
+
+# PLOT: total and contained quantities of mu+ (total[0], contained[0]) and 
+#       mu- (total[1], contained[1]) side by side
+def draw_muon_charge_comparison(total, contained, bins, xlabel, ylabel, file_name):
+    fig, ax = plt.subplots(1,2,figsize=(8,4))
+    for i in range(2):
+        ax[i].hist(total[i], bins=bins, label='total', histtype='step')
+        ax[i].hist(contained[i], bins=bins, label='contained', histtype='step')
+        ax[i].set_xlabel(xlabel)
+        ax[i].set_ylabel(ylabel)
+        ax[i].grid(True)
+        if i==0: ax[i].set_title(r'$\mu^+$'); ax[i].legend()
+        if i==1: ax[i].set_title(r'$\mu^-$')    
+    fig.savefig(file_name)
+    plt.close(fig)
+
+
+def draw_containment_fraction(fraction, bins, file_name):
+    fig, ax = plt.subplots(figsize=(6,4))
+    ax.hist(fraction[0], bins=bins, label=r'$\mu^+$', histtype='step')
+    ax.hist(fraction[1], bins=bins, label=r'$\mu^-$', histtype='step')
+    ax.set_xlabel('Visible Energy Containment Fraction')
+    ax.set_ylabel('Count')
+    ax.legend()
+    ax.grid(True)
+    fig.savefig(file_name)
+    plt.close(fig)
+
+
+def draw_parent_pdg_pies(fractions, labels, file_name):
+    fig, ax = plt.subplots(1,2,figsize=(8,4))
+    for i, title in enumerate([r'$\mu^+$', r'$\mu^-$']):
+        if len(fractions[i])>0: ax[i].pie(fractions[i], labels=labels[i], autopct='%1.1f%%') # no muons of this charge: empty axes
+        ax[i].set_title(title)
+    fig.savefig(file_name)
+    plt.close(fig)
+
+
+def draw_truth_histogram(data, bins, xlabel, file_name):
+    fig, ax = plt.subplots(figsize=(6,4))
+    ax.hist(data, bins=bins, histtype='step')
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Count")
+    fig.savefig(file_name)
+    plt.close(fig)
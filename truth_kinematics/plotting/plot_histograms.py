@@ -0,0 +1,76 @@
+################################################################################
+##                                                                            ##
+##    CONTAINS: Methods to draw histograms filled from a table of histogram   ##
+##              specifications with common/histogram_methods.py, stacking     ##
+##              categories shared by the plotting scripts, and a renderer     ##
+##              drawing figures in a pool of worker processes.                ##
+##                                                                            ##
+################################################################################
+
+import multiprocessing
+import matplotlib.pyplot as plt
+
+# Stack by neutrino interaction mechanism (see truth_methods.nu_int_type)
+INT_TYPE_STACK = dict(field='nu_int_type', values=['UND', 'COH', 'DIS', 'RES', 'MEC', 'QES'],
+                      labels=['Other', 'COH', 'DIS', 'RES', 'MEC', 'QES'],
+                      colors=['brown', 'orange', 'red', 'purple', 'blue', 'green', ])
+
+
+####------------------------------ RENDERING -------------------------------####
+
+# Draws figures given as (draw function, arguments) jobs. A draw function is a
+# module-level function that draws and saves one figure from precomputed data,
+# so that jobs can be sent to a pool of worker processes (using the Agg
+# backend) if workers > 1. Each figure is drawn from scratch by a single call,
+# so the files written do not depend on the number of workers.
+def render_figures(jobs, workers=1):
+    if workers > 1 and len(jobs) > 1:
+        with multiprocessing.Pool(min(workers, len(jobs)), initializer=plt.switch_backend, initargs=('Agg',)) as pool:
+            pool.starmap(render_figure, jobs)
+    else:
+        for draw, args in jobs: draw(*args)
+
+
+def render_figure(draw, args):
+    draw(*args)
+
+
+####--------------------------- DRAW HISTOGRAMS ----------------------------####
+
+# Jobs (see render_figures) drawing the histograms returned by
+# histogram_methods.fill_histograms, saved as sample_type+name; sample_title
+# replaces '{sample}' in titles
+def histogram_jobs(hists, sample_type, sample_title):
+    return [(draw_histogram, (hist, sample_type, sample_title)) for hist in hists]
+
+
+def draw_histogram(hist, sample_type, sample_title):
+    fig, ax = plt.subplots(figsize=hist.get('figsize', (6,4)))
+    bins = hist['bins']
+    if 'stack' in hist:
+        ax.hist(tuple(bins[:-1] for counts in hist['counts']), bins=bins, weights=tuple(hist['counts']), \
+                histtype='bar', label=hist['stack']['labels'], stacked=True, color=hist['stack'].get('colors'))
+    else:
+        for i, counts in enumerate(hist['counts']):
+            style = dict(histtype='step')
+            if 'labels' in hist: style['label'] = hist['labels'][i]
+            if hist.get('linestyles', [None]*(i+1))[i] is not None: style['linestyle'] = hist['linestyles'][i]
+            ax.hist(bins[:-1], bins=bins, weights=counts, **style)
+    if 'xlabel' in hist: ax.set_xlabel(hist['xlabel'])
+    if 'ylabel' in hist: ax.set_ylabel(hist['ylabel'])
+    if 'title' in hist: ax.set_title(hist['title'].format(sample=sample_title))
+    if 'xlim' in hist: ax.set_xlim(*hist['xlim'])
+    if hist.get('log'): ax.set_yscale('log')
+    if hist.get('grid'): ax.grid(True)
+    if 'legend' in hist: ax.legend(loc=hist['legend'])
+    fig.savefig(sample_type+hist['name'])
+    plt.close(fig)
+
+
+# PLOT: pie chart of fractions [%]
+def draw_pie(fractions, labels, title, file_name):
+    fig, ax = plt.subplots(figsize=(6,4))
+    ax.pie(fractions, labels=labels, autopct='%1.1f%%')
+    ax.set_title(title)
+    fig.savefig(file_name)
+    plt.close(fig)
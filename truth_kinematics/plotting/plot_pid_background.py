@@ -8,17 +8,11 @@
 import matplotlib.pyplot as plt
 import argparse
 import numpy as np
-import json
 from mpl_toolkits.axes_grid1.inset_locator import (inset_axes, InsetPosition, mark_inset)
 import sys
 sys.path.append('../../common')
 import file_parsing
-
-
-def files_processed(processed_files, total_files=1023, \
-                    production_pot=1e19, target_pot=2.5e19):
-    return target_pot/((processed_files*production_pot)/total_files)
-
+import pot_accounting
 
 
 def charged_pion_threshold(d, threshold, scale_factor):
@@ -99,13 +93,13 @@ def charged_pion_threshold(d, threshold, scale_factor):
 
     
 
-def main(nc_json_file, tracking_threshold, n_files_processed):
-    f = open(nc_json_file)
-    nc_pion_dict=json.load(f)
-    scale_factor = files_processed(n_files_processed)
+def main(nc_json_file, tracking_threshold, n_files_processed=None, output_format='json'):
+    nc_pion_dict=file_parsing.load_dict(nc_json_file) # JSON or NPZ
+    pot = pot_accounting.load_pot_record(nc_json_file, n_files_processed) # POT the input was made from
+    scale_factor = pot_accounting.scale_factor(pot['pot'])
     bgd_dict = charged_pion_threshold(nc_pion_dict, tracking_threshold, \
                                       scale_factor)
-    file_parsing.save_dict_to_json(bgd_dict, 'nc_pid_bkg_dict', True)
+    file_parsing.save_dict(bgd_dict, 'nc_pid_bkg_dict', True, output_format, pot)
     
 
 
@@ -115,7 +109,9 @@ if __name__=='__main__':
                         help='''string corresponding to the path of the NC pion backgrounds JSON file''')
     parser.add_argument('-t', '--tracking_threshold', default=3., required=False, type=float, \
                         help='''Tracking threshold in track length [cm]''')
-    parser.add_argument('-n', '--n_files_processed', default=1, required=True, type=int, \
-                        help='''File count of number of files processed in production sample''')
+    parser.add_argument('-n', '--n_files_processed', default=None, type=int, \
+                        help='''File count of number of files processed in production sample; only needed for input without a POT record''')
+    parser.add_argument('-o', '--output_format', default='json', choices=['json', 'npz'], type=str, \
+                        help='''Output dictionary file format: indented JSON or columnar NumPy .npz''')
     args = parser.parse_args()
     main(**vars(args))
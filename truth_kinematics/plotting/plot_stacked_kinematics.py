@@ -8,44 +8,59 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-import json
 import argparse
-
-
-
-def files_processed(processed_files, total_files=1023, \
-                    production_pot=1e19, target_pot=2.5e19):
-    return target_pot/((processed_files*production_pot)/total_files)
-
-
-
-def plot_stacked_histo(signal, signal_factor, \
-                       cc_threshold, cc_threshold_factor, \
-                       nc_pid, nc_pid_factor, dirt, dirt_factor, \
-                       metric, bins, xlabel, ylabel, figname, leg_location, \
-                       xlim,yscale):
-    fig, ax = plt.subplots(figsize=(6,6))
-
-    s = [signal[key][metric]/1e3 for key in signal.keys()]
-    d = [dirt[key][metric]/1e3 for key in dirt.keys()]
-    t = [cc_threshold[key][metric]/1e3 for key in cc_threshold.keys()]
-    p = [nc_pid[key][metric]/1e3 for key in nc_pid.keys()]
-    if metric=='q2':
-        s = [signal[key][metric]/1e6 for key in signal.keys()]
-        d = [dirt[key][metric]/1e6 for key in dirt.keys()]
-        t = [cc_threshold[key][metric]/1e6 for key in cc_threshold.keys()]
-        p = [nc_pid[key][metric]/1e6 for key in nc_pid.keys()]        
+import sys
+sys.path.append('../../common')
+import table_columns
+import pot_accounting
+from plot_histograms import render_figures
+
+
+# Metrics the dirt background table (see dirt_backgrounds.py) does not define:
+# it has no vertex position and keeps the truth Q^2 and lepton kinematics under
+# other names and units (q_sq, true_mom, true_angle in degrees), so the dirt 
+# sample is left out of these stacks
+dirt_undefined_metrics = ('q2', 'mom', 'ang', 'vtx_x', 'vtx_y', 'vtx_z')
+
+
+# Values of metric in sample (columns, see table_columns.load_columns); a table
+# without records has no columns and gives no values
+def sample_values(sample, metric, unit):
+    if table_columns.n_records(sample)==0: return np.zeros(0)
+    return sample[metric]/unit
+
+
+# Job (see plot_histograms.render_figures) drawing metric of all samples
+def stacked_histo(signal, signal_factor, \
+                  cc_threshold, cc_threshold_factor, \
+                  nc_pid, nc_pid_factor, dirt, dirt_factor, \
+                  metric, bins, xlabel, ylabel, figname, leg_location, \
+                  xlim,yscale):
+
+    unit = 1e6 if metric=='q2' else 1e3
+    s = sample_values(signal, metric, unit)
+    d = sample_values(dirt, metric, unit) if metric not in dirt_undefined_metrics else np.zeros(0)
+    t = sample_values(cc_threshold, metric, unit)
+    p = sample_values(nc_pid, metric, unit)
+    if metric in dirt_undefined_metrics: print('dirt background: ', metric, ' not defined, not stacked')
         
-    s_weight = [signal_factor]*len(s)
-    d_weight = [dirt_factor]*len(d)
-    t_weight = [cc_threshold_factor]*len(t)
-    p_weight = [nc_pid_factor]*len(p)
+    s_weight = np.full(len(s), signal_factor)
+    d_weight = np.full(len(d), dirt_factor)
+    t_weight = np.full(len(t), cc_threshold_factor)
+    p_weight = np.full(len(p), nc_pid_factor)
 
     print('signal: ',len(s)*signal_factor,'\n',
           'dirt background: ',len(d)*dirt_factor,'\n',
           'threshold background: ',len(t)*cc_threshold_factor,'\n',
           'pid background: ',len(p)*nc_pid_factor)
 
+    return (draw_stacked_histo, (s, s_weight, d, d_weight, t, t_weight, p, p_weight, \
+                                 bins, xlabel, ylabel, figname, leg_location, xlim, yscale))
+
+
+def draw_stacked_histo(s, s_weight, d, d_weight, t, t_weight, p, p_weight, \
+                       bins, xlabel, ylabel, figname, leg_location, xlim, yscale):
+    fig, ax = plt.subplots(figsize=(6,6))
     ax.hist(s, bins=bins, weights=s_weight, stacked=True, histtype='bar',\
             label=r'mesonless $\bar{\nu}_\mu$ CC')
     ax.hist(p, bins=bins, weights=p_weight,  stacked=True, histtype='bar',\
@@ -60,104 +75,108 @@ def plot_stacked_histo(signal, signal_factor, \
     ax.set_yscale(yscale)
     ax.legend(loc=leg_location)
     ax.grid(True)
-    plt.savefig(figname+'.png')
+    fig.savefig(figname+'.png')
+    plt.close(fig)
     
 
 
-def main(signal, n_signal, dirt, n_dirt, \
-         cc_threshold, n_cc_threshold, nc_pid, n_nc_pid):
-    f = open(signal)
-    signal_dict=json.load(f)
-    signal_sf = files_processed(n_signal)
-
-    f = open(dirt)
-    dirt_dict=json.load(f)
-    dirt_sf = files_processed(n_dirt)
-
-    f = open(cc_threshold)
-    cc_threshold_dict=json.load(f)
-    cc_threshold_sf = files_processed(n_cc_threshold)
-
-    f = open(nc_pid)
-    nc_pid_dict=json.load(f)
-    nc_pid_sf = files_processed(n_nc_pid)                     
-
-    plot_stacked_histo(signal_dict, signal_sf, \
-                       cc_threshold_dict, cc_threshold_sf, \
-                       nc_pid_dict, nc_pid_sf, \
-                       dirt_dict, dirt_sf, \
-                       'nu_energy', np.linspace(0,10,21), \
-                       r'$\nu$ Energy [GeV]', r'$\nu$ Interactions / 500 MeV',\
-                       'stacked_nu_energy', 'center right',(0,10),'linear')
-
-    plot_stacked_histo(signal_dict, signal_sf, \
-                       cc_threshold_dict, cc_threshold_sf, \
-                       nc_pid_dict, nc_pid_sf, \
-                       dirt_dict, dirt_sf, \
-                       'q2', np.linspace(0,5,26), \
-                       r'$Q^2$ [GeV$^2$]', r'$\nu$ Interactions / 200 MeV$^2$',\
-                       'stacked_q2', 'upper right',(0,5),'linear')
-
-    plot_stacked_histo(signal_dict, signal_sf, \
-                       cc_threshold_dict, cc_threshold_sf, \
-                       nc_pid_dict, nc_pid_sf, \
-                       dirt_dict, dirt_sf, \
-                       'mom', np.linspace(0,10,21), \
-                       r'Muon Candidate Momentum [GeV/c]', \
-                       r'$\nu$ Interactions / 500 MeV/c',\
-                       'stacked_mu_momentum', 'center right',(0,10),'linear')
-
-    plot_stacked_histo(signal_dict, signal_sf, \
-                       cc_threshold_dict, cc_threshold_sf, \
-                       nc_pid_dict, nc_pid_sf, \
-                       dirt_dict, dirt_sf, \
-                       'ang', np.linspace(-0.45,0.75,61), \
-                       r'$\theta_\mu$ [radians]', r'$\nu$ Interactions / 0.02 radians',\
-                       'stacked_mu_angle', 'upper right',(-0.45,0.75),'linear')
-
-    plot_stacked_histo(signal_dict, signal_sf, \
-                       cc_threshold_dict, cc_threshold_sf, \
-                       nc_pid_dict, nc_pid_sf, \
-                       dirt_dict, dirt_sf, \
-                       'vtx_x', np.linspace(-600,600,51), \
-                       r'$\nu$ Vertex X Position [cm]', r'$\nu$ Interactions',\
-                       'stacked_vertex_x', 'upper right',(-600,600),'linear')
-
-    plot_stacked_histo(signal_dict, signal_sf, \
-                       cc_threshold_dict, cc_threshold_sf, \
-                       nc_pid_dict, nc_pid_sf, \
-                       dirt_dict, dirt_sf, \
-                       'vtx_y', np.linspace(-500,500,51), \
-                       r'$\nu$ Vertex Y Position [cm]', r'$\nu$ Interactions',\
-                       'stacked_vertex_y', 'upper right',(-500,500),'linear')
-
-    plot_stacked_histo(signal_dict, signal_sf, \
-                       cc_threshold_dict, cc_threshold_sf, \
-                       nc_pid_dict, nc_pid_sf, \
-                       dirt_dict, dirt_sf, \
-                       'vtx_z', np.linspace(-2000,1000,51), \
-                       r'$\nu$ Vertex Z Position [cm]', r'$\nu$ Interactions',\
-                       'stacked_vertex_z', 'upper right',(-2000,1000),'linear')
+# Each sample is scaled to 2.5e19 POT from the POT record of its file (see 
+# pot_accounting); the file counts are only used for files without one
+def main(signal, dirt, cc_threshold, nc_pid, n_signal=None, n_dirt=None, \
+         n_cc_threshold=None, n_nc_pid=None, workers=1):
+    signal_dict=table_columns.load_columns(signal) # JSON or NPZ
+    signal_sf = pot_accounting.table_scale_factor(signal, n_signal)
+
+    dirt_dict=table_columns.load_columns(dirt)
+    dirt_sf = pot_accounting.table_scale_factor(dirt, n_dirt)
+
+    cc_threshold_dict=table_columns.load_columns(cc_threshold)
+    cc_threshold_sf = pot_accounting.table_scale_factor(cc_threshold, n_cc_threshold)
+
+    nc_pid_dict=table_columns.load_columns(nc_pid)
+    nc_pid_sf = pot_accounting.table_scale_factor(nc_pid, n_nc_pid)
+
+    jobs = []
+
+    jobs.append(stacked_histo(signal_dict, signal_sf, \
+                              cc_threshold_dict, cc_threshold_sf, \
+                              nc_pid_dict, nc_pid_sf, \
+                              dirt_dict, dirt_sf, \
+                              'nu_energy', np.linspace(0,10,21), \
+                              r'$\nu$ Energy [GeV]', r'$\nu$ Interactions / 500 MeV',\
+                              'stacked_nu_energy', 'center right',(0,10),'linear'))
+
+    jobs.append(stacked_histo(signal_dict, signal_sf, \
+                              cc_threshold_dict, cc_threshold_sf, \
+                              nc_pid_dict, nc_pid_sf, \
+                              dirt_dict, dirt_sf, \
+                              'q2', np.linspace(0,5,26), \
+                              r'$Q^2$ [GeV$^2$]', r'$\nu$ Interactions / 200 MeV$^2$',\
+                              'stacked_q2', 'upper right',(0,5),'linear'))
+
+    jobs.append(stacked_histo(signal_dict, signal_sf, \
+                              cc_threshold_dict, cc_threshold_sf, \
+                              nc_pid_dict, nc_pid_sf, \
+                              dirt_dict, dirt_sf, \
+                              'mom', np.linspace(0,10,21), \
+                              r'Muon Candidate Momentum [GeV/c]', \
+                              r'$\nu$ Interactions / 500 MeV/c',\
+                              'stacked_mu_momentum', 'center right',(0,10),'linear'))
+
+    jobs.append(stacked_histo(signal_dict, signal_sf, \
+                              cc_threshold_dict, cc_threshold_sf, \
+                              nc_pid_dict, nc_pid_sf, \
+                              dirt_dict, dirt_sf, \
+                              'ang', np.linspace(-0.45,0.75,61), \
+                              r'$\theta_\mu$ [radians]', r'$\nu$ Interactions / 0.02 radians',\
+                              'stacked_mu_angle', 'upper right',(-0.45,0.75),'linear'))
+
+    jobs.append(stacked_histo(signal_dict, signal_sf, \
+                              cc_threshold_dict, cc_threshold_sf, \
+                              nc_pid_dict, nc_pid_sf, \
+                              dirt_dict, dirt_sf, \
+                              'vtx_x', np.linspace(-600,600,51), \
+                              r'$\nu$ Vertex X Position [cm]', r'$\nu$ Interactions',\
+                              'stacked_vertex_x', 'upper right',(-600,600),'linear'))
+
+    jobs.append(stacked_histo(signal_dict, signal_sf, \
+                              cc_threshold_dict, cc_threshold_sf, \
+                              nc_pid_dict, nc_pid_sf, \
+                              dirt_dict, dirt_sf, \
+                              'vtx_y', np.linspace(-500,500,51), \
+                              r'$\nu$ Vertex Y Position [cm]', r'$\nu$ Interactions',\
+                              'stacked_vertex_y', 'upper right',(-500,500),'linear'))
+
+    jobs.append(stacked_histo(signal_dict, signal_sf, \
+                              cc_threshold_dict, cc_threshold_sf, \
+                              nc_pid_dict, nc_pid_sf, \
+                              dirt_dict, dirt_sf, \
+                              'vtx_z', np.linspace(-2000,1000,51), \
+                              r'$\nu$ Vertex Z Position [cm]', r'$\nu$ Interactions',\
+                              'stacked_vertex_z', 'upper right',(-2000,1000),'linear'))
+
+    render_figures(jobs, workers)
 
 
-    
 if __name__=='__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-s','--signal', default='signal_dict.json', \
-                        type=str, help='''signal JSON''')
-    parser.add_argument('-ns','--n_signal', default=50, type=int, \
-                        help='''number of files processed for signal JSON''')
+                        type=str, help='''signal JSON (or NPZ)''')
+    parser.add_argument('-ns','--n_signal', default=None, type=int, \
+                        help='''number of files processed for signal JSON; only needed for a file without a POT record''')
     parser.add_argument('-cc','--cc_threshold', default='cc_threshold_bkg_dict.json', \
-                        type=str, help='''nuCC threshold background JSON''')
-    parser.add_argument('-ncc','--n_cc_threshold', default=100, type=int, \
-                        help='''number of files processed for nuCC threshold background JSON''')
+                        type=str, help='''nuCC threshold background JSON (or NPZ)''')
+    parser.add_argument('-ncc','--n_cc_threshold', default=None, type=int, \
+                        help='''number of files processed for nuCC threshold background JSON; only needed for a file without a POT record''')
     parser.add_argument('-nc','--nc_pid', default='nc_pid_bkg_dict.json', \
-                        type=str, help='''nuNC PID background JSON''')
-    parser.add_argument('-nnc','--n_nc_pid', default=100, type=int, \
-                        help='''number of files processed for nuNC pid background JSON''')
+                        type=str, help='''nuNC PID background JSON (or NPZ)''')
+    parser.add_argument('-nnc','--n_nc_pid', default=None, type=int, \
+                        help='''number of files processed for nuNC pid background JSON; only needed for a file without a POT record''')
     parser.add_argument('-d','--dirt', default='dirt_bkg_dict.json', \
-                        type=str, help='''dirt background JSON''')
-    parser.add_argument('-nd','--n_dirt', default=1000, type=int, \
-                        help='''number of files processed for dirt background JSON''')
+                        type=str, help='''dirt background JSON (or NPZ)''')
+    parser.add_argument('-nd','--n_dirt', default=None, type=int, \
+                        help='''number of files processed for dirt background JSON; only needed for a file without a POT record''')
+    parser.add_argument('-w','--workers', default=1, type=int, \
+                        help='''number of worker processes used to draw plots''')
     args = parser.parse_args()
     main(**vars(args))
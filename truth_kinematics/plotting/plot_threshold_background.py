@@ -8,11 +8,11 @@
 import matplotlib.pyplot as plt
 import argparse
 import numpy as np
-import json
 from mpl_toolkits.axes_grid1.inset_locator import (inset_axes, InsetPosition, mark_inset)
 import sys
 sys.path.append('../../common')
 import file_parsing
+import pot_accounting
 
 # threshold backgrounds: ==> only addressing charged pions for now...!!!
 # (1) any charged pions in event are sufficiently short such that they are undetectable --> less than 3 cm (6-7 pixels)
@@ -22,12 +22,6 @@ import file_parsing
 
 
 
-def files_processed(processed_files, total_files=1023, \
-                    production_pot=1e19, target_pot=2.5e19):
-    return target_pot/((processed_files*production_pot)/total_files)
-    
-
-
 def charged_pion_threshold(d, threshold, scale_factor):
     background_dict=dict()
     
@@ -97,13 +91,13 @@ def charged_pion_threshold(d, threshold, scale_factor):
     return background_dict
 
 
-def main(cc_json_file, tracking_threshold, n_files_processed):
-    f = open(cc_json_file)
-    cc_pion_dict=json.load(f)
-    scale_factor = files_processed(n_files_processed)
+def main(cc_json_file, tracking_threshold, n_files_processed=None, output_format='json'):
+    cc_pion_dict=file_parsing.load_dict(cc_json_file) # JSON or NPZ
+    pot = pot_accounting.load_pot_record(cc_json_file, n_files_processed) # POT the input was made from
+    scale_factor = pot_accounting.scale_factor(pot['pot'])
     bgd_dict = charged_pion_threshold(cc_pion_dict, tracking_threshold, \
                                       scale_factor)
-    file_parsing.save_dict_to_json(bgd_dict, 'cc_threshold_bkg_dict', True)
+    file_parsing.save_dict(bgd_dict, 'cc_threshold_bkg_dict', True, output_format, pot)
     
 
 
@@ -113,7 +107,9 @@ if __name__=='__main__':
                         help='''string corresponding to the path of the CC pion backgrounds JSON file''')
     parser.add_argument('-t', '--tracking_threshold', default=3., required=False, type=float, \
                         help='''Tracking threshold in track length [cm]''')
-    parser.add_argument('-n', '--n_files_processed', default=1, required=True, type=int, \
-                        help='''File count of number of files processed in production sample''')
+    parser.add_argument('-n', '--n_files_processed', default=None, type=int, \
+                        help='''File count of number of files processed in production sample; only needed for input without a POT record''')
+    parser.add_argument('-o', '--output_format', default='json', choices=['json', 'npz'], type=str, \
+                        help='''Output dictionary file format: indented JSON or columnar NumPy .npz''')
     args = parser.parse_args()
     main(**vars(args))
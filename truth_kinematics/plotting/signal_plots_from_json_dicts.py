@@ -3,35 +3,44 @@
 ##    CONTAINS: Script to create plots describing muons and hadrons in signal ##
 ##              events, using muon and hadron dictionaries created using the  ##
 ##              methods in /truth_kinematics/file_parsing/                    ##
-##              signal_characterization.py and a scale factor for scaling     ##
-##              event counts to those expected with 2.5e19 POT.               ##
+##              signal_characterization.py, scaling event counts to those     ##
+##              expected with 2.5e19 POT.                                     ##
 ##                                                                            ##
 ################################################################################
 
-import json
 import argparse
+import sys
+sys.path.append('../../common')
+import table_columns
+import pot_accounting
 from plot_signal_muons import plot_muons
 from plot_signal_hadrons import plot_hadrons
 
-def main(scale_factor, muon_json_file, hadron_json_file):
+# Without a scale factor, event counts are scaled from the POT record of the 
+# muon dictionary (see pot_accounting)
+def main(muon_json_file, hadron_json_file, scale_factor=None, n_files_processed=None, workers=1):
 
-    muon_file = open(muon_json_file)
-    muon_dict=json.load(muon_file)
+    if scale_factor is None: scale_factor = pot_accounting.table_scale_factor(muon_json_file, n_files_processed)
 
-    hadron_file = open(hadron_json_file)
-    hadron_dict=json.load(hadron_file)
+    muon_dict=table_columns.load_columns(muon_json_file) # JSON or NPZ
 
-    plot_muons(muon_dict, scale_factor, sig_bkg = 0)
-    plot_hadrons(hadron_dict, scale_factor, sig_bkg = 0)
+    hadron_dict=table_columns.load_columns(hadron_json_file) # JSON or NPZ
+
+    plot_muons(muon_dict, scale_factor, sig_bkg = 0, workers = workers)
+    plot_hadrons(hadron_dict, scale_factor, sig_bkg = 0, workers = workers)
 
 
 if __name__=='__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('-sf', '--scale_factor', default=1, required=True, type=float, \
-                        help='''Scale factor related to input dictionary''')
+    parser.add_argument('-sf', '--scale_factor', default=None, type=float, \
+                        help='''Scale factor related to input dictionary; by default computed from the POT record of the muon dictionary''')
+    parser.add_argument('-n', '--n_files_processed', default=None, type=int, \
+                        help='''File count of number of files processed in production sample; only needed for dictionaries without a POT record''')
     parser.add_argument('-mu', '--muon_json_file', default=None, required=True, type=str, \
-                        help='''string corresponding to the path of the muon info JSON file''')
+                        help='''string corresponding to the path of the muon info JSON (or NPZ) file''')
     parser.add_argument('-had', '--hadron_json_file', default=None, required=True, type=str, \
-                        help='''string corresponding to the path of the hadron info JSON file''')
+                        help='''string corresponding to the path of the hadron info JSON (or NPZ) file''')
+    parser.add_argument('-w', '--workers', default=1, type=int, \
+                        help='''Number of worker processes used to draw plots''')
     args = parser.parse_args()
     main(**vars(args))